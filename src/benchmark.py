@@ -0,0 +1,354 @@
+# benchmark.py → 18.10.2026
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from core import EnhancedGaborDetector, count_edges_multiline, count_vertical_edges
+from pipeline import BufferPool, get_pipeline
+from samples import load_samples, synthetic_stack
+
+STAGES = ['clahe', 'blur', 'bilateral', 'gabor', 'morphology', 'canny', 'count']
+DEFAULT_SIZES = [(256, 64), (512, 128), (1024, 256), (2048, 512)]
+# Bellek ölçümü: her karede yeni dizi ayıran yol ve BufferPool tamponlarına yazan yol
+MEMORY_MODES = ('fresh', 'pooled')
+
+
+def build_cases(sizes=DEFAULT_SIZES, assets_dir='assets', synthetic=True, assets=True):
+    """Ölçülecek (ad, gri görüntü) çiftlerini hazırlar."""
+    cases = []
+    if synthetic:
+        for height, width in sizes:
+            cases.append((f"synthetic_{height}x{width}", synthetic_stack(height, width)))
+    if assets and os.path.isdir(assets_dir):
+        for name, gray in load_samples(assets_dir):
+            cases.append((f"asset_{name}_{gray.shape[0]}x{gray.shape[1]}", gray))
+    return cases
+
+
+def time_stages(gray, repeats=30, warmup=3):
+    """Dedektör adımlarını, Canny'yi ve sayımı ayrı ayrı ölçer; adım başına süre listeleri döndürür."""
+    samples = {stage: [] for stage in STAGES}
+
+    for index in range(warmup + repeats):
+        detector = EnhancedGaborDetector(gray)
+        durations = {}
+
+        start = time.perf_counter()
+        detector.apply_clahe()
+        durations['clahe'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        detector.apply_blur(kernel_size=(11, 11))
+        durations['blur'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        detector.apply_bilateral_filter()
+        durations['bilateral'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        detector.apply_gabor_filter(ksize=10, sigma=5.7, theta=np.pi / 2, lambd=10.0)
+        durations['gabor'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        detector.apply_morphological_operations(erosion_kernel=3, dilation_kernel=5)
+        durations['morphology'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        edges = cv2.Canny(detector.filtered_image, 50, 150)
+        durations['canny'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        count_vertical_edges(edges)
+        count_edges_multiline(edges)
+        durations['count'] = time.perf_counter() - start
+
+        if index >= warmup:
+            for stage, seconds in durations.items():
+                samples[stage].append(seconds)
+
+    return samples
+
+
+def summarize_samples(samples, pixels):
+    """Süre listelerinden medyan, p95 ve throughput (MP/s) hesaplar."""
+    summary = {}
+    total = np.zeros(len(next(iter(samples.values()))))
+    for stage, values in samples.items():
+        values = np.asarray(values)
+        total += values
+        summary[stage] = _stats(values, pixels)
+    summary['total'] = _stats(total, pixels)
+    return summary
+
+
+def _stats(values, pixels):
+    median = float(np.median(values))
+    return {
+        'median_ms': median * 1000,
+        'p95_ms': float(np.percentile(values, 95)) * 1000,
+        'mpx_per_s': pixels / median / 1e6 if median > 0 else None,
+    }
+
+
+def run_benchmark(cases, repeats=30, warmup=3):
+    """Tüm durumları ölçer ve makine tarafından okunabilir sonuç sözlüğü döndürür."""
+    results = {}
+    for name, gray in cases:
+        samples = time_stages(gray, repeats, warmup)
+        results[name] = {
+            'shape': list(gray.shape),
+            'stages': summarize_samples(samples, gray.size),
+        }
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'opencv_threads': cv2.getNumThreads(),
+            'repeats': repeats,
+        },
+        'results': results,
+    }
+
+
+def _proc_status_mb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def _reset_peak_rss():
+    """Linux'ta tepe RSS'i (VmHWM) sıfırlar; ölçüm yalnızca bundan sonraki kareleri kapsar."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _memory_usage():
+    """(güncel RSS MB, tepe RSS MB, küçük sayfa hatası); ölçülemeyen değerler None."""
+    try:
+        return _proc_status_mb('VmRSS'), _proc_status_mb('VmHWM'), _minor_faults()
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None, None, None
+    # Linux dışında ru_maxrss süreç ömrü boyunca tepedir (macOS'ta bayt cinsinden)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return None, usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), usage.ru_minflt
+
+
+def _minor_faults():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+
+
+def _numpy_allocations(gray, stages):
+    """Bir karede yeni ayrılan NumPy tamponlarının sayısını ve boyutunu tracemalloc ile ölçer.
+
+    Adım çıktıları kare sonuna kadar canlı tutulur; OpenCV'nin kendi iç geçici tamponları NumPy
+    üzerinden ayrılmadığı için burada değil, RSS ve sayfa hatası sayısında görünür.
+    """
+    domain = [tracemalloc.DomainFilter(True, np.lib.tracemalloc_domain)]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot().filter_traces(domain)
+        outputs = []
+        image = gray
+        for _, stage in stages:
+            image = stage(image)
+            outputs.append(image)
+        after = tracemalloc.take_snapshot().filter_traces(domain)
+    finally:
+        tracemalloc.stop()
+    diffs = after.compare_to(before, 'filename')
+    return sum(max(d.count_diff, 0) for d in diffs), sum(max(d.size_diff, 0) for d in diffs)
+
+
+def measure_memory_mode(gray, mode, frames=50, profile=None):
+    """Tek bir modu (ayrı süreçte çağrılmak üzere) ölçer: kare süresi, tepe RSS, sayfa hatası, ayırma sayısı."""
+    pipeline = get_pipeline(profile=profile)
+    pool = BufferPool() if mode == 'pooled' else None
+    stages = pipeline.frame_stages(pool)
+
+    def run_frame():
+        image = gray
+        for _, stage in stages:
+            image = stage(image)
+
+    run_frame()  # Isınma: havuz tamponları ve OpenCV iç tamponları burada ayrılır
+    _reset_peak_rss()
+    rss_before, _, faults_before = _memory_usage()
+    start = time.perf_counter()
+    for _ in range(frames):
+        run_frame()
+    elapsed = time.perf_counter() - start
+    _, peak_rss, faults_after = _memory_usage()
+    allocations, allocated = _numpy_allocations(gray, stages)
+    return {
+        'ms_per_frame': elapsed / frames * 1000,
+        'peak_rss_mb': peak_rss,
+        # Karelerin, ısınmış sürecin RSS'i üzerine eklediği tepe bellek
+        'frame_peak_mb': peak_rss - rss_before if None not in (peak_rss, rss_before) else None,
+        'minor_faults_per_frame': (faults_after - faults_before) / frames if faults_after is not None else None,
+        'allocations_per_frame': allocations,
+        'allocated_kb_per_frame': allocated / 1024,
+        'pool_kb': pool.nbytes / 1024 if pool is not None else 0.0,
+    }
+
+
+def run_memory(cases, frames=50, profile=None):
+    """Her durum ve mod için ölçümü yeni bir süreçte yapar (tepe RSS süreç başınadır)."""
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for name, gray in cases:
+        results[name] = {}
+        for mode in MEMORY_MODES:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[name][mode] = executor.submit(measure_memory_mode, gray, mode, frames, profile).result()
+    return results
+
+
+def format_memory(memory):
+    lines = []
+    for case, modes in memory.items():
+        lines.append(f"== {case} (bellek)")
+        for mode, stats in modes.items():
+            rss = f"{stats['peak_rss_mb']:7.1f} MB" if stats['peak_rss_mb'] is not None else '      -'
+            if stats['frame_peak_mb'] is not None:
+                rss += f" (+{stats['frame_peak_mb']:.1f})"
+            faults = (f"{stats['minor_faults_per_frame']:7.1f}" if stats['minor_faults_per_frame'] is not None
+                      else '      -')
+            lines.append(f"  {mode:<7} {stats['ms_per_frame']:8.3f} ms/kare  tepe RSS {rss}  "
+                         f"sayfa hatası/kare {faults}  ayırma/kare {stats['allocations_per_frame']:3d} "
+                         f"({stats['allocated_kb_per_frame']:8.1f} KB)  havuz {stats['pool_kb']:8.1f} KB")
+    return '\n'.join(lines)
+
+
+def compare_results(current, baseline, threshold=0.15, min_delta_ms=0.05):
+    """Mevcut sonuçları baseline ile karşılaştırır; medyan süre farklarını listeler.
+
+    Medyan süre threshold oranından ve min_delta_ms'den fazla artan adımlar regresyon sayılır.
+    """
+    rows = []
+    for case, result in current['results'].items():
+        base_case = baseline['results'].get(case)
+        if base_case is None:
+            continue
+        for stage, stats in result['stages'].items():
+            base_stats = base_case['stages'].get(stage)
+            if base_stats is None or not base_stats['median_ms']:
+                continue
+            delta_ms = stats['median_ms'] - base_stats['median_ms']
+            ratio = stats['median_ms'] / base_stats['median_ms']
+            if ratio > 1 + threshold and delta_ms > min_delta_ms:
+                status = 'regression'
+            elif ratio < 1 - threshold and -delta_ms > min_delta_ms:
+                status = 'improvement'
+            else:
+                status = 'ok'
+            rows.append({
+                'case': case,
+                'stage': stage,
+                'baseline_ms': base_stats['median_ms'],
+                'current_ms': stats['median_ms'],
+                'ratio': ratio,
+                'status': status,
+            })
+    return rows
+
+
+def format_results(report):
+    lines = []
+    for case, result in report['results'].items():
+        lines.append(f"== {case}")
+        for stage, stats in result['stages'].items():
+            lines.append(f"  {stage:<11} medyan {stats['median_ms']:8.3f} ms  p95 {stats['p95_ms']:8.3f} ms  "
+                         f"{stats['mpx_per_s'] or 0:9.1f} MP/s")
+    return '\n'.join(lines)
+
+
+def format_comparison(rows):
+    lines = []
+    for row in rows:
+        if row['status'] == 'ok':
+            continue
+        label = 'REGRESYON' if row['status'] == 'regression' else 'iyileşme'
+        lines.append(f"  {label:<10} {row['case']} / {row['stage']}: {row['baseline_ms']:.3f} → "
+                     f"{row['current_ms']:.3f} ms (x{row['ratio']:.2f})")
+    regressions = sum(row['status'] == 'regression' for row in rows)
+    lines.append(f"{len(rows)} ölçüm karşılaştırıldı, {regressions} regresyon")
+    return '\n'.join(lines)
+
+
+def parse_size(text):
+    height, width = text.lower().split('x')
+    return int(height), int(width)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Dedektör adımları için mikro-benchmark")
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=DEFAULT_SIZES,
+                        help="Sentetik ROI boyutları, YÜKSEKLİKxGENİŞLİK (ör. 1024x256)")
+    parser.add_argument('--assets', default='assets', help="Örnek görüntü klasörü")
+    parser.add_argument('--no-synthetic', action='store_true')
+    parser.add_argument('--no-assets', action='store_true')
+    parser.add_argument('--repeats', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--memory', action='store_true',
+                        help="Tepe RSS, sayfa hatası ve kare başına ayırma sayısını (yeni dizi / tampon havuzu) ölç")
+    parser.add_argument('--frames', type=int, default=50, help="Bellek ölçümündeki kare sayısı")
+    parser.add_argument('--save', help="Sonuçların baseline olarak yazılacağı JSON dosyası")
+    parser.add_argument('--compare', help="Karşılaştırılacak baseline JSON dosyası")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Regresyon sayılacak göreli yavaşlama (0.15 = %%15)")
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help="Regresyon için gereken en küçük mutlak fark (ms)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = build_cases(args.sizes, args.assets, not args.no_synthetic, not args.no_assets)
+    report = run_benchmark(cases, args.repeats, args.warmup)
+    print(format_results(report))
+    if args.memory:
+        report['memory'] = run_memory(cases, args.frames)
+        print(format_memory(report['memory']))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare_results(report, baseline, args.threshold, args.min_delta_ms)
+        print(format_comparison(rows))
+        if any(row['status'] == 'regression' for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
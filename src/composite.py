@@ -0,0 +1,110 @@
+# composite.py → 18.10.2026
+import cv2
+import numpy as np
+
+PANEL_HEIGHT = 480
+TITLE_LINE_HEIGHT = 24
+MARGIN = 10
+BACKGROUND = 255
+TEXT_COLOR = (0, 0, 0)
+ROI_COLOR = (0, 200, 0)
+SCANLINE_COLOR = (0, 0, 255)
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.6
+
+# Hershey fontları yalnızca ASCII çizebilir
+_ASCII = str.maketrans('çğıöşüÇĞİÖŞÜ', 'cgiosuCGIOSU')
+
+
+def detail_panels(original, analysis, roi_coords=None):
+    """Detaylı analiz panellerini (başlık, görüntü, çizimler) hazırlar; görüntüler kopyalanmaz."""
+    edges = analysis['edges']
+    return [
+        {'title': 'Orijinal Görüntü', 'image': original, 'rect': roi_coords},
+        {'title': 'Seçilen ROI', 'image': analysis['detector'].original_image},
+        {'title': 'İşlenmiş ROI', 'image': analysis['processed_image']},
+        {'title': 'Kenar Tespiti', 'image': edges},
+        {'title': f"Kenar Sayımı\n{analysis['edge_count']} kenar", 'image': edges, 'line_x': edges.shape[1] // 2},
+    ]
+
+
+def _text_width(line):
+    (width, _), _ = cv2.getTextSize(line.translate(_ASCII), FONT, FONT_SCALE, 1)
+    return width
+
+
+def _fit(image, width, height):
+    """Görüntüyü hedef boyuta getirir: önce hızlı 2x INTER_AREA adımları, sonra tek bir son ölçekleme."""
+    while image.shape[0] >= 2 * height and image.shape[1] >= 2 * width:
+        image = cv2.resize(image, (image.shape[1] // 2, image.shape[0] // 2), interpolation=cv2.INTER_AREA)
+    interpolation = cv2.INTER_LINEAR if image.shape[0] > height else cv2.INTER_NEAREST
+    return cv2.resize(image, (width, height), interpolation=interpolation)
+
+
+def render_composite(panels, panel_height=PANEL_HEIGHT):
+    """Panelleri tek bir önceden ayrılmış BGR tuvale yan yana yerleştirir.
+
+    Her panel yüksekliğe göre ölçeklenir; dar paneller başlık genişliği kadar ortalanır.
+    ROI dikdörtgeni ve tarama çizgisi ölçeklenmiş panel üzerine çizilir.
+    """
+    title_lines = max(panel['title'].count('\n') + 1 for panel in panels)
+    title_height = title_lines * TITLE_LINE_HEIGHT + MARGIN
+
+    layout = []
+    for panel in panels:
+        height, width = panel['image'].shape[:2]
+        scaled_width = max(1, round(width * panel_height / height))
+        column_width = max(scaled_width, max(_text_width(line) for line in panel['title'].split('\n')))
+        layout.append((scaled_width, column_width))
+
+    canvas_width = sum(column for _, column in layout) + MARGIN * (len(panels) + 1)
+    canvas = np.full((title_height + panel_height + MARGIN, canvas_width, 3), BACKGROUND, np.uint8)
+
+    x = MARGIN
+    for panel, (scaled_width, column_width) in zip(panels, layout):
+        for index, line in enumerate(panel['title'].split('\n')):
+            line = line.translate(_ASCII)
+            text_x = x + (column_width - _text_width(line)) // 2
+            text_y = MARGIN + (index + 1) * TITLE_LINE_HEIGHT - 6
+            cv2.putText(canvas, line, (text_x, text_y), FONT, FONT_SCALE, TEXT_COLOR, 1, cv2.LINE_AA)
+
+        image = panel['image']
+        height, width = image.shape[:2]
+        resized = _fit(image, scaled_width, panel_height)
+        left = x + (column_width - scaled_width) // 2
+        target = canvas[title_height:title_height + panel_height, left:left + scaled_width]
+        target[...] = resized[..., None] if resized.ndim == 2 else resized
+
+        scale = panel_height / height
+        if panel.get('rect') is not None:
+            x1, y1, x2, y2 = (round(value * scale) for value in panel['rect'])
+            cv2.rectangle(target, (x1, y1), (x2, y2), ROI_COLOR, 2)
+        if panel.get('line_x') is not None:
+            line_x = min(round(panel['line_x'] * scale), scaled_width - 1)
+            cv2.line(target, (line_x, 0), (line_x, panel_height - 1), SCANLINE_COLOR, 1)
+
+        x += column_width + MARGIN
+    return canvas
+
+
+def export_figure(panels, path, dpi=100):
+    """Panelleri matplotlib ile (isteğe bağlı dışa aktarım) dosyaya kaydeder."""
+    # pyplot iş parçacığı güvenli değil; doğrudan Figure/Agg kullanılır
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(18, 6))
+    for index, panel in enumerate(panels, 1):
+        ax = fig.add_subplot(1, len(panels), index)
+        ax.set_title(panel['title'])
+        image = panel['image']
+        if image.ndim == 2:
+            if panel.get('line_x') is not None:
+                image = image.copy()
+                cv2.line(image, (panel['line_x'], 0), (panel['line_x'], image.shape[0]), 255, 1)
+            ax.imshow(image, cmap="gray")
+        else:
+            ax.imshow(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        ax.axis("off")
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
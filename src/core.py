@@ -0,0 +1,298 @@
+# core.py → 18.10.2026
+# Arayüzsüz çekirdek: dedektör ve kenar sayımı (yalnızca cv2/NumPy, Kivy ve matplotlib gerektirmez)
+import cv2
+import numpy as np
+import math
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from pipeline import (DEFAULT_CLAHE, DEFAULT_BLUR, DEFAULT_BILATERAL, DEFAULT_GABOR, DEFAULT_MORPHOLOGICAL,
+                      StageGraph, get_clahe, get_gabor_kernel, get_morph_kernel)
+
+
+# Adım fonksiyonları: girdiyi değiştirmez, yeni görüntü döndürür
+def _clahe(image, clip_limit=2.0, tile_grid_size=(8, 8)):
+    return get_clahe(clip_limit, tile_grid_size).apply(image)
+
+
+def _blur(image, kernel_size=(7, 7)):
+    return cv2.GaussianBlur(image, kernel_size, 0)
+
+
+def _bilateral(image, d=9, sigma_color=75, sigma_space=75):
+    return cv2.bilateralFilter(image, d, sigma_color, sigma_space)
+
+
+def _gabor(image, ksize=21, sigma=8.0, theta=np.pi / 4, lambd=10.0, gamma=0.5, psi=0):
+    kernel = get_gabor_kernel(ksize, sigma, theta, lambd, gamma, psi)
+    return cv2.filter2D(image, cv2.CV_8UC3, kernel)
+
+
+def _morphology(image, erosion_kernel=3, erosion_iter=1, dilation_kernel=3, dilation_iter=1):
+    image = cv2.erode(image, get_morph_kernel(erosion_kernel), iterations=erosion_iter)
+    return cv2.dilate(image, get_morph_kernel(dilation_kernel), iterations=dilation_iter)
+
+
+def _to_gray(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def _canny(image, low=50, high=150):
+    return cv2.Canny(image, low, high)
+
+
+class EnhancedGaborDetector:
+    def __init__(self, image, graph=None):
+        """Dosya yolundan veya bellekteki BGR/gri ndarray'den dedektör oluşturur.
+
+        graph (StageGraph) verilirse adım çıktıları dedektörler arasında paylaşılır; aynı ROI
+        nesnesi yeniden analiz edildiğinde yalnızca parametresi değişen adımlar hesaplanır.
+        """
+        if isinstance(image, np.ndarray):
+            self.original_image = image  # Kopyalamadan kullan (ROI görünümü olabilir)
+        else:
+            self.original_image = cv2.imread(image, cv2.IMREAD_COLOR)  # Renkli olarak yükle
+        if self.original_image is None or self.original_image.size == 0:
+            raise ValueError("Görüntü yüklenemedi")
+
+        self.graph = graph if graph is not None else StageGraph()
+        if self.original_image.ndim == 2:
+            self.image = self.original_image  # Adımlar yeni dizi döndürür, kaynak değişmez
+        else:
+            # İşleme için gri tonlama (aynı kaynak için önbellekten)
+            self.image = self.graph.run(self.original_image, [('gray', _to_gray, None)])
+        self.source_image = self.image  # Ham gri giriş; process_image sonrası self.image ön işlenmiş olur
+        self.reused_stages = []
+        self._original_image_rgb = None  # Yalnızca görselleştirme isterse hesaplanır
+        self.filtered_image = None
+
+        # Adım süreleri (saniye) ve süre dinleyicileri
+        self.stage_timings = {}
+        self._stage_listeners = []
+
+    @property
+    def original_image_rgb(self):
+        """Görselleştirme için RGB kopya (ilk erişimde hesaplanır)."""
+        if self._original_image_rgb is None:
+            code = cv2.COLOR_GRAY2RGB if self.original_image.ndim == 2 else cv2.COLOR_BGR2RGB
+            self._original_image_rgb = cv2.cvtColor(self.original_image, code)
+        return self._original_image_rgb
+
+    @classmethod
+    def from_file(cls, image_path, roi_coordinates=None, grayscale=True):
+        """Görüntüyü dosyadan yükler, ROI'yi diğer tüm dönüşümlerden önce kırpar.
+
+        grayscale=True ise görüntü doğrudan gri olarak çözülür (JPEG'de Y kanalı; BGR→gri
+        dönüşümünden en fazla birkaç gri seviye farklı olabilir). Kırpılan ROI kopyalanır,
+        böylece tam çerçeve hemen serbest kalır ve bellek ROI boyutuyla ölçeklenir.
+        """
+        flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+        image = cv2.imread(image_path, flags)
+        if image is None:
+            raise ValueError("Görüntü yüklenemedi")
+        if roi_coordinates is not None:
+            x1, y1, x2, y2 = roi_coordinates
+            image = image[y1:y2, x1:x2].copy()
+            if image.size == 0:
+                raise ValueError(f"ROI görüntü dışında: {roi_coordinates}")
+        return cls(image)
+
+    @classmethod
+    def from_roi(cls, image, roi_coordinates):
+        """Yüklenmiş görüntünün ROI görünümü üzerinden (kopyasız) dedektör oluşturur."""
+        x1, y1, x2, y2 = roi_coordinates
+        return cls(image[y1:y2, x1:x2])
+
+    def add_stage_listener(self, callback):
+        """Her adım bittiğinde callback(adım_adı, saniye) çağrılmasını sağlar."""
+        self._stage_listeners.append(callback)
+
+    def remove_stage_listener(self, callback):
+        self._stage_listeners.remove(callback)
+
+    @contextmanager
+    def timed_stage(self, name):
+        """with bloğunun süresini name adıyla stage_timings'e yazar ve dinleyicilere bildirir."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_timings[name] = elapsed
+            for callback in self._stage_listeners:
+                callback(name, elapsed)
+
+    @contextmanager
+    def collect_timings(self):
+        """with bloğu içinde biten adımların sürelerini toplayan sözlük verir."""
+        timings = {}
+
+        def record(name, elapsed):
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+        self.add_stage_listener(record)
+        try:
+            yield timings
+        finally:
+            self.remove_stage_listener(record)
+
+    def apply_clahe(self, clip_limit=2.0, tile_grid_size=(8, 8)):
+        """Görüntüye CLAHE uygular."""
+        with self.timed_stage('clahe'):
+            self.image = _clahe(self.image, clip_limit, tile_grid_size)
+        return self.image
+
+    def apply_blur(self, kernel_size=(7, 7)):
+        """Görüntüye Gaussian blur uygular."""
+        with self.timed_stage('blur'):
+            self.image = _blur(self.image, kernel_size)
+        return self.image
+
+    def apply_adaptive_threshold(self, max_value=255, adaptive_method=cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                 threshold_type=cv2.THRESH_BINARY, block_size=21, C=1):
+        """Adaptif eşikleme uygular."""
+        with self.timed_stage('adaptive_threshold'):
+            self.image = cv2.adaptiveThreshold(
+                self.image, max_value, adaptive_method, threshold_type, block_size, C
+            )
+        return self.image
+
+    def apply_bilateral_filter(self, d=9, sigma_color=75, sigma_space=75):
+        """Görüntüye bilateral filtre uygular."""
+        with self.timed_stage('bilateral'):
+            self.image = _bilateral(self.image, d, sigma_color, sigma_space)
+        return self.image
+
+    def apply_gabor_filter(self, ksize=21, sigma=8.0, theta=np.pi / 4, lambd=10.0, gamma=0.5, psi=0):
+        """Görüntüye Gabor filtresi uygular."""
+        with self.timed_stage('gabor'):
+            self.filtered_image = _gabor(self.image, ksize, sigma, theta, lambd, gamma, psi)
+        return self.filtered_image
+
+    def apply_morphological_operations(self, erosion_kernel=3, erosion_iter=1,
+                                       dilation_kernel=3, dilation_iter=1):
+        """Erozyon ve genişletme işlemleri uygular."""
+        with self.timed_stage('morphology'):
+            self.filtered_image = _morphology(self.filtered_image, erosion_kernel, erosion_iter,
+                                              dilation_kernel, dilation_iter)
+
+        return self.filtered_image
+
+    def process_image(self, clahe_params=None, blur_params=None, bilateral_params=None, gabor_params=None,
+                      morphological_params=None, progress_callback=None):
+        """Tüm işlemleri mevcut görüntüden (önceki apply_* çağrıları dahil) başlayarak sırayla uygular.
+
+        Adımlar StageGraph üzerinden çalışır: önceki çağrılarla aynı girdi ve parametrelere sahip
+        adımlar yeniden hesaplanmaz (reused_stages). progress_callback verilirse her adımdan sonra
+        (adım_adı, sıra, toplam) ile çağrılır; callback'in fırlattığı istisna işlemi durdurur.
+        Sonrasında self.image ön işlenmiş (bilateral) görüntüdür; ham gri giriş source_image'da kalır.
+        """
+        # İşleme parametreleri (varsayılanlar pipeline modülünde bir kez tanımlı)
+        clahe_params = clahe_params or DEFAULT_CLAHE
+        blur_params = blur_params or DEFAULT_BLUR
+        bilateral_params = bilateral_params or DEFAULT_BILATERAL
+        gabor_params = gabor_params or DEFAULT_GABOR
+        morphological_params = morphological_params or DEFAULT_MORPHOLOGICAL
+
+        # İşlem sırası
+        stages = [
+            ('clahe', partial(_clahe, **clahe_params), clahe_params),
+            ('blur', partial(_blur, **blur_params), blur_params),
+            ('bilateral', partial(_bilateral, **bilateral_params), bilateral_params),
+        ]
+        filter_stages = [
+            ('gabor', partial(_gabor, **gabor_params), gabor_params),
+            ('morphology', partial(_morphology, **morphological_params), morphological_params),
+        ]
+        total = len(stages) + len(filter_stages)
+        self.reused_stages = []
+        self.image = self._run_graph(self.image, stages, progress_callback, 0, total)
+        self.filtered_image = self._run_graph(self.image, filter_stages, progress_callback, len(stages), total)
+        return self.filtered_image
+
+    def detect_edges(self, low=50, high=150):
+        """Son işlenmiş görüntüde Canny uygular (aynı görüntü ve eşikler için önbellekten)."""
+        canny_params = {'low': low, 'high': high}
+        return self._run_graph(self.get_result(), [('canny', partial(_canny, **canny_params), canny_params)])
+
+    def _run_graph(self, image, stages, progress_callback=None, offset=0, total=None):
+        """Adımları grafikte çalıştırır; süreleri ve ilerlemeyi apply_* adımlarıyla aynı şekilde bildirir."""
+        positions = {name: offset + index for index, (name, _, _) in enumerate(stages, 1)}
+
+        def on_stage(name, elapsed, cached):
+            self.stage_timings[name] = elapsed
+            for callback in self._stage_listeners:
+                callback(name, elapsed)
+            if cached:
+                self.reused_stages.append(name)
+            if progress_callback is not None:
+                progress_callback(name, positions[name], total)
+
+        return self.graph.run(image, stages, on_stage)
+
+    def get_result(self):
+        """Son işlem sonucunu döndürür."""
+        if self.filtered_image is None:
+            raise ValueError("Henüz işlem yapılmadı")
+        return self.filtered_image
+
+    def apply_roi(self, roi_coordinates):
+        """Belirtilen koordinatlarla ROI alır."""
+        x1, y1, x2, y2 = roi_coordinates
+        roi = self.original_image[y1:y2, x1:x2]
+        return roi
+
+
+def count_vertical_edges(edges, line_x=None):
+    """Dikey çizginin kestiği kenar piksellerinden sac sayısını hesaplar."""
+    if line_x is None:
+        line_x = edges.shape[1] // 2
+    vertical_edge_count = np.sum(edges[:, line_x] > 0)
+    return math.ceil(vertical_edge_count / 2)
+
+
+def scanline_columns(width, num_lines=None):
+    """Kenar sayımı için eşit aralıklı tarama sütunlarını döndürür (None: tüm sütunlar)."""
+    if num_lines is None or num_lines >= width:
+        return np.arange(width)
+    # Uçlardaki sütunlar hariç eşit aralık; tek sayıda çizgide orta sütun dahildir
+    return np.linspace(0, width - 1, num_lines + 2)[1:-1].round().astype(int)
+
+
+def count_edges_multiline(edges, num_lines=None, aggregate='median'):
+    """Birden çok dikey tarama çizgisinde kenar sayımını tek NumPy geçişinde yapar.
+
+    Her sütunda yükselen geçişler (kenar piksel dizilerinin başlangıçları) sayılır, böylece
+    kalın kenarlar tek kenar olarak kalır. Çizgi başına sayımlar median veya mode ile
+    birleştirilir; agreement, birleşik sayımla aynı sonucu veren çizgilerin oranıdır.
+    """
+    columns = scanline_columns(edges.shape[1], num_lines)
+    return aggregate_scanlines(edges[:, columns] > 0, columns, aggregate)
+
+
+def aggregate_scanlines(binary, columns, aggregate='median'):
+    """Tarama sütunlarının ikili kenar profillerinden (satır x sütun) birleşik sayımı hesaplar."""
+    rising = binary[0].astype(np.int32) + np.count_nonzero(binary[1:] & ~binary[:-1], axis=0)
+    return aggregate_rising(rising, columns, aggregate)
+
+
+def aggregate_rising(rising, columns, aggregate='median'):
+    """Sütun başına yükselen geçiş sayılarından birleşik sac sayımını hesaplar."""
+    if aggregate not in ('median', 'mode'):
+        raise ValueError(f"Geçersiz birleştirme yöntemi: {aggregate}")
+
+    per_line = (rising + 1) // 2  # Her sac iki kenar verir (ceil(n / 2))
+
+    if aggregate == 'median':
+        count = int(np.floor(np.median(per_line) + 0.5))
+    else:
+        count = int(np.argmax(np.bincount(per_line)))
+
+    return {
+        'count': count,
+        'per_line': per_line,
+        'columns': columns,
+        'agreement': float(np.mean(per_line == count)),
+        'aggregate': aggregate,
+    }
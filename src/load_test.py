@@ -0,0 +1,142 @@
+# load_test.py → 18.10.2026
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+import numpy as np
+
+from service import MAX_BATCH, MAX_WAIT_MS, CountingService, create_server
+
+DEFAULT_IMAGE = 'assets/1.jpg'
+DEFAULT_ROI = (337, 386, 445, 1173)
+
+
+def start_local_service(workers=None, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, max_queue=1024):
+    """Boş bir yerel portta servisi arka plan iş parçacığında başlatır; (sunucu, taban URL) döndürür."""
+    service = CountingService(workers, max_batch, max_wait_ms, max_queue)
+    server = create_server(service, port=0)
+    threading.Thread(target=server.serve_forever, name='service', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def stop_local_service(server):
+    server.shutdown()
+    server.server_close()
+    server.service.close()
+
+
+def _get_json(base_url, path):
+    url = urlparse(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+    try:
+        connection.request('GET', path)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def _client(base_url, path, body, requests, latencies, statuses, barrier):
+    url = urlparse(base_url)
+    # İstemci başına kalıcı bağlantı (HTTP/1.1 keep-alive)
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+    barrier.wait()
+    for _ in range(requests):
+        start = time.perf_counter()
+        connection.request('POST', path, body, {'Content-Type': 'image/jpeg'})
+        response = connection.getresponse()
+        response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses.append(response.status)
+    connection.close()
+
+
+def run_load(base_url, body, query=None, clients=4, requests=25):
+    """clients eşzamanlı istemciyle istemci başına requests istek gönderir; istemci tarafı ölçümleri döndürür."""
+    path = '/count' + (f'?{urlencode(query, doseq=True)}' if query else '')
+    latencies, statuses = [], []
+    barrier = threading.Barrier(clients + 1)
+    threads = [threading.Thread(target=_client, args=(base_url, path, body, requests, latencies, statuses, barrier))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'ok': statuses.count(200),
+        'rejected': statuses.count(503),
+        'elapsed_s': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP sayım servisine yük testi (yerel örnek veya --url)")
+    parser.add_argument('--url', help="Çalışan servisin taban adresi; verilmezse yerel örnek başlatılır")
+    parser.add_argument('--image', default=DEFAULT_IMAGE)
+    parser.add_argument('--roi', type=int, nargs=4, default=DEFAULT_ROI, metavar=('X1', 'Y1', 'X2', 'Y2'))
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16], help="Eşzamanlı istemci sayıları")
+    parser.add_argument('--requests', type=int, default=25, help="İstemci başına istek sayısı")
+    parser.add_argument('--workers', type=int, default=None, help="Yerel örneğin işçi süreç sayısı")
+    parser.add_argument('--max-batch', type=int, nargs='+', default=[1, MAX_BATCH],
+                        help="Karşılaştırılacak mikro grup boyutları (yerel örnek; 1: gruplama yok)")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS)
+    parser.add_argument('--json', help="Sonuçların yazılacağı JSON dosyası")
+    return parser.parse_args(argv)
+
+
+def _print_row(label, row, stats):
+    batch = stats['batch_size_mean']
+    queue = stats['queue_ms']
+    print(f"  {label:<10} {row['clients']:>3} istemci  {row['throughput']:7.1f} istek/s  "
+          f"p50 {row['p50_ms']:6.1f}  p95 {row['p95_ms']:6.1f}  p99 {row['p99_ms']:6.1f} ms  "
+          f"grup ort. {batch if batch is not None else 0:.1f}  kuyruk p95 {queue['p95'] if queue else 0:.1f} ms"
+          + (f"  reddedilen {row['rejected']}" if row['rejected'] else ''))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.image, 'rb') as f:
+        body = f.read()
+    query = {'roi': ','.join(map(str, args.roi)), 'scanlines': 0}
+
+    report = []
+    targets = [(None, args.url)] if args.url else [(size, None) for size in args.max_batch]
+    for max_batch, url in targets:
+        server = None
+        if url is None:
+            server, url = start_local_service(args.workers, max_batch, args.max_wait_ms)
+            print(f"Yerel servis {url} (mikro grup {max_batch}, {server.service.workers} işçi)")
+        try:
+            run_load(url, body, query, clients=1, requests=3)  # Isınma
+            for clients in args.clients:
+                if server is not None:
+                    server.service.stats.reset()  # Her ölçüm kendi penceresinden
+                row = run_load(url, body, query, clients, args.requests)
+                stats = _get_json(url, '/stats')
+                _print_row(f'grup {max_batch}' if max_batch else url, row, stats)
+                report.append(dict(row, max_batch=max_batch, server=stats))
+        finally:
+            if server is not None:
+                stop_local_service(server)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,351 +1,691 @@
-# main.py → 20.11.2024
-from kivy.app import App
-from kivy.uix.tabbedpanel import TabbedPanel, TabbedPanelItem
-from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.image import Image
-from kivy.uix.button import Button
-from kivy.uix.label import Label
-from kivy.graphics.texture import Texture
-from kivy.uix.popup import Popup
-from kivy.uix.floatlayout import FloatLayout
-from kivy.metrics import dp
-import cv2
-import os
-import math
-import numpy as np
-import matplotlib.pyplot as plt
-from io import BytesIO
-
-from set_roi import ROICanvas
-from set_filters import EnhancedGaborDetector
-
-
-class ImageProcessor:
-    """Görüntü işleme yardımcı sınıfı"""
-
-    @staticmethod
-    def convert_to_texture(image):
-        """OpenCV görüntüsünü Kivy texture'una dönüştürür"""
-        if image is None:
-            return None
-
-        if len(image.shape) == 2:  # Gri tonlamalı
-            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-        else:  # BGR
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-        image_flipped = cv2.flip(image, 0)
-        buffer = image_flipped.tobytes()
-        texture = Texture.create(size=(image.shape[1], image.shape[0]), colorfmt='rgb')
-        texture.blit_buffer(buffer, colorfmt='rgb', bufferfmt='ubyte')
-        return texture
-
-
-class ImageView(Image):
-    """Özelleştirilmiş görüntü widget'ı"""
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.allow_stretch = True
-        self.keep_ratio = True
-
-
-class AnalysisLayout(BoxLayout):
-    """Analiz sonuçlarını gösteren layout"""
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.orientation = 'vertical'
-        self.size_hint_x = 0.3
-        self.padding = dp(10)
-        self.spacing = dp(10)
-
-        # Başlık
-        self.add_widget(Label(
-            text='Analiz Sonuçları',
-            size_hint_y=None,
-            height=dp(40),
-            bold=True
-        ))
-
-        # Kenar sayısı etiketi
-        self.edge_count_label = Label(
-            text='Kenar Sayısı: -',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        self.add_widget(self.edge_count_label)
-
-        # ROI boyutları etiketi
-        self.roi_size_label = Label(
-            text='ROI Boyutları: -',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        self.add_widget(self.roi_size_label)
-
-        # Grafik gösterimi için buton
-        self.plot_button = Button(
-            text='Analiz',
-            size_hint_y=None,
-            height=dp(40)
-        )
-        self.add_widget(self.plot_button)
-
-
-class ROILayout(FloatLayout):
-    """ROI seçimi için özel layout"""
-
-    def __init__(self, original_image, **kwargs):
-        super().__init__(**kwargs)
-        self.original_image = original_image
-
-        # Görüntüyü göster
-        self.image = ImageView(texture=ImageProcessor.convert_to_texture(original_image))
-        self.add_widget(self.image)
-
-        # ROI canvas'ı ekle
-        self.roi_canvas = ROICanvas(original_image=original_image)
-        self.add_widget(self.roi_canvas)
-
-
-class MainTabs(TabbedPanel):
-    """Ana uygulama arayüzü"""
-
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.do_default_tab = False
-
-        # Orijinal görüntüyü yükle
-        self.original_image = cv2.imread("assets/1.jpg")
-        if self.original_image is None:
-            raise ValueError("Görüntü yüklenemedi!")
-
-        # Görüntü texture'unu oluştur
-        self.image_texture = ImageProcessor.convert_to_texture(self.original_image)
-
-        # Analiz sonuçlarını saklamak için
-        self.current_analysis = None
-
-        # Sekmeleri oluştur
-        self.home_tab = None
-        self.setup_home_tab()
-        self.setup_roi_tab()
-        self.setup_process_tab()
-
-        # Varsayılan sekme
-        self.default_tab = self.home_tab
-
-    def setup_home_tab(self):
-        """Ana sayfa sekmesini oluşturur"""
-        tab = TabbedPanelItem(text='Ana Sayfa')
-        layout = BoxLayout(orientation='vertical')
-        image = ImageView(texture=self.image_texture)
-        layout.add_widget(image)
-        tab.content = layout
-        self.home_tab = tab
-        self.add_widget(tab)
-
-    def setup_roi_tab(self):
-        """ROI seçim sekmesini oluşturur"""
-        tab = TabbedPanelItem(text='ROI Seçimi')
-        layout = BoxLayout(orientation='vertical')
-        roi_layout = ROILayout(self.original_image)
-        layout.add_widget(roi_layout)
-
-        save_btn = Button(
-            text='ROI Kaydet',
-            size_hint=(0, 0),
-            on_press=self.save_roi
-        )
-        layout.add_widget(save_btn)
-
-        self.roi_canvas = roi_layout.roi_canvas
-        tab.content = layout
-        self.add_widget(tab)
-
-
-    def setup_process_tab(self):
-        """İşleme sekmesini oluşturur"""
-        tab = TabbedPanelItem(text='Görüntü İşleme')
-        main_layout = BoxLayout(orientation='horizontal')
-
-        # Sol taraf - görüntüler
-        images_layout = BoxLayout(orientation='horizontal', size_hint_x=0.7)
-        self.original_view = ImageView(texture=self.image_texture)
-        self.processed_view = ImageView()
-        images_layout.add_widget(self.original_view)
-        images_layout.add_widget(self.processed_view)
-        main_layout.add_widget(images_layout)
-
-        # Sağ taraf - kontroller ve analiz
-        controls_layout = BoxLayout(orientation='vertical', size_hint_x=0.3, padding=10, spacing=10)
-
-        # İşlem butonu
-        process_btn = Button(
-            text='İşle ve Analiz Et',
-            size_hint_y=None,
-            height=dp(40),
-            on_press=self.process_and_analyze_roi
-        )
-        controls_layout.add_widget(process_btn)
-
-        # Analiz sonuçları için layout
-        self.analysis_layout = AnalysisLayout()
-        self.analysis_layout.plot_button.bind(on_press=self.show_detailed_analysis)
-        controls_layout.add_widget(self.analysis_layout)
-
-        main_layout.add_widget(controls_layout)
-        tab.content = main_layout
-        self.add_widget(tab)
-
-    def save_roi(self, instance):
-        """ROI'yi kaydeder"""
-        roi_image, roi_coords = self.roi_canvas.export_roi()
-        if roi_image is not None:
-            self.show_info_popup("ROI başarıyla kaydedildi")
-        else:
-            self.show_error_popup("ROI seçilmedi")
-
-    def process_and_analyze_roi(self, instance):
-        """ROI'yi işler ve analiz eder"""
-        roi_path = 'assets/roi.jpg'
-        if not os.path.exists(roi_path):
-            self.show_error_popup("Önce ROI seçin")
-            return
-
-        try:
-            # Görüntü işleme
-            detector = EnhancedGaborDetector(roi_path)
-            processed_image = detector.process_image()
-
-            # Canny kenar tespiti
-            edges = cv2.Canny(processed_image, 50, 150)
-
-            # Dikey çizgi analizi
-            height, width = edges.shape
-            vertical_line_x = width // 2
-            vertical_edge_count = np.sum(edges[:, vertical_line_x] > 0)
-            edge_count = math.ceil(vertical_edge_count / 2)
-
-            # Analiz sonuçlarını sakla
-            self.current_analysis = {
-                'detector': detector,
-                'processed_image': processed_image,
-                'edges': edges,
-                'edge_count': edge_count,
-                'roi_size': (width, height)
-            }
-
-            # Sonuçları göster
-            self.processed_view.texture = ImageProcessor.convert_to_texture(processed_image)
-            self.analysis_layout.edge_count_label.text = f'Kenar Sayısı: {edge_count}'
-            self.analysis_layout.roi_size_label.text = f'ROI Boyutları: {width}x{height}'
-
-        except Exception as e:
-            self.show_error_popup(f"İşlem hatası: {str(e)}")
-
-    def show_detailed_analysis(self, instance):
-        if self.current_analysis is None:
-            self.show_error_popup("Önce görüntü işleme yapın")
-            return
-
-        try:
-            # Matplotlib figure oluştur
-            plt.figure(figsize=(18, 6))
-
-            # Orijinal görüntü - ilk görüntü için ROI öncesi tam görüntüyü göster
-            plt.subplot(1, 5, 1)
-            plt.title("Orijinal Görüntü")
-            original_full_image = cv2.imread("assets/1.jpg")  # Tam orijinal görüntüyü yükle
-            plt.imshow(cv2.cvtColor(original_full_image, cv2.COLOR_BGR2RGB))
-            plt.axis("off")
-
-            # ROI
-            plt.subplot(1, 5, 2)
-            plt.title("Seçilen ROI")
-            plt.imshow(cv2.cvtColor(self.current_analysis['detector'].original_image, cv2.COLOR_BGR2RGB))
-            plt.axis("off")
-
-            # İşlenmiş ROI
-            plt.subplot(1, 5, 3)
-            plt.title("İşlenmiş ROI")
-            plt.imshow(self.current_analysis['processed_image'], cmap="gray")
-            plt.axis("off")
-
-            # Canny kenarları
-            plt.subplot(1, 5, 4)
-            plt.title("Kenar Tespiti")
-            plt.imshow(self.current_analysis['edges'], cmap="gray")
-            plt.axis("off")
-
-            # Kenar sayımı
-            edges_with_line = self.current_analysis['edges'].copy()
-            height, width = edges_with_line.shape
-            vertical_line_x = width // 2
-            cv2.line(edges_with_line, (vertical_line_x, 0), (vertical_line_x, height), 255, 1)
-
-            plt.subplot(1, 5, 5)
-            plt.title(f"Kenar Sayımı\n{self.current_analysis['edge_count']} kenar")
-            plt.imshow(edges_with_line, cmap="gray")
-            plt.axis("off")
-
-            plt.tight_layout()
-
-            # Matplotlib figure'ı bir popup'ta göster
-            self.show_plot_popup()
-
-        except Exception as e:
-            self.show_error_popup(f"Grafik oluşturma hatası: {str(e)}")
-
-    def show_plot_popup(self):
-        """Matplotlib grafiğini popup'ta gösterir"""
-        # Matplotlib figure'ı bytesa dönüştür
-        buf = BytesIO()
-        plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-        plt.close()
-        buf.seek(0)
-
-        # Bytes'ı texture'a dönüştür
-        img = ImageView(
-            size_hint=(1, 1),
-            allow_stretch=True,
-            keep_ratio=True
-        )
-        img.texture = ImageProcessor.convert_to_texture(cv2.imdecode(
-            np.frombuffer(buf.read(), np.uint8),
-            cv2.IMREAD_COLOR
-        ))
-
-        # Popup oluştur ve göster
-        popup = Popup(
-            title='Detaylı Analiz',
-            content=img,
-            size_hint=(0.9, 0.9)
-        )
-        popup.open()
-
-    def show_error_popup(self, message):
-        """Hata popup'ı gösterir"""
-        Popup(
-            title='Hata',
-            content=Button(text=message),
-            size_hint=(0.8, 0.4)
-        ).open()
-
-    def show_info_popup(self, message):
-        """Bilgi popup'ı gösterir"""
-        Popup(
-            title='Bilgi',
-            content=Button(text=message),
-            size_hint=(0.8, 0.4)
-        ).open()
-
-
-class MainApp(App):
-    def build(self):
-        return MainTabs()
-
-
-if __name__ == '__main__':
+# main.py → 20.11.2024
+from kivy.app import App
+from kivy.uix.tabbedpanel import TabbedPanel, TabbedPanelItem
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.image import Image
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.graphics.texture import Texture
+from kivy.uix.popup import Popup
+from kivy.uix.floatlayout import FloatLayout
+from kivy.uix.progressbar import ProgressBar
+from kivy.clock import Clock
+from kivy.metrics import dp
+import os
+from functools import partial
+import cv2
+import numpy as np
+
+from set_roi import ROICanvas
+from analysis_worker import AnalysisWorker, analyze_roi, analyze_rois
+from stream import FrameStream
+from metrics import PerformanceTracker, format_summary
+from periodicity import format_periodic
+from pipeline import GRAPH_CACHE_SIZE, StageGraph
+from result_cache import ResultCache
+from composite import detail_panels, export_figure, render_composite
+from watch import DEFAULT_FOLDER, DEFAULT_LOG, HotFolderWatcher
+
+
+class ImageProcessor:
+    """Görüntü işleme yardımcı sınıfı"""
+
+    # slot adına göre tekrar kullanılan texture'lar (akış ve tekrarlanan analiz için)
+    _texture_cache = {}
+
+    @staticmethod
+    def texture_format(image):
+        """Görüntüyü dönüştürmeden yüklemek için Kivy renk formatını döndürür"""
+        if image.ndim == 2:  # Gri tonlamalı
+            return 'luminance'
+        if image.shape[2] == 4:
+            return 'bgra'
+        return 'bgr'
+
+    @staticmethod
+    def convert_to_texture(image, slot=None):
+        """OpenCV görüntüsünü Kivy texture'una dönüştürür
+
+        BGR ve gri görüntüler renk dönüşümü yapılmadan yüklenir; yön, piksel kopyası yerine
+        texture koordinatları çevrilerek düzeltilir. slot verilirse aynı boyut ve formattaki
+        texture yeniden oluşturulmaz, içine tekrar yazılır.
+        """
+        if image is None:
+            return None
+
+        height, width = image.shape[:2]
+        colorfmt = ImageProcessor.texture_format(image)
+        buffer = np.ascontiguousarray(image)  # Zaten bitişikse kopya oluşmaz
+
+        texture = ImageProcessor._texture_cache.get(slot) if slot is not None else None
+        if texture is None or texture.size != (width, height) or texture.colorfmt != colorfmt:
+            texture = Texture.create(size=(width, height), colorfmt=colorfmt)
+            texture.flip_vertical()
+            if slot is not None:
+                ImageProcessor._texture_cache[slot] = texture
+
+        texture.blit_buffer(buffer.reshape(-1), colorfmt=colorfmt, bufferfmt='ubyte')
+        return texture
+
+    @staticmethod
+    def update_view(view, image, slot):
+        """Görüntüyü slot texture'una yazar ve widget'ı günceller"""
+        texture = ImageProcessor.convert_to_texture(image, slot)
+        if view.texture is texture:
+            view.canvas.ask_update()
+        else:
+            view.texture = texture
+
+
+class ImageView(Image):
+    """Özelleştirilmiş görüntü widget'ı"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.allow_stretch = True
+        self.keep_ratio = True
+
+
+class AnalysisLayout(BoxLayout):
+    """Analiz sonuçlarını gösteren layout"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.orientation = 'vertical'
+        self.size_hint_x = 0.3
+        self.padding = dp(10)
+        self.spacing = dp(10)
+
+        # Başlık
+        self.add_widget(Label(
+            text='Analiz Sonuçları',
+            size_hint_y=None,
+            height=dp(40),
+            bold=True
+        ))
+
+        # Kenar sayısı etiketi
+        self.edge_count_label = Label(
+            text='Kenar Sayısı: -',
+            size_hint_y=None,
+            height=dp(30)
+        )
+        self.add_widget(self.edge_count_label)
+
+        # Çoklu tarama çizgisi sayımı ve uyum etiketi
+        self.scanline_label = Label(
+            text='Çoklu Tarama: -',
+            size_hint_y=None,
+            height=dp(30)
+        )
+        self.add_widget(self.scanline_label)
+
+        # Parlaklık profili periyodikliğinden sayım (Canny çapraz kontrolü)
+        self.periodic_label = Label(
+            text='Periyodik Tahmin: -',
+            size_hint_y=None,
+            height=dp(30)
+        )
+        self.add_widget(self.periodic_label)
+
+        # ROI boyutları etiketi
+        self.roi_size_label = Label(
+            text='ROI Boyutları: -',
+            size_hint_y=None,
+            height=dp(30)
+        )
+        self.add_widget(self.roi_size_label)
+
+        # Arka plan işi durumu
+        self.status_label = Label(
+            text='Durum: Hazır',
+            size_hint_y=None,
+            height=dp(30)
+        )
+        self.add_widget(self.status_label)
+
+        self.progress_bar = ProgressBar(
+            max=100,
+            value=0,
+            size_hint_y=None,
+            height=dp(20)
+        )
+        self.add_widget(self.progress_bar)
+
+        # İptal butonu
+        self.cancel_button = Button(
+            text='İptal',
+            size_hint_y=None,
+            height=dp(40),
+            disabled=True
+        )
+        self.add_widget(self.cancel_button)
+
+        # Performans metrikleri (adım dökümü, gecikme, kayan ortalama, throughput)
+        self.metrics_label = Label(
+            text='Performans: -',
+            size_hint_y=None,
+            height=dp(170),
+            halign='left',
+            valign='top'
+        )
+        self.metrics_label.bind(size=self._update_metrics_text_size)
+        self.add_widget(self.metrics_label)
+
+        # Grafik gösterimi için buton
+        self.plot_button = Button(
+            text='Analiz',
+            size_hint_y=None,
+            height=dp(40)
+        )
+        self.add_widget(self.plot_button)
+
+    def _update_metrics_text_size(self, label, size):
+        label.text_size = size
+
+    def update_metrics(self, summary):
+        """Performans özetini gösterir; çevrim süresi bütçesi aşıldıysa kırmızı yazar"""
+        self.metrics_label.text = format_summary(summary)
+        over_budget = summary is not None and summary['over_budget']
+        self.metrics_label.color = (1, 0.3, 0.3, 1) if over_budget else (1, 1, 1, 1)
+
+    def set_progress(self, fraction, message):
+        """İlerleme çubuğunu ve durum etiketini günceller"""
+        self.progress_bar.value = fraction * 100
+        self.status_label.text = f'Durum: {message}'
+
+
+class ROILayout(FloatLayout):
+    """ROI seçimi için özel layout"""
+
+    def __init__(self, original_image, **kwargs):
+        super().__init__(**kwargs)
+        self.original_image = original_image
+
+        # Görüntüyü göster
+        self.image = ImageView(texture=ImageProcessor.convert_to_texture(original_image))
+        self.add_widget(self.image)
+
+        # ROI canvas'ı ekle
+        self.roi_canvas = ROICanvas(original_image=original_image)
+        self.add_widget(self.roi_canvas)
+
+
+class MainTabs(TabbedPanel):
+    """Ana uygulama arayüzü"""
+
+    def __init__(self, stream_source=0, cycle_budget_ms=100, result_cache_path=None, image_path="assets/1.jpg",
+                 watch_folder=DEFAULT_FOLDER, **kwargs):
+        super().__init__(**kwargs)
+        self.do_default_tab = False
+
+        # Orijinal görüntüyü yükle
+        self.original_image = cv2.imread(image_path)
+        if self.original_image is None:
+            raise ValueError(f"Görüntü yüklenemedi: {image_path}")
+
+        # Görüntü texture'unu oluştur
+        self.image_texture = ImageProcessor.convert_to_texture(self.original_image)
+
+        # Analiz sonuçlarını saklamak için
+        self.current_analysis = None
+
+        # Son analizlerin performans metrikleri
+        self.performance = PerformanceTracker(budget_ms=cycle_budget_ms)
+
+        # Adım çıktıları önbelleği: aynı ROI'nin tekrar analizinde yalnızca değişen adımlar çalışır
+        # (çoklu ROI'de her ROI kendi adım zincirini tuttuğu için kapasite geniş tutulur)
+        self.stage_graph = StageGraph(GRAPH_CACHE_SIZE * 4, max_sources=16)
+
+        # İçerik adresli sonuç önbelleği: aynı pikseller/ROI/parametreler yeniden analiz edilmez
+        # (result_cache_path verilirse sonuçlar oturumlar arasında SQLite'ta saklanır)
+        self.result_cache = ResultCache(path=result_cache_path)
+
+        # Ağır işlemler UI iş parçacığı dışında çalışır; sonuçlar Clock ile geri gelir
+        self.worker = AnalysisWorker(
+            scheduler=lambda callback: Clock.schedule_once(lambda dt: callback()),
+            on_progress=self.on_job_progress,
+            on_error=self.on_job_error,
+            on_cancel=self.on_job_cancelled,
+            on_preview=self.on_analysis_preview
+        )
+
+        # Canlı akış (kamera indeksi veya video dosyası)
+        self.stream_source = stream_source
+        self.stream = None
+        self._latest_stream_result = None
+        self._stream_trigger = Clock.create_trigger(self.on_stream_result)
+        self._stream_error_trigger = Clock.create_trigger(self.on_stream_error)
+
+        # Sıcak klasör: yakalayıcının bıraktığı yeni görüntüler yüklenip seçili ROI'lerle sayılır
+        self.watch_folder = watch_folder
+        self.watcher = None
+        self._latest_watch_result = None
+        self._watch_trigger = Clock.create_trigger(self.on_watch_result)
+        self._watch_error_trigger = Clock.create_trigger(self.on_watch_error)
+
+        # Sekmeleri oluştur
+        self.home_tab = None
+        self.setup_home_tab()
+        self.setup_roi_tab()
+        self.setup_process_tab()
+
+        # Varsayılan sekme
+        self.default_tab = self.home_tab
+
+    def setup_home_tab(self):
+        """Ana sayfa sekmesini oluşturur"""
+        tab = TabbedPanelItem(text='Ana Sayfa')
+        layout = BoxLayout(orientation='vertical')
+        self.home_image = ImageView(texture=self.image_texture)
+        layout.add_widget(self.home_image)
+        tab.content = layout
+        self.home_tab = tab
+        self.add_widget(tab)
+
+    def setup_roi_tab(self):
+        """ROI seçim sekmesini oluşturur"""
+        tab = TabbedPanelItem(text='ROI Seçimi')
+        layout = BoxLayout(orientation='vertical')
+        self.roi_layout = roi_layout = ROILayout(self.original_image)
+        layout.add_widget(roi_layout)
+
+        save_btn = Button(
+            text='ROI Kaydet',
+            size_hint=(0, 0),
+            on_press=self.save_roi
+        )
+        layout.add_widget(save_btn)
+
+        # Çoklu ROI: yan yana sac yığınları tek çekimde sayılır
+        roi_controls = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(40))
+        self.multi_roi_btn = Button(text='Çoklu ROI: Kapalı', on_press=self.toggle_multi_roi)
+        roi_controls.add_widget(self.multi_roi_btn)
+        roi_controls.add_widget(Button(text="ROI'leri Temizle", on_press=lambda instance: self.roi_canvas.clear_rois()))
+        layout.add_widget(roi_controls)
+
+        self.roi_canvas = roi_layout.roi_canvas
+        tab.content = layout
+        self.add_widget(tab)
+
+
+    def setup_process_tab(self):
+        """İşleme sekmesini oluşturur"""
+        tab = TabbedPanelItem(text='Görüntü İşleme')
+        main_layout = BoxLayout(orientation='horizontal')
+
+        # Sol taraf - görüntüler
+        images_layout = BoxLayout(orientation='horizontal', size_hint_x=0.7)
+        self.original_view = ImageView(texture=self.image_texture)
+        self.processed_view = ImageView()
+        images_layout.add_widget(self.original_view)
+        images_layout.add_widget(self.processed_view)
+        main_layout.add_widget(images_layout)
+
+        # Sağ taraf - kontroller ve analiz
+        controls_layout = BoxLayout(orientation='vertical', size_hint_x=0.3, padding=10, spacing=10)
+
+        # İşlem butonu
+        process_btn = Button(
+            text='İşle ve Analiz Et',
+            size_hint_y=None,
+            height=dp(40),
+            on_press=self.process_and_analyze_roi
+        )
+        controls_layout.add_widget(process_btn)
+
+        # Canlı akış butonu
+        self.stream_btn = Button(
+            text='Canlı Akış',
+            size_hint_y=None,
+            height=dp(40),
+            on_press=self.toggle_stream
+        )
+        controls_layout.add_widget(self.stream_btn)
+
+        # Sıcak klasör butonu
+        self.watch_btn = Button(
+            text='Klasörü İzle',
+            size_hint_y=None,
+            height=dp(40),
+            on_press=self.toggle_watch
+        )
+        controls_layout.add_widget(self.watch_btn)
+
+        # Analiz sonuçları için layout
+        self.analysis_layout = AnalysisLayout()
+        self.analysis_layout.plot_button.bind(on_press=self.show_detailed_analysis)
+        self.analysis_layout.cancel_button.bind(on_press=self.cancel_analysis)
+        controls_layout.add_widget(self.analysis_layout)
+
+        main_layout.add_widget(controls_layout)
+        tab.content = main_layout
+        self.add_widget(tab)
+
+    def save_roi(self, instance):
+        """ROI'yi kaydeder"""
+        roi_image, roi_coords = self.roi_canvas.export_roi()
+        if roi_image is not None:
+            self.show_info_popup("ROI başarıyla kaydedildi")
+        else:
+            self.show_error_popup("ROI seçilmedi")
+
+    def toggle_multi_roi(self, instance):
+        """Çoklu ROI modunu açar/kapatır"""
+        self.roi_canvas.multi = not self.roi_canvas.multi
+        instance.text = f"Çoklu ROI: {'Açık' if self.roi_canvas.multi else 'Kapalı'}"
+
+    def process_and_analyze_roi(self, instance):
+        """ROI analizini arka plan işine gönderir"""
+        rois = self.roi_canvas.named_rois()
+        if not rois:
+            self.show_error_popup("Önce ROI seçin")
+            return
+
+        # ROI bellekte, diske yazmadan; bekleyen eski istek varsa yerini alır
+        if len(rois) > 1:
+            # Tek çözme ve gri dönüşüm paylaşılır, ROI'ler eşzamanlı işlenir
+            self.worker.submit(analyze_rois, self.original_image, rois, graph=self.stage_graph,
+                               cache=self.result_cache, on_result=self.on_multi_analysis_done)
+        else:
+            # Koordinatlar gönderim anında alınır; sonuç gelene kadar ROI değişse de iş kendi ROI'sini taşır
+            roi_coords = self.roi_canvas.roi_coords
+            self.worker.submit(analyze_roi, self.roi_canvas.roi_image, graph=self.stage_graph,
+                               cache=self.result_cache, roi_coords=roi_coords, preview=True,
+                               on_result=partial(self.on_analysis_done, roi_coords=roi_coords))
+        self.analysis_layout.cancel_button.disabled = False
+        self.analysis_layout.set_progress(0, 'Sırada')
+
+    def on_analysis_preview(self, job, count):
+        """Kaba seviye sayımını, kesin sonuç hesaplanırken önizleme olarak gösterir"""
+        if not job.cancelled:
+            self.analysis_layout.edge_count_label.text = f'Kenar Sayısı: ~{count} (önizleme)'
+
+    def on_analysis_done(self, job, analysis, roi_coords=None):
+        """Analiz sonucunu arayüze uygular (ana iş parçacığında çalışır)"""
+        if job.cancelled:
+            return
+
+        self.current_analysis = analysis
+        width, height = analysis['roi_size']
+
+        # Sonuçları göster
+        ImageProcessor.update_view(self.processed_view, analysis['processed_image'], 'processed')
+        self.analysis_layout.edge_count_label.text = f'Kenar Sayısı: {analysis["edge_count"]}'
+        multiline = analysis['multiline']
+        self.analysis_layout.scanline_label.text = (
+            f"Çoklu Tarama: {multiline['count']} (uyum %{multiline['agreement'] * 100:.0f})"
+        )
+        self.analysis_layout.periodic_label.text = format_periodic(analysis['periodic'])
+        self.analysis_layout.update_metrics(self.performance.record(analysis['timings'], width * height))
+        self.analysis_layout.roi_size_label.text = f'ROI Boyutları: {width}x{height}'
+        analysis['roi_coords'] = roi_coords
+        reused = analysis['reused_stages']
+        if analysis['cache'] is not None:
+            self._finish_job(f"Tamamlandı (sonuç önbellekten: {analysis['cache']})")
+        else:
+            self._finish_job('Tamamlandı' + (f" (önbellekten: {', '.join(reused)})" if reused else ''))
+
+    def on_multi_analysis_done(self, job, result):
+        """Çoklu ROI sonucunu ROI başına sayım tablosu olarak gösterir (ana iş parçacığında çalışır)"""
+        if job.cancelled:
+            return
+
+        # Detaylı analiz ve işlenmiş görünüm ilk ROI'yi gösterir
+        self.current_analysis = result['analyses'][0]
+        table = result['table']
+        ImageProcessor.update_view(self.processed_view, self.current_analysis['processed_image'], 'processed')
+        self.analysis_layout.edge_count_label.text = 'Kenar Sayısı: ' + ', '.join(
+            f"{row['name']}: {row['edge_count']}" for row in table)
+        self.analysis_layout.scanline_label.text = 'Çoklu Tarama: ' + ', '.join(
+            f"{a['name']}: {a['multiline']['count']}" for a in result['analyses'])
+        self.analysis_layout.periodic_label.text = 'Periyodik Tahmin: ' + ', '.join(
+            f"{a['name']}: {a['periodic']['count'] if a['periodic'] else '-'}" for a in result['analyses'])
+        self.analysis_layout.roi_size_label.text = f"ROI Sayısı: {len(table)} ({result['elapsed_ms']:.0f} ms)"
+        self.analysis_layout.update_metrics(self.performance.record(result['timings'], result['pixels']))
+        reused = result['reused_stages']
+        cached = f" (sonucu önbellekten: {', '.join(result['cached'])})" if result['cached'] else ''
+        self._finish_job('Tamamlandı' + (f" (önbellekten: {', '.join(reused)})" if reused else '') + cached)
+
+    def show_detailed_analysis(self, instance):
+        if self.current_analysis is None:
+            self.show_error_popup("Önce görüntü işleme yapın")
+            return
+
+        # Bileşik görünüm analiz başına bir kez çizilir ve saklanır
+        analysis = self.current_analysis
+        if 'composite' not in analysis:
+            panels = detail_panels(self.original_image, analysis, analysis.get('roi_coords'))
+            analysis['composite'] = render_composite(panels)
+        self.show_plot_popup(analysis['composite'])
+
+    def export_detailed_analysis(self, instance, path='detailed_analysis.png'):
+        """Detaylı analizi matplotlib ile dosyaya aktarır (isteğe bağlı, arka planda)"""
+        if self.current_analysis is None:
+            return
+        panels = detail_panels(self.original_image, self.current_analysis, self.current_analysis.get('roi_coords'))
+        self.worker.submit(self.render_figure_export, panels, path, on_result=self.on_export_done)
+        self.analysis_layout.cancel_button.disabled = False
+        self.analysis_layout.set_progress(0, 'Grafik dışa aktarılıyor')
+
+    def render_figure_export(self, job, panels, path):
+        job.report(0.1, 'Grafik çiziliyor')
+        return export_figure(panels, path)
+
+    def on_export_done(self, job, path):
+        if job.cancelled:
+            return
+        self._finish_job(f'Tamamlandı: {path}')
+
+    def show_plot_popup(self, plot_image):
+        """Bileşik analiz görüntüsünü tek texture olarak popup'ta gösterir"""
+        content = BoxLayout(orientation='vertical', spacing=dp(5))
+        img = ImageView(
+            size_hint=(1, 1),
+            allow_stretch=True,
+            keep_ratio=True
+        )
+        img.texture = ImageProcessor.convert_to_texture(plot_image, 'composite')
+        content.add_widget(img)
+
+        export_button = Button(text='PNG Olarak Dışa Aktar (matplotlib)', size_hint_y=None, height=dp(40))
+        export_button.bind(on_press=self.export_detailed_analysis)
+        content.add_widget(export_button)
+
+        # Popup oluştur ve göster
+        popup = Popup(
+            title='Detaylı Analiz',
+            content=content,
+            size_hint=(0.9, 0.9)
+        )
+        popup.open()
+
+    def toggle_stream(self, instance):
+        """Seçili ROI ile canlı akışı başlatır veya durdurur"""
+        if self.stream is not None:
+            self.stop_stream()
+            return
+
+        if not self.roi_canvas.has_roi():
+            self.show_error_popup("Önce ROI seçin")
+            return
+
+        # Sabit ROI boyutunda adım çıktıları havuz tamponlarına yazılır (kare başına ayırma yok)
+        stream = FrameStream(self.stream_source, self.roi_canvas.roi_coords, keep_images=True,
+                             on_result=self._on_stream_frame, pooled=True, on_error=self._on_stream_frame_error)
+        try:
+            stream.start()
+        except ValueError as e:
+            self.show_error_popup(str(e))
+            return
+        self.stream = stream
+        self.stream_btn.text = 'Akışı Durdur'
+
+    def stop_stream(self):
+        """Canlı akışı durdurur"""
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream = None
+        self.stream_btn.text = 'Canlı Akış'
+
+    def _on_stream_frame(self, result):
+        # Akış iş parçacığında çağrılır; yalnızca en son sonuç gösterilir.
+        # Görüntü havuz tamponudur ve sonraki karelerde üzerine yazılır; arayüze kopyası verilir
+        result['processed_image'] = result['processed_image'].copy()
+        self._latest_stream_result = result
+        self._stream_trigger()
+
+    def _on_stream_frame_error(self, frame_index, error):
+        # Akış iş parçacığında çağrılır; çerçeve atlanır, akış sürer
+        self._stream_error_trigger()
+
+    def on_stream_error(self, dt):
+        """Akıştaki son çerçeve hatasını durum satırında gösterir (ana iş parçacığında çalışır)"""
+        if self.stream is None:
+            return
+        stats = self.stream.stats.snapshot()
+        self.analysis_layout.status_label.text = f"Durum: {stats['errors']} çerçeve hatası ({stats['last_error']})"
+
+    def on_stream_result(self, dt):
+        """En son akış sonucunu arayüze uygular (ana iş parçacığında çalışır)"""
+        result = self._latest_stream_result
+        if self.stream is None or result is None:
+            return
+
+        width, height = result['roi_size']
+        stats = self.stream.stats.snapshot()
+        ImageProcessor.update_view(self.processed_view, result['processed_image'], 'processed')
+        self.analysis_layout.edge_count_label.text = f'Kenar Sayısı: {result["edge_count"]}'
+        self.analysis_layout.roi_size_label.text = f'ROI Boyutları: {width}x{height}'
+        self.analysis_layout.status_label.text = (
+            f"Durum: {stats['recent_fps']:.1f} FPS, {result['latency_ms']:.0f} ms, {stats['dropped']} düşen"
+            + (f", {stats['errors']} hata" if stats['errors'] else '')
+        )
+        self.analysis_layout.update_metrics(self.performance.record(result['timings'], width * height))
+
+    def load_image(self, image):
+        """Gösterilen görüntüyü değiştirir; seçili ROI'ler aynı koordinatlarda kalır"""
+        self.original_image = image
+        self.roi_layout.original_image = image
+        for view in (self.home_image, self.roi_layout.image, self.original_view):
+            ImageProcessor.update_view(view, image, 'original')
+        self.roi_canvas.set_image(image)
+
+    def toggle_watch(self, instance):
+        """Seçili ROI'lerle sıcak klasör izlemesini başlatır veya durdurur"""
+        if self.watcher is not None:
+            self.stop_watch()
+            return
+
+        rois = self.roi_canvas.named_rois()
+        if not rois:
+            self.show_error_popup("Önce ROI seçin")
+            return
+
+        try:
+            watcher = HotFolderWatcher(self.watch_folder, rois=rois, grayscale=False, log_path=DEFAULT_LOG,
+                                       on_result=self._on_watch_result, keep_images=True,
+                                       on_error=self._on_watch_error)
+            watcher.start()
+        except Exception as e:
+            self.show_error_popup(f"İzleme başlatılamadı: {e}")
+            return
+        self.watcher = watcher
+        self.watch_btn.text = 'İzlemeyi Durdur'
+        self.analysis_layout.status_label.text = f'Durum: {self.watch_folder} izleniyor'
+
+    def stop_watch(self):
+        """Sıcak klasör izlemesini durdurur (işlenmekte olan görüntüler bitirilir)"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.watch_btn.text = 'Klasörü İzle'
+
+    def _on_watch_result(self, rows, image):
+        # İzleyici iş parçacığında çağrılır; yalnızca en son dosya gösterilir
+        self._latest_watch_result = (rows, image)
+        self._watch_trigger()
+
+    def _on_watch_error(self, error):
+        # İzleyici iş parçacığında çağrılır; izleme durmuştur
+        self._watch_error_trigger()
+
+    def on_watch_error(self, dt):
+        """İzlemeyi durduran hatayı gösterir ve düğmeyi sıfırlar (ana iş parçacığında çalışır)"""
+        if self.watcher is None or self.watcher.error is None:
+            return
+        error = self.watcher.error
+        self.stop_watch()
+        self.analysis_layout.status_label.text = f'Durum: izleme durdu ({error})'
+        self.show_error_popup(f"İzleme durdu: {error}")
+
+    def on_watch_result(self, dt):
+        """En son sıcak klasör sonucunu arayüze uygular (ana iş parçacığında çalışır)"""
+        if self.watcher is None or self._latest_watch_result is None:
+            return
+
+        rows, image = self._latest_watch_result
+        name = os.path.basename(rows[0]['image_path'])
+        stats = self.watcher.stats
+        self.analysis_layout.status_label.text = (
+            f"Durum: {name} ({stats['processed']} işlendi, {stats['waiting']} bekleyen)"
+        )
+        if rows[0]['error'] is not None:
+            self.analysis_layout.edge_count_label.text = f"Kenar Sayısı: - ({rows[0]['error']})"
+            return
+        self.load_image(image)
+        self.analysis_layout.edge_count_label.text = 'Kenar Sayısı: ' + ', '.join(
+            f"{row['roi_name']}: {row['edge_count']}" for row in rows)
+
+    def cancel_analysis(self, instance):
+        """Bekleyen ve çalışan arka plan işlerini iptal eder"""
+        self.worker.cancel()
+        self._finish_job('İptal edildi')
+
+    def on_job_progress(self, job, fraction, message):
+        if not job.cancelled:
+            self.analysis_layout.set_progress(fraction, message)
+
+    def on_job_error(self, job, error):
+        self._finish_job('Hata')
+        self.show_error_popup(f"İşlem hatası: {str(error)}")
+
+    def on_job_cancelled(self, job):
+        if not self.worker.busy:
+            self._finish_job('İptal edildi')
+
+    def _finish_job(self, message):
+        if not self.worker.busy:
+            self.analysis_layout.cancel_button.disabled = True
+        self.analysis_layout.set_progress(1 if message.startswith('Tamamlandı') else 0, message)
+
+    def show_error_popup(self, message):
+        """Hata popup'ı gösterir"""
+        Popup(
+            title='Hata',
+            content=Button(text=message),
+            size_hint=(0.8, 0.4)
+        ).open()
+
+    def show_info_popup(self, message):
+        """Bilgi popup'ı gösterir"""
+        Popup(
+            title='Bilgi',
+            content=Button(text=message),
+            size_hint=(0.8, 0.4)
+        ).open()
+
+
+class MainApp(App):
+    def build(self):
+        return MainTabs()
+
+    def on_stop(self):
+        self.root.stop_stream()
+        self.root.stop_watch()
+        self.root.worker.shutdown()
+        self.root.result_cache.close()
+
+
+if __name__ == '__main__':
     MainApp().run()
\ No newline at end of file
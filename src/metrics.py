@@ -0,0 +1,75 @@
+# metrics.py → 18.10.2026
+import time
+from collections import deque
+
+
+class PerformanceTracker:
+    """Son analizlerin adım sürelerini, gecikmesini ve throughput'unu izler"""
+
+    def __init__(self, window=20, budget_ms=None):
+        self.budget_ms = budget_ms
+        self.runs = deque(maxlen=window)
+
+    def record(self, timings, pixels=None):
+        """Bir analizin adım sürelerini (saniye) kaydeder ve özetini döndürür."""
+        total = sum(timings.values())
+        self.runs.append({
+            'timings': dict(timings),
+            'total_s': total,
+            'pixels': pixels,
+            'finished_at': time.perf_counter(),
+        })
+        return self.summary()
+
+    def summary(self):
+        """Son çalışmanın dökümü ile kayan ortalama ve throughput değerlerini döndürür."""
+        if not self.runs:
+            return None
+
+        last = self.runs[-1]
+        totals = [run['total_s'] for run in self.runs]
+        average = sum(totals) / len(totals)
+        pixels = [run['pixels'] for run in self.runs if run['pixels']]
+
+        # Gözlenen hız: son çalışmalar arasındaki gerçek zaman aralığı
+        observed_rate = None
+        if len(self.runs) > 1:
+            span = self.runs[-1]['finished_at'] - self.runs[0]['finished_at']
+            if span > 0:
+                observed_rate = (len(self.runs) - 1) / span
+
+        last_ms = last['total_s'] * 1000
+        return {
+            'stages_ms': {name: seconds * 1000 for name, seconds in last['timings'].items()},
+            'total_ms': last_ms,
+            'average_ms': average * 1000,
+            'runs': len(self.runs),
+            'throughput_per_s': 1 / average if average > 0 else None,
+            'observed_per_s': observed_rate,
+            'mpx_per_s': (sum(pixels) / len(pixels)) / average / 1e6 if pixels and average > 0 else None,
+            'budget_ms': self.budget_ms,
+            'over_budget': self.budget_ms is not None and last_ms > self.budget_ms,
+        }
+
+    def reset(self):
+        self.runs.clear()
+
+
+def format_summary(summary):
+    """Özet sözlüğünü arayüz için çok satırlı metne çevirir."""
+    if summary is None:
+        return 'Performans: -'
+
+    lines = ['Performans (ms):']
+    for name, ms in summary['stages_ms'].items():
+        lines.append(f'  {name}: {ms:.1f}')
+    budget = ''
+    if summary['budget_ms'] is not None:
+        budget = ' (BÜTÇE AŞILDI)' if summary['over_budget'] else f" / {summary['budget_ms']:.0f}"
+    lines.append(f"Toplam: {summary['total_ms']:.1f}{budget}")
+    lines.append(f"Ortalama ({summary['runs']}): {summary['average_ms']:.1f}")
+    throughput = f"{summary['throughput_per_s']:.1f} analiz/s" if summary['throughput_per_s'] else '-'
+    if summary['mpx_per_s'] is not None:
+        throughput += f", {summary['mpx_per_s']:.1f} MP/s"
+    lines.append(f"Throughput: {throughput}")
+    return '\n'.join(lines)
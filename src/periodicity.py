@@ -0,0 +1,165 @@
+# periodicity.py → 18.10.2026
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from core import count_edges_multiline, count_vertical_edges
+from pipeline import get_pipeline
+from samples import load_samples
+
+DEFAULT_MIN_PITCH = 4
+# Adım en fazla profil uzunluğunun bu kesri olabilir (en az bu kadar sac görünmeli)
+MIN_PERIODS = 3
+# Sayım ve adım tahmini arasındaki en düşük güven; altında sonuç güvenilmez işaretlenir
+MIN_CONFIDENCE = 0.2
+# Adımın katlarındaki tepeler de yüksektir; en yüksek tepenin bu oranına ulaşan ilk tepe seçilir
+HARMONIC_RATIO = 0.8
+# Otokorelasyon adımı spektral adımın bu göreli toleransla tam katıysa kat olarak kabul edilir
+HARMONIC_TOLERANCE = 0.06
+
+
+def intensity_profile(gray, columns=None):
+    """Yığın yönündeki (dikey) parlaklık profili: her satırın ortalaması.
+
+    columns (x0, x1) verilirse yalnızca o sütun aralığı ortalanır (eğik yığınlarda dar bant daha keskin).
+    """
+    if columns is not None:
+        gray = gray[:, columns[0]:columns[1]]
+    return cv2.reduce(gray, 1, cv2.REDUCE_AVG, dtype=cv2.CV_32F).ravel()
+
+
+def _detrend(profile, max_pitch):
+    # Aydınlatma eğimini ve yavaş değişimleri, en büyük adımdan geniş bir kutu ortalamasıyla çıkar
+    window = int(max_pitch) * 2 + 1
+    trend = cv2.blur(profile.reshape(-1, 1), (1, window), borderType=cv2.BORDER_REFLECT).ravel()
+    return (profile - trend) * np.hanning(len(profile)).astype(np.float32)
+
+
+def _refine_peak(values, index):
+    """Üç noktalı parabol ile tepe konumunu alt-örnek hassasiyetinde düzeltir."""
+    if index <= 0 or index >= len(values) - 1:
+        return float(index)
+    left, center, right = values[index - 1], values[index], values[index + 1]
+    denominator = left - 2 * center + right
+    return index + (0.5 * (left - right) / denominator if denominator else 0.0)
+
+
+def estimate_pitch(profile, min_pitch=DEFAULT_MIN_PITCH, max_pitch=None):
+    """Profilden sac adımını (piksel) otokorelasyon ve güç spektrumu tepeleriyle tahmin eder.
+
+    İkisi de tek bir FFT'den elde edilir (O(n log n)). Otokorelasyon tepesi esas alınır; spektral
+    tahmin çapraz kontrol olarak döner. confidence, adımdaki normalize otokorelasyon değeridir.
+    """
+    length = len(profile)
+    max_pitch = max_pitch or length // MIN_PERIODS
+    if length < 2 * MIN_PERIODS or max_pitch <= min_pitch:
+        raise ValueError(f"Profil adım tahmini için çok kısa: {length}")
+
+    signal = _detrend(np.asarray(profile, np.float32), max_pitch)
+    size = cv2.getOptimalDFTSize(2 * length)  # Sıfır dolgu: döngüsel olmayan otokorelasyon
+    spectrum = np.fft.rfft(signal, size)
+    power = spectrum.real ** 2 + spectrum.imag ** 2
+
+    autocorr = np.fft.irfft(power, size)[:max_pitch + 2]
+    if autocorr[0] <= 0:
+        return {'pitch': None, 'spectral_pitch': None, 'confidence': 0.0}
+    autocorr /= autocorr[0]
+    # Merkez tepenin dışında ara: ilk sıfır geçişinden sonra
+    negative = np.flatnonzero(autocorr[:max_pitch + 1] <= 0)
+    start = max(min_pitch, negative[0] if len(negative) else min_pitch)
+    if start >= max_pitch:
+        return {'pitch': None, 'spectral_pitch': None, 'confidence': 0.0}
+    window = autocorr[start:max_pitch + 1]
+    peaks = np.flatnonzero((window[1:-1] >= window[:-2]) & (window[1:-1] >= window[2:])) + 1
+    if len(peaks) == 0:
+        return {'pitch': None, 'spectral_pitch': None, 'confidence': 0.0}
+    best = window[peaks].max()
+    lag = start + int(peaks[np.argmax(window[peaks] >= HARMONIC_RATIO * best)])
+
+    # Güç spektrumunda aynı aralıktaki en güçlü frekans
+    low_bin = max(1, int(np.floor(size / max_pitch)))
+    high_bin = min(len(power) - 1, int(np.ceil(size / min_pitch)))
+    peak_bin = low_bin + int(np.argmax(power[low_bin:high_bin + 1]))
+    frequency = _refine_peak(power, peak_bin)
+    spectral_pitch = float(size / frequency) if frequency > 0 else None
+
+    # Dönüşümlü parlaklıktaki saclarda (ör. iki sacda bir tekrar) otokorelasyon adımın katında tepe
+    # yapar; spektral tepe temel adımı gösteriyorsa adım, o katın temel adıma bölümüdür
+    pitch = _refine_peak(autocorr, lag)
+    if spectral_pitch is not None:
+        multiple = pitch / spectral_pitch
+        harmonic = round(multiple)
+        if harmonic >= 2 and abs(multiple - harmonic) <= HARMONIC_TOLERANCE * harmonic:
+            pitch /= harmonic
+
+    return {'pitch': float(pitch), 'spectral_pitch': spectral_pitch, 'confidence': float(autocorr[lag])}
+
+
+def count_periodic(gray, columns=None, min_pitch=DEFAULT_MIN_PITCH, max_pitch=None):
+    """Sac sayısını profil uzunluğu / adım olarak tahmin eder; filtre zinciri ve Canny gerektirmez."""
+    profile = intensity_profile(gray, columns)
+    estimate = estimate_pitch(profile, min_pitch, max_pitch)
+    pitch = estimate['pitch']
+    count = int(round(len(profile) / pitch)) if pitch else None
+    return dict(estimate, count=count, reliable=pitch is not None and estimate['confidence'] >= MIN_CONFIDENCE)
+
+
+def format_periodic(periodic):
+    """Arayüz etiketi için kısa özet; güvenilmez tahmin işaretlenir."""
+    if periodic is None or periodic['count'] is None:
+        return 'Periyodik Tahmin: -'
+    flag = '' if periodic['reliable'] else ' ?'
+    return f"Periyodik Tahmin: {periodic['count']}{flag} (adım {periodic['pitch']:.1f} px)"
+
+
+def compare_estimators(samples, repeats=20):
+    """Örneklerde periyodik tahmini Canny tabanlı sayımla karşılaştırır ve sürelerini ölçer."""
+    pipeline = get_pipeline()
+    rows = []
+    for name, gray in samples:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            periodic = count_periodic(gray)
+        periodic_ms = (time.perf_counter() - start) / repeats * 1000
+
+        start = time.perf_counter()
+        _, edges = pipeline.detect_edges(gray)
+        canny_count = count_vertical_edges(edges)
+        canny_ms = (time.perf_counter() - start) * 1000
+        rows.append({
+            'name': name,
+            'periodic': periodic,
+            'periodic_ms': periodic_ms,
+            'canny_count': canny_count,
+            'multiline_count': count_edges_multiline(edges)['count'],
+            'canny_ms': canny_ms,
+        })
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Parlaklık profili periyodikliğinden sac sayımı (Canny çapraz kontrolü)")
+    parser.add_argument('--assets', default='assets', help="Örnek görüntü klasörü")
+    parser.add_argument('--repeats', type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = load_samples(args.assets)
+    if not samples:
+        raise SystemExit(f"ROI'si bilinen örnek görüntü bulunamadı: {args.assets}")
+    for row in compare_estimators(samples, args.repeats):
+        periodic = row['periodic']
+        pitch = f"{periodic['pitch']:.2f}" if periodic['pitch'] else '-'
+        spectral = f"{periodic['spectral_pitch']:.2f}" if periodic['spectral_pitch'] else '-'
+        flag = '' if periodic['reliable'] else '  (güvenilmez)'
+        print(f"{row['name']:<8} periyodik {periodic['count']!s:>4} (adım {pitch} px, spektral {spectral} px, "
+              f"güven {periodic['confidence']:.2f}, {row['periodic_ms']:.3f} ms)  "
+              f"Canny {row['canny_count']:>3} / çoklu {row['multiline_count']:>3} ({row['canny_ms']:.1f} ms){flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+# pipeline.py → 18.10.2026
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache, partial
+
+import cv2
+import numpy as np
+
+# Varsayılan işleme parametreleri (her çağrıda yeniden oluşturulmaz)
+DEFAULT_CLAHE = {'clip_limit': 2.0, 'tile_grid_size': (8, 8)}
+DEFAULT_BLUR = {'kernel_size': (11, 11)}
+DEFAULT_BILATERAL = {'d': 9, 'sigma_color': 75, 'sigma_space': 75}
+DEFAULT_GABOR = {
+    'ksize': 10,
+    'sigma': 5.7,
+    'theta': 2 * (np.pi) / 4,
+    'lambd': 10.0,
+    'gamma': 0.5,
+    'psi': 0
+}
+DEFAULT_MORPHOLOGICAL = {
+    'erosion_kernel': 3,
+    'erosion_iter': 1,
+    'dilation_kernel': 5,
+    'dilation_iter': 1
+}
+DEFAULT_CANNY = {'low': 50, 'high': 150}
+DEFAULT_RESIZE = {'scale': 1.0}
+
+# Adım grupları; pipeline parametrelerinde False verilen isteğe bağlı adım atlanır
+DEFAULT_PARAMS = {
+    'resize': DEFAULT_RESIZE,
+    'clahe': DEFAULT_CLAHE,
+    'blur': DEFAULT_BLUR,
+    'bilateral': DEFAULT_BILATERAL,
+    'gabor': DEFAULT_GABOR,
+    'morphological': DEFAULT_MORPHOLOGICAL,
+    'canny': DEFAULT_CANNY,
+}
+
+OPTIONAL_STAGES = ('blur', 'bilateral', 'morphological')
+
+# Seçilebilir profiller: varsayılanların üzerine yazılan parametre grupları.
+# Doğruluk/hız farkı örnek görüntülerde profile_report.py ile ölçülür.
+PROFILES = {
+    # Mevcut varsayılanlar
+    'accurate': {},
+    # Bilateral yerine tek bir box blur; örnek görüntülerde sayım accurate ile aynı
+    'fast': {
+        'blur': {'kernel_size': (9, 9), 'method': 'box'},
+        'bilateral': False,
+    },
+    # Yarım çözünürlükte geçiş; Gabor ve morfoloji ölçeğe göre küçültüldü
+    'fastest': {
+        'resize': {'scale': 0.5},
+        'blur': {'kernel_size': (5, 5)},
+        'bilateral': False,
+        'gabor': dict(DEFAULT_GABOR, ksize=5, sigma=2.85, lambd=5.0),
+        'morphological': dict(DEFAULT_MORPHOLOGICAL, erosion_kernel=1, dilation_kernel=3),
+    },
+}
+
+PIPELINE_CACHE_SIZE = 16
+KERNEL_CACHE_SIZE = 64
+GRAPH_CACHE_SIZE = 32
+
+
+class LRUCache:
+    """Boyutu sınırlı, iş parçacığı güvenli LRU önbellek"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        """Anahtar varsa değeri döndürür, yoksa factory() ile oluşturup saklar."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        value = factory()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def freeze_params(params):
+    """Parametre sözlüğünü önbellek anahtarı olarak kullanılabilecek hale getirir."""
+    if isinstance(params, dict):
+        return tuple(sorted((key, freeze_params(value)) for key, value in params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(freeze_params(value) for value in params)
+    if isinstance(params, np.generic):
+        return params.item()
+    return params
+
+
+def resolve_params(params=None, profile=None):
+    """Parametre gruplarını varsayılan ← profil ← params sırasıyla birleştirir."""
+    if profile is not None and profile not in PROFILES:
+        raise ValueError(f"Bilinmeyen profil: {profile}")
+    layers = [PROFILES[profile] if profile else {}, params or {}]
+
+    resolved = dict(DEFAULT_PARAMS)
+    for layer in layers:
+        for name, value in layer.items():
+            if name not in DEFAULT_PARAMS:
+                raise ValueError(f"Bilinmeyen parametre grubu: {name}")
+            if value is False and name not in OPTIONAL_STAGES:
+                raise ValueError(f"'{name}' adımı atlanamaz")
+            if value is not None:
+                resolved[name] = value
+    return resolved
+
+
+class StageGraph:
+    """Adım çıktılarını (girdi kimliği, adım adı, adım parametreleri) anahtarıyla saklayan hesaplama grafiği.
+
+    Anahtar zincirlendiği için bir adımın parametresi değişince yalnızca o adım ve sonrakiler
+    yeniden hesaplanır. Saklanan çıktılar salt okunurdur.
+    """
+
+    def __init__(self, maxsize=GRAPH_CACHE_SIZE, max_sources=8):
+        self._outputs = LRUCache(maxsize)
+        self._sources = deque(maxlen=max_sources)
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def reserve(self, sources, outputs):
+        """Kapasiteyi en az verilen kaynak ve çıktı sayısına çıkarır (küçültmez).
+
+        Aynı anda çok sayıda girdi işleyen çağıranlar (ör. çoklu ROI) tekrar çalıştırmada
+        kaynakları tahliye edip anahtarları geçersiz kılmamak için önceden yer ayırır.
+        """
+        with self._lock:
+            if sources > self._sources.maxlen:
+                self._sources = deque(self._sources, maxlen=sources)
+        if outputs > self._outputs.maxsize:
+            self._outputs.maxsize = outputs
+
+    def source_key(self, image):
+        """Girdi nesnesinin kimlik anahtarı; aynı nesne her zaman aynı anahtarı alır."""
+        with self._lock:
+            for token, source in self._sources:
+                if source is image:
+                    return ('source', token)
+            # Referans tutulduğu sürece nesnenin id'si başka bir görüntüye geçemez
+            token = next(self._tokens)
+            self._sources.append((token, image))
+            return ('source', token)
+
+    def run(self, image, stages, on_stage=None):
+        """(ad, fonksiyon, parametreler) adımlarını sırayla uygular; fonksiyon(görüntü) çağrılır.
+
+        on_stage verilirse her adımdan sonra (ad, saniye, önbellekten_mi) ile çağrılır.
+        """
+        key = self.source_key(image)
+        for name, stage, params in stages:
+            key = (key, name, freeze_params(params))
+            computed = []
+
+            def compute(stage=stage, source=image):
+                output = stage(source)
+                output.flags.writeable = False
+                computed.append(True)
+                return output
+
+            start = time.perf_counter()
+            image = self._outputs.get_or_create(key, compute)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                if computed:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            if on_stage is not None:
+                on_stage(name, elapsed, not computed)
+        return image
+
+    def clear(self):
+        self._outputs.clear()
+        with self._lock:
+            self._sources.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._outputs)
+
+
+class BufferPool:
+    """Sabit boyutlu karelerde adım çıktıları için önceden ayrılan ve tekrar kullanılan tamponlar.
+
+    Tamponlar (ad, şekil, tür) ile bir kez ayrılır; şekil değişmedikçe her karede aynı bellek kullanılır.
+    generations > 1 ise next_frame() sıradaki tampon takımına geçer, böylece önceki karelerin
+    çıktıları (ör. arayüzde gösterilen) generations - 1 kare boyunca üzerine yazılmadan kalır.
+    """
+
+    def __init__(self, generations=1):
+        self.generations = generations
+        self._sets = [{} for _ in range(generations)]
+        self._index = 0
+        self.allocations = 0
+
+    def next_frame(self):
+        self._index = (self._index + 1) % self.generations
+
+    def get(self, name, shape, dtype=np.uint8):
+        """Adın tamponunu döndürür; yoksa veya şekil değiştiyse yeniden ayırır."""
+        buffers = self._sets[self._index]
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype)
+            buffers[name] = buffer
+            self.allocations += 1
+        return buffer
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffers in self._sets for buffer in buffers.values())
+
+    def clear(self):
+        for buffers in self._sets:
+            buffers.clear()
+
+
+_clahe_local = threading.local()
+
+
+def get_clahe(clip_limit=2.0, tile_grid_size=(8, 8)):
+    """Önbellekteki CLAHE nesnesini döndürür.
+
+    CLAHE nesneleri dahili tampon tuttuğu için iş parçacığı başına ayrı önbellek kullanılır.
+    """
+    cache = getattr(_clahe_local, 'cache', None)
+    if cache is None:
+        cache = _clahe_local.cache = LRUCache(KERNEL_CACHE_SIZE)
+    tile_grid_size = tuple(tile_grid_size)
+    return cache.get_or_create(
+        (clip_limit, tile_grid_size),
+        lambda: cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+    )
+
+
+@lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def get_gabor_kernel(ksize=21, sigma=8.0, theta=np.pi / 4, lambd=10.0, gamma=0.5, psi=0):
+    """Önbellekteki (salt okunur) Gabor çekirdeğini döndürür."""
+    kernel = cv2.getGaborKernel(
+        (ksize, ksize),
+        sigma,
+        theta,
+        lambd,
+        gamma,
+        psi,
+        ktype=cv2.CV_32F
+    )
+    kernel.flags.writeable = False
+    return kernel
+
+
+@lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def get_morph_kernel(size):
+    """Önbellekteki (salt okunur) kare yapısal elemanı döndürür."""
+    kernel = np.ones((size, size), np.uint8)
+    kernel.flags.writeable = False
+    return kernel
+
+
+class CompiledPipeline:
+    """Bir parametre setinden bir kez derlenen, tekrar kullanılabilir filtre zinciri.
+
+    Çekirdekler ve CLAHE nesneleri önceden hazırlanır; apply() çağrıları kurulum yapmaz.
+    """
+
+    def __init__(self, params=None, profile=None):
+        self.params = resolve_params(params, profile)
+        self.key = freeze_params(self.params)
+
+        self.scale = self.params['resize']['scale']
+
+        clahe = self.params['clahe']
+        self.clahe_clip_limit = clahe['clip_limit']
+        self.clahe_tile_grid_size = tuple(clahe['tile_grid_size'])
+
+        blur = self.params['blur']
+        if blur:
+            self.blur_kernel_size = tuple(blur['kernel_size'])
+            self.blur_method = blur.get('method', 'gaussian')
+
+        bilateral = self.params['bilateral']
+        if bilateral:
+            self.bilateral_args = (bilateral['d'], bilateral['sigma_color'], bilateral['sigma_space'])
+
+        self.gabor_kernel = get_gabor_kernel(**self.params['gabor'])
+
+        morphological = self.params['morphological']
+        if morphological:
+            self.erosion_kernel = get_morph_kernel(morphological['erosion_kernel'])
+            self.erosion_iter = morphological['erosion_iter']
+            self.dilation_kernel = get_morph_kernel(morphological['dilation_kernel'])
+            self.dilation_iter = morphological['dilation_iter']
+
+        canny = self.params['canny']
+        self.canny_low = canny['low']
+        self.canny_high = canny['high']
+
+        # (ad, fonksiyon) listeleri; atlanan adımlar hiç eklenmez
+        self.preprocess_stages = []
+        if self.scale != 1.0:
+            self.preprocess_stages.append(('resize', self._resize))
+        self.preprocess_stages.append(('clahe', self._clahe))
+        if blur:
+            self.preprocess_stages.append(('blur', self._blur))
+        if bilateral:
+            self.preprocess_stages.append(('bilateral', self._bilateral))
+
+        self.filter_stages = [('gabor', self._gabor)]
+        if morphological:
+            self.filter_stages.append(('morphology', self._morphology))
+
+        # Aynı adımların BufferPool tamponlarına yazan karşılıkları (fonksiyon(görüntü, pool))
+        pooled = {
+            'resize': self._resize_into, 'clahe': self._clahe_into, 'blur': self._blur_into,
+            'bilateral': self._bilateral_into, 'gabor': self._gabor_into, 'morphology': self._morphology_into,
+        }
+        self.pooled_stages = [(name, pooled[name]) for name, _ in self.preprocess_stages + self.filter_stages]
+
+        # CLAHE sonrası adımların etki yarıçapları (piksel, iki eksenin büyüğü); şerit/karo işlemede halo için
+        self.stage_radius = {}
+        if blur:
+            self.stage_radius['blur'] = max(self.blur_kernel_size) // 2
+        if bilateral:
+            d, _, sigma_space = self.bilateral_args
+            self.stage_radius['bilateral'] = max(d // 2 if d > 0 else int(round(sigma_space * 1.5)), 1)
+        self.stage_radius['gabor'] = max(self.gabor_kernel.shape) // 2
+        if morphological:
+            self.stage_radius['morphology'] = (
+                (self.erosion_kernel.shape[0] // 2) * self.erosion_iter
+                + (self.dilation_kernel.shape[0] // 2) * self.dilation_iter
+            )
+        self.stage_radius['canny'] = 2  # 3x3 Sobel + maksimum olmayanların bastırılması
+
+    @property
+    def clahe(self):
+        return get_clahe(self.clahe_clip_limit, self.clahe_tile_grid_size)
+
+    @property
+    def stage_names(self):
+        return [name for name, _ in self.preprocess_stages + self.filter_stages] + ['canny']
+
+    def _resize(self, image):
+        return cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def _clahe(self, image):
+        return self.clahe.apply(image)
+
+    def _blur(self, image):
+        if self.blur_method == 'box':
+            return cv2.blur(image, self.blur_kernel_size)
+        return cv2.GaussianBlur(image, self.blur_kernel_size, 0)
+
+    def _bilateral(self, image):
+        return cv2.bilateralFilter(image, *self.bilateral_args)
+
+    def _gabor(self, image):
+        return cv2.filter2D(image, cv2.CV_8UC3, self.gabor_kernel)
+
+    def _morphology(self, image):
+        image = cv2.erode(image, self.erosion_kernel, iterations=self.erosion_iter)
+        return cv2.dilate(image, self.dilation_kernel, iterations=self.dilation_iter)
+
+    @staticmethod
+    def _run_stages(image, stages, timings):
+        for name, stage in stages:
+            if timings is None:
+                image = stage(image)
+            else:
+                start = time.perf_counter()
+                image = stage(image)
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        return image
+
+    @property
+    def filter_halo(self):
+        """CLAHE çıktısından filtrelenmiş görüntüye kadar toplam yatay etki yarıçapı."""
+        return sum(radius for name, radius in self.stage_radius.items() if name != 'canny')
+
+    def _stage_index(self, stage_name):
+        names = [name for name, _ in self.preprocess_stages + self.filter_stages]
+        if stage_name not in names:
+            raise ValueError(f"Pipeline'da olmayan adım: {stage_name}")
+        return names.index(stage_name)
+
+    def apply_until(self, stage_name, image, timings=None):
+        """Zinciri stage_name adımı dahil olmak üzere çalıştırır."""
+        stages = self.preprocess_stages + self.filter_stages
+        return self._run_stages(image, stages[:self._stage_index(stage_name) + 1], timings)
+
+    def apply_after(self, stage_name, image, timings=None):
+        """Zinciri stage_name adımının çıktısından devam ettirir (o adım ve öncekiler atlanır)."""
+        stages = self.preprocess_stages + self.filter_stages
+        return self._run_stages(image, stages[self._stage_index(stage_name) + 1:], timings)
+
+    def preprocess(self, gray, timings=None):
+        """(Ölçekleme) → CLAHE → blur → bilateral adımlarını uygular."""
+        return self._run_stages(gray, self.preprocess_stages, timings)
+
+    def filter(self, image, timings=None):
+        """Gabor ve morfolojik işlemleri uygular."""
+        return self._run_stages(image, self.filter_stages, timings)
+
+    def apply(self, gray, timings=None):
+        """Gri görüntüye tüm filtre zincirini uygular (accurate profilde process_image ile aynı sonuç).
+
+        timings sözlüğü verilirse adım süreleri (saniye) adım adıyla eklenir.
+        """
+        return self.filter(self.preprocess(gray, timings), timings)
+
+    def detect_edges(self, gray, timings=None):
+        """Filtre zincirini ve Canny'yi uygular; (işlenmiş görüntü, kenarlar) döndürür."""
+        processed = self.apply(gray, timings)
+        return processed, self.canny(processed, timings)
+
+    def canny(self, image, timings=None):
+        """Filtrelenmiş görüntüye (veya bir bandına) Canny uygular."""
+        return self._run_stages(image, [('canny', self._canny)], timings)
+
+    def edges_after(self, stage_name, image, timings=None):
+        """Zinciri stage_name çıktısından sürdürüp Canny uygular; bant yeniden işleme için kenarları döndürür."""
+        return self.canny(self.apply_after(stage_name, image, timings), timings)
+
+    def _canny(self, image):
+        return cv2.Canny(image, self.canny_low, self.canny_high)
+
+    def _resize_into(self, image, pool):
+        # cv2.resize hedef boyutu fx/fy'den cvRound ile hesaplar (Python round ile aynı)
+        shape = (round(image.shape[0] * self.scale), round(image.shape[1] * self.scale))
+        return cv2.resize(image, None, dst=pool.get('resize', shape), fx=self.scale, fy=self.scale,
+                          interpolation=cv2.INTER_AREA)
+
+    def _clahe_into(self, image, pool):
+        return self.clahe.apply(image, pool.get('clahe', image.shape))
+
+    def _blur_into(self, image, pool):
+        if self.blur_method == 'box':
+            return cv2.blur(image, self.blur_kernel_size, dst=pool.get('blur', image.shape))
+        return cv2.GaussianBlur(image, self.blur_kernel_size, 0, dst=pool.get('blur', image.shape))
+
+    def _bilateral_into(self, image, pool):
+        return cv2.bilateralFilter(image, *self.bilateral_args, dst=pool.get('bilateral', image.shape))
+
+    def _gabor_into(self, image, pool):
+        return cv2.filter2D(image, cv2.CV_8UC3, self.gabor_kernel, dst=pool.get('gabor', image.shape))
+
+    def _morphology_into(self, image, pool):
+        eroded = cv2.erode(image, self.erosion_kernel, dst=pool.get('erode', image.shape),
+                           iterations=self.erosion_iter)
+        return cv2.dilate(eroded, self.dilation_kernel, dst=pool.get('morphology', image.shape),
+                          iterations=self.dilation_iter)
+
+    def _canny_into(self, image, pool):
+        return cv2.Canny(image, self.canny_low, self.canny_high, edges=pool.get('canny', image.shape))
+
+    def frame_stages(self, pool=None):
+        """Canny dahil tüm adımlar; pool verilirse tamponlara yazan karşılıkları."""
+        if pool is None:
+            return self.preprocess_stages + self.filter_stages + [('canny', self._canny)]
+        return [(name, partial(stage, pool=pool))
+                for name, stage in self.pooled_stages + [('canny', self._canny_into)]]
+
+    def detect_edges_pooled(self, gray, pool, timings=None):
+        """detect_edges ile birebir aynı çıktıyı havuzun önceden ayrılmış tamponlarına yazar.
+
+        Dönen diziler havuz tamponlarıdır; aynı tampon takımı bir sonraki kullanımda üzerine yazılır.
+        """
+        stages = self.frame_stages(pool)
+        processed = self._run_stages(gray, stages[:-1], timings)
+        edges = self._run_stages(processed, stages[-1:], timings)
+        return processed, edges
+
+
+_pipeline_cache = LRUCache(PIPELINE_CACHE_SIZE)
+
+
+def get_pipeline(params=None, profile=None):
+    """Parametrelere (ve isteğe bağlı profile) göre önbellekten derlenmiş pipeline döndürür (LRU)."""
+    resolved = resolve_params(params, profile)
+    return _pipeline_cache.get_or_create(freeze_params(resolved), lambda: CompiledPipeline(resolved))
+
+
+def clear_pipeline_cache():
+    """Pipeline ve çekirdek önbelleklerini temizler."""
+    _pipeline_cache.clear()
+    get_gabor_kernel.cache_clear()
+    get_morph_kernel.cache_clear()
@@ -0,0 +1,40 @@
+# samples.py → 18.10.2026
+import os
+
+import cv2
+import numpy as np
+
+# Örnek görüntülerde sac yığınını kapsayan ROI'ler (x1, y1, x2, y2)
+SAMPLE_ROIS = {
+    '1.jpg': (337, 386, 445, 1173),
+    '2.jpg': (500, 120, 620, 1250),
+    '3.jpg': (700, 180, 820, 800),
+    '4.jpg': (120, 15, 200, 290),
+}
+
+
+def load_samples(assets_dir='assets'):
+    """ROI'si bilinen örnek görüntüleri gri tonlamalı ROI olarak yükler."""
+    samples = []
+    for name in sorted(os.listdir(assets_dir)):
+        if name not in SAMPLE_ROIS:
+            continue
+        image = cv2.imread(os.path.join(assets_dir, name), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            continue
+        x1, y1, x2, y2 = SAMPLE_ROIS[name]
+        samples.append((name, image[y1:y2, x1:x2].copy()))
+    return samples
+
+
+def synthetic_stack(height, width, pitch=16, gap=3, noise=8.0, tilt=0.02, seed=0):
+    """Üst üste dizilmiş sacları taklit eden yatay çizgili gri görüntü üretir."""
+    rng = np.random.default_rng(seed)
+    y = np.arange(height, dtype=np.float32)[:, None] + tilt * np.arange(width, dtype=np.float32)[None, :]
+    phase = np.mod(y, pitch)
+
+    image = np.full((height, width), 170.0, np.float32)
+    image += 25.0 * np.sin(np.pi * phase / pitch)      # Sac yüzeyindeki parlaklık değişimi
+    image[phase < gap] = 60.0                            # Saclar arasındaki koyu boşluk
+    image += rng.normal(0.0, noise, size=image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
@@ -0,0 +1,398 @@
+# shm_ring.py → 18.10.2026
+import argparse
+import multiprocessing
+import os
+import pickle
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Küresel başlık: [yazma sırası, okuma sırası, kapalı]
+_GLOBAL_FIELDS = 3
+# Yuva başlığı: [sıra numarası, yükseklik, genişlik, kanal, etiket, zaman damgası, sahip pid]
+_SLOT_FIELDS = 7
+_OWNER = 6
+_ALIGN = 64
+DEFAULT_SLOTS = 8
+# Süreçlerin yaşayıp yaşamadığının yoklandığı bekleme aralığı (s)
+POLL_S = 0.5
+
+
+class RingTaskError(Exception):
+    """Tüketicide handler'ın fırlattığı hata; çerçevenin sonucu yerine sonuç kuyruğundan döner."""
+
+
+def _aligned(size):
+    return (size + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class RingFrame:
+    """Tüketicinin sahiplendiği çerçeve: paylaşılan bellekteki yuvanın kopyasız görünümü.
+
+    release() çağrılana kadar üretici bu yuvaya yazamaz; görünüm (ve ondan alınan ROI görünümleri)
+    release sonrasında kullanılmamalıdır.
+    """
+
+    def __init__(self, ring, slot, seq, tag, stamp, array):
+        self.ring = ring
+        self.slot = slot
+        self.seq = seq
+        self.tag = tag
+        self.stamp = stamp
+        self.array = array
+
+    def release(self):
+        if self.array is not None:
+            self.array = None
+            self.ring._slot_free[self.slot].release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class FrameRing:
+    """multiprocessing.shared_memory üzerinde sabit boyutlu çerçeve yuvalarından oluşan halka.
+
+    Tek üretici yuvaları sıra numarasıyla sırayla doldurur; birden çok tüketici claim() ile sıradaki
+    çerçeveyi sahiplenir (her çerçeveyi tek tüketici işler). Yuva, tüketicisi bırakana kadar yeniden
+    yazılmaz, bu yüzden tüketiciler sırasız bitirebilir. Süreçlere yalnızca yuva indeksi değil
+    halkanın kendisi (süreç başlatılırken) aktarılır; çerçeve pikselleri hiç serileştirilmez.
+    """
+
+    def __init__(self, frame_shape, slots=DEFAULT_SLOTS, context=None):
+        context = context or multiprocessing.get_context('spawn')
+        self.slots = slots
+        self.slot_bytes = _aligned(int(np.prod(frame_shape)))
+        self.header_bytes = _aligned((_GLOBAL_FIELDS + slots * _SLOT_FIELDS) * 8)
+        self._shm = shared_memory.SharedMemory(create=True, size=self.header_bytes + slots * self.slot_bytes)
+        self._owner = True
+        self._claim_lock = context.Lock()
+        self._filled = context.Semaphore(0)
+        self._slot_free = [context.Semaphore(1) for _ in range(slots)]
+        self._attach_views()
+        self._header[:] = 0
+        self.dropped = 0
+
+    def _attach_views(self):
+        self._header = np.ndarray(_GLOBAL_FIELDS + self.slots * _SLOT_FIELDS, np.float64, buffer=self._shm.buf)
+        self._slot_header = self._header[_GLOBAL_FIELDS:].reshape(self.slots, _SLOT_FIELDS)
+
+    def __getstate__(self):
+        # Yalnızca süreç başlatılırken aktarılır (senkronizasyon nesneleri kalıtımla geçer)
+        return {'name': self._shm.name, 'slots': self.slots, 'slot_bytes': self.slot_bytes,
+                'header_bytes': self.header_bytes, 'claim_lock': self._claim_lock, 'filled': self._filled,
+                'slot_free': self._slot_free}
+
+    def __setstate__(self, state):
+        self.slots = state['slots']
+        self.slot_bytes = state['slot_bytes']
+        self.header_bytes = state['header_bytes']
+        self._claim_lock = state['claim_lock']
+        self._filled = state['filled']
+        self._slot_free = state['slot_free']
+        self._shm = shared_memory.SharedMemory(name=state['name'])
+        self._owner = False
+        self._attach_views()
+        self.dropped = 0
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def _slot_array(self, slot, shape):
+        return np.ndarray(shape, np.uint8, buffer=self._shm.buf, offset=self.header_bytes + slot * self.slot_bytes)
+
+    def put(self, frame, tag=0, stamp=0.0, block=True, timeout=None):
+        """Çerçeveyi sıradaki yuvaya kopyalar (yalnızca üretici çağırır).
+
+        Yuva hâlâ bir tüketicideyse block=False veya timeout dolunca çerçeve düşer ve False döner.
+        """
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Çerçeve yuvaya sığmıyor: {frame.shape} {frame.dtype}")
+        seq = int(self._header[0])
+        slot = seq % self.slots
+        if not self._slot_free[slot].acquire(block, timeout):
+            self.dropped += 1
+            return False
+        self._slot_array(slot, frame.shape)[...] = frame
+        height, width = frame.shape[:2]
+        self._slot_header[slot] = (seq, height, width, frame.shape[2] if frame.ndim == 3 else 1, tag, stamp, 0)
+        self._header[0] = seq + 1
+        self._filled.release()
+        return True
+
+    def wait_free(self, timeout=None):
+        """Sıradaki yuva boşalana kadar bekler (yalnızca üretici çağırır); zaman aşımında False."""
+        slot_free = self._slot_free[int(self._header[0]) % self.slots]
+        if not slot_free.acquire(True, timeout):
+            return False
+        slot_free.release()
+        return True
+
+    def next_owner(self):
+        """Sıradaki yuvayı en son sahiplenen tüketicinin pid'i; üretici yazdıktan sonra sahiplenilmediyse 0."""
+        return int(self._slot_header[int(self._header[0]) % self.slots, _OWNER])
+
+    def reclaim_next(self):
+        """Sıradaki yuvayı, onu tutarken sonlanan tüketiciden geri alır (yalnızca üretici çağırır).
+
+        Yuva zaten boşsa bir şey yapılmaz; True yalnızca yuva gerçekten geri alındıysa döner.
+        """
+        slot = int(self._header[0]) % self.slots
+        if self._slot_free[slot].acquire(False):
+            self._slot_free[slot].release()
+            return False
+        self._slot_header[slot, _OWNER] = 0
+        self._slot_free[slot].release()
+        return True
+
+    def claim(self, timeout=None):
+        """Sıradaki çerçeveyi sahiplenir; halka kapanıp boşaldıysa None, zaman aşımında da None."""
+        if not self._filled.acquire(True, timeout):
+            return None
+        with self._claim_lock:
+            seq = int(self._header[1])
+            if seq >= int(self._header[0]):
+                return None  # close() ile gelen bitiş sinyali
+            self._header[1] = seq + 1
+            slot = seq % self.slots
+            # Sahip kaydı, yuvayı tutarken sonlanan tüketicinin üreticide bulunabilmesi içindir
+            self._slot_header[slot, _OWNER] = os.getpid()
+        written, height, width, channels, tag, stamp, _ = self._slot_header[slot]
+        if int(written) != seq:
+            raise RuntimeError(f"Halka sırası bozuk: yuva {slot}, beklenen {seq}, bulunan {int(written)}")
+        shape = (int(height), int(width)) + ((int(channels),) if channels > 1 else ())
+        return RingFrame(self, slot, seq, int(tag), float(stamp), self._slot_array(slot, shape))
+
+    def close(self, consumers=1):
+        """Üretimi bitirir; her tüketicinin bir sonraki claim'i bekleyen çerçeveler bitince None döner."""
+        self._header[2] = 1
+        for _ in range(consumers):
+            self._filled.release()
+
+    def release(self):
+        """Bu süreçteki eşlemeyi kapatır; oluşturan süreç paylaşılan belleği de siler."""
+        self._header = self._slot_header = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _ring_consumer(ring, results, ready, handler, args):
+    """Tüketici süreç döngüsü: çerçeveyi sahiplen, handler(görünüm, *args) ile işle, sonucu gönder."""
+    ready.release()
+    try:
+        while True:
+            frame = ring.claim()
+            if frame is None:
+                break
+            try:
+                result = handler(frame.array, *args)
+            except Exception as e:
+                # Tek hatalı çerçeve tüketiciyi öldürmesin; hata sonucun yerine gönderilir
+                result = RingTaskError(f"{type(e).__name__}: {e}")
+            finally:
+                frame.release()
+            results.put((frame.tag, frame.stamp, result))
+    finally:
+        results.put(None)
+        ring.release()
+
+
+def _queue_consumer(frames, results, handler, args):
+    """Karşılaştırma için pickle tabanlı tüketici: çerçeve kuyruktan kopya olarak gelir."""
+    while True:
+        item = frames.get()
+        if item is None:
+            break
+        tag, stamp, frame = item
+        try:
+            result = handler(frame, *args)
+        except Exception as e:
+            result = RingTaskError(f"{type(e).__name__}: {e}")
+        results.put((tag, stamp, result))
+    results.put(None)
+
+
+class RingWorkers:
+    """FrameRing'i tüketen süreç havuzu; sonuçlar (etiket, zaman damgası, sonuç) olarak döner.
+
+    handler hata verirse sonuç yerine RingTaskError döner ve tüketici çalışmayı sürdürür. Bir tüketici
+    çerçeve tutarken sonlanırsa (ör. çökme) yuvası üreticide geri alınır; o çerçevenin sonucu gelmez
+    ve reclaimed artar.
+    """
+
+    def __init__(self, frame_shape, handler, args=(), processes=2, slots=DEFAULT_SLOTS):
+        context = multiprocessing.get_context('spawn')
+        self.ring = FrameRing(frame_shape, max(slots, processes + 1), context)
+        self.results = context.Queue()
+        ready = context.Semaphore(0)
+        self.processes = [context.Process(target=_ring_consumer,
+                                          args=(self.ring, self.results, ready, handler, args),
+                                          name=f'RingWorker-{index}', daemon=True)
+                          for index in range(processes)]
+        for process in self.processes:
+            process.start()
+        # İlk çerçevenin gecikmesine süreç açılışı ve içe aktarmalar eklenmesin
+        for _ in self.processes:
+            ready.acquire()
+        self._by_pid = {process.pid: process for process in self.processes}
+        self._running = len(self.processes)
+        self.reclaimed = 0
+
+    @property
+    def alive(self):
+        return any(process.is_alive() for process in self.processes)
+
+    def _reclaim_lost_slot(self):
+        # Ölen tüketicinin yuvası hiç boşalmaz; geri alınmazsa üretici o yuvada takılır veya hep düşürür
+        process = self._by_pid.get(self.ring.next_owner())
+        if process is not None and not process.is_alive() and self.ring.reclaim_next():
+            self.reclaimed += 1
+
+    def put(self, frame, tag=0, stamp=0.0, block=True, timeout=None):
+        """Çerçeveyi halkaya yazar; süresiz beklemede tüm tüketiciler sonlandıysa RuntimeError."""
+        if block and timeout is None:
+            # Süresiz beklemek yerine süreçler yoklanır
+            while not self.ring.wait_free(POLL_S):
+                if not self.alive:
+                    raise RuntimeError("Tüm tüketici süreçler sonlandı")
+                self._reclaim_lost_slot()
+        if self.ring.put(frame, tag, stamp, block, timeout):
+            return True
+        self._reclaim_lost_slot()
+        return False
+
+    def close(self):
+        """Üretimi bitirir; kalan sonuçlar get_result ile alınabilir."""
+        self.ring.close(len(self.processes))
+
+    def get_result(self, timeout=None):
+        """Sıradaki sonucu döndürür; tüm tüketiciler bitince (veya beklenmedik şekilde sonlanınca) None."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        exhausted = False
+        while self._running:
+            wait = POLL_S if deadline is None else max(0.0, min(POLL_S, deadline - time.monotonic()))
+            try:
+                item = self.results.get(timeout=wait)
+            except queue.Empty:
+                if not self.alive:
+                    # Bitiş işaretini gönderemeden sonlanan süreçler: son bir boşaltmadan sonra bitir
+                    if exhausted:
+                        self._running = 0
+                        break
+                    exhausted = True
+                elif deadline is not None and time.monotonic() >= deadline:
+                    raise
+                continue
+            if item is not None:
+                return item
+            self._running -= 1
+        return None
+
+    def join(self):
+        for process in self.processes:
+            process.join()
+        self.ring.release()
+
+
+def roi_mean(frame, roi):
+    """Karşılaştırmada tüketici işi: ROI görünümünü okur (dokunmadan taşıma maliyeti ölçülmez)."""
+    x1, y1, x2, y2 = roi
+    return float(frame[y1:y2, x1:x2].mean())
+
+
+def _produce(put, frames, count):
+    start = time.perf_counter()
+    for index in range(count):
+        put(frames[index % len(frames)], index, time.perf_counter())
+    return time.perf_counter() - start
+
+
+def measure_transport(shape=(1080, 1920, 3), count=300, consumers=2, roi=(800, 0, 1100, 1080), slots=DEFAULT_SLOTS):
+    """Aynı tüketici işiyle pickle'lı kuyruk ve paylaşılan bellek halkasını karşılaştırır."""
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(4)]
+    context = multiprocessing.get_context('spawn')
+    report = {'shape': shape, 'frame_mb': frames[0].nbytes / 1e6, 'count': count, 'consumers': consumers,
+              'pickle_ms': _pickle_ms(frames[0])}
+
+    def collect(get_result, total):
+        for _ in range(total):
+            get_result()
+
+    # Pickle'lı kuyruk: her çerçeve serileştirilir, boruya yazılır ve tüketicide yeniden oluşturulur
+    frame_queue = context.Queue(slots)
+    results = context.Queue()
+    processes = [context.Process(target=_queue_consumer, args=(frame_queue, results, roi_mean, (roi,)), daemon=True)
+                 for _ in range(consumers)]
+    for process in processes:
+        process.start()
+    frame_queue.put((-1, time.perf_counter(), frames[0]))  # Süreçlerin ayağa kalkmasını bekle
+    results.get()
+    start = time.perf_counter()
+    produce_s = _produce(lambda frame, tag, stamp: frame_queue.put((tag, stamp, frame)), frames, count)
+    collect(results.get, count)
+    elapsed = time.perf_counter() - start
+    for _ in processes:
+        frame_queue.put(None)
+    for process in processes:
+        process.join()
+    report['queue'] = _summary(count, elapsed, produce_s)
+
+    # Paylaşılan bellek halkası: üretici yuvaya bir kez kopyalar, tüketici görünümü okur
+    workers = RingWorkers(shape, roi_mean, (roi,), consumers, slots)
+    workers.put(frames[0], -1, time.perf_counter())
+    workers.get_result()
+    start = time.perf_counter()
+    produce_s = _produce(workers.put, frames, count)
+    collect(workers.get_result, count)
+    elapsed = time.perf_counter() - start
+    workers.close()
+    while workers.get_result() is not None:
+        pass
+    workers.join()
+    report['ring'] = _summary(count, elapsed, produce_s)
+    return report
+
+
+def _pickle_ms(frame, repeats=20):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        pickle.loads(pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL))
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def _summary(count, elapsed, produce_s):
+    # Üretici sürekli dolu halkaya/kuyruğa yazar; üretici süresi taşıma maliyetiyle birlikte beklemeyi de içerir
+    return {'fps': count / elapsed, 'producer_ms': produce_s / count * 1000}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Paylaşılan bellek çerçeve halkası ile pickle'lı kuyruk karşılaştırması")
+    parser.add_argument('--shape', type=int, nargs='+', default=[1080, 1920, 3], help="Çerçeve boyutu (H W [C])")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--consumers', type=int, nargs='+', default=[1, 2, 4], help="Tüketici süreç sayıları")
+    parser.add_argument('--slots', type=int, default=DEFAULT_SLOTS, help="Halka yuva / kuyruk kapasitesi")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    shape = tuple(args.shape)
+    roi = (shape[1] * 2 // 5, 0, shape[1] * 3 // 5, shape[0])
+    for consumers in args.consumers:
+        report = measure_transport(shape, args.frames, consumers, roi, args.slots)
+        print(f"{consumers} tüketici, {report['frame_mb']:.1f} MB çerçeve (pickle gidiş-dönüş {report['pickle_ms']:.2f} ms):")
+        for mode, label in (('queue', 'pickle kuyruk'), ('ring', 'paylaşılan halka')):
+            row = report[mode]
+            print(f"  {label:<16} {row['fps']:8.1f} çerçeve/s  üretici {row['producer_ms']:6.2f} ms/çerçeve")
+
+
+if __name__ == "__main__":
+    main()
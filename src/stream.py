@@ -0,0 +1,493 @@
+# stream.py → 18.10.2026
+import argparse
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from core import count_edges_multiline, count_vertical_edges
+from pipeline import PROFILES, BufferPool, get_pipeline
+from shm_ring import RingTaskError, RingWorkers
+from strip import count_strip
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+BLOCK = 'block'
+QUEUE_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+# keep_images ile tampon havuzunda dönüşümlü kullanılan tampon takımı sayısı
+POOL_GENERATIONS = 4
+
+
+class FrameQueue:
+    """Yakalama ile işleme arasında, dolunca seçilen politikaya göre davranan sınırlı kuyruk"""
+
+    def __init__(self, maxsize=4, policy=DROP_OLDEST):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Geçersiz kuyruk politikası: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._items = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        """Öğeyi ekler; politika gereği atılan çerçeve olursa dropped sayacı artar."""
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.policy == DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self._items) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Sıradaki öğeyi döndürür; kuyruk kapanıp boşaldığında None döner."""
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._items and not self._closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class StreamStats:
+    """Sürekli FPS, çerçeve başına gecikme ve düşen çerçeve sayaçları"""
+
+    def __init__(self, window=300):
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self.started_at = None
+        self.finished_at = None
+        self.latencies_ms = deque(maxlen=window)
+        self.process_ms = deque(maxlen=window)
+        self._done_times = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    def record(self, latency_ms, process_ms):
+        with self._lock:
+            self.processed += 1
+            self.latencies_ms.append(latency_ms)
+            self.process_ms.append(process_ms)
+            self._done_times.append(time.perf_counter())
+
+    def record_error(self, error):
+        with self._lock:
+            self.errors += 1
+            self.last_error = str(error)
+
+    def snapshot(self):
+        """Anlık istatistikleri sözlük olarak döndürür."""
+        with self._lock:
+            end = self.finished_at or time.perf_counter()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            latencies = np.array(self.latencies_ms) if self.latencies_ms else None
+            done_times = list(self._done_times)
+            process_ms = list(self.process_ms)
+            processed = self.processed
+
+        recent_fps = 0.0
+        if len(done_times) > 1 and done_times[-1] > done_times[0]:
+            recent_fps = (len(done_times) - 1) / (done_times[-1] - done_times[0])
+        return {
+            'captured': self.captured,
+            'processed': processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'elapsed_s': elapsed,
+            'fps': processed / elapsed if elapsed > 0 else 0.0,
+            'recent_fps': recent_fps,
+            'latency_ms_mean': float(latencies.mean()) if latencies is not None else None,
+            'latency_ms_p50': float(np.percentile(latencies, 50)) if latencies is not None else None,
+            'latency_ms_p95': float(np.percentile(latencies, 95)) if latencies is not None else None,
+            'latency_ms_max': float(latencies.max()) if latencies is not None else None,
+            'process_ms_mean': float(np.mean(process_ms)) if process_ms else None,
+        }
+
+
+def count_gray(gray, pipeline, scanlines=None, aggregate='median', strip=False, pool=None, timings=None):
+    """Gri ROI'de zinciri çalıştırıp sayar; (sayım, uyum, işlenmiş, kenarlar) döndürür (strip'te görüntü yok)."""
+    if strip:
+        # Şerit modunda kenarlar yalnızca tarama sütunları çevresinde hesaplanır
+        counted = count_strip(gray, pipeline, scanlines, aggregate, timings=timings)
+        return counted['count'], counted['agreement'], None, None
+    if pool is not None:
+        processed, edges = pipeline.detect_edges_pooled(gray, pool, timings)
+    else:
+        processed, edges = pipeline.detect_edges(gray, timings)
+    start = time.perf_counter()
+    if scanlines is None:
+        edge_count, agreement = count_vertical_edges(edges), None
+    else:
+        multiline = count_edges_multiline(edges, scanlines or None, aggregate)
+        edge_count, agreement = multiline['count'], multiline['agreement']
+    if timings is not None:
+        timings['count'] = time.perf_counter() - start
+    return edge_count, agreement, processed, edges
+
+
+def count_ring_frame(frame, roi_coordinates, params, profile, scanlines, aggregate, strip):
+    """Süreç modunda tüketici işi: paylaşılan bellekteki çerçevenin ROI görünümünü kopyalamadan sayar."""
+    start = time.perf_counter()
+    roi = frame
+    if roi_coordinates is not None:
+        x1, y1, x2, y2 = roi_coordinates
+        roi = frame[y1:y2, x1:x2]
+    # Gri dönüşüm paylaşılan bellekten okuyup sürecin kendi belleğine yazar; sonrası yereldir
+    gray = roi if roi.ndim == 2 else cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    timings = {}
+    edge_count, agreement, _, _ = count_gray(gray, get_pipeline(params, profile), scanlines, aggregate, strip,
+                                             timings=timings)
+    return {'edge_count': int(edge_count), 'agreement': agreement, 'roi_size': (gray.shape[1], gray.shape[0]),
+            'process_ms': (time.perf_counter() - start) * 1000, 'timings': timings}
+
+
+def capture_frame_shape(capture):
+    """VideoCapture'ın çerçeve boyutunu (H, W, 3) döndürür; özellik okunamazsa None."""
+    width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    return (height, width, 3) if width > 0 and height > 0 else None
+
+
+def validate_roi(roi_coordinates, frame_shape):
+    """ROI'nin boş olmadığını ve çerçevenin içinde kaldığını doğrular; aksi halde ValueError."""
+    x1, y1, x2, y2 = roi_coordinates
+    height, width = frame_shape[:2]
+    if not (0 <= x1 < x2 <= width and 0 <= y1 < y2 <= height):
+        raise ValueError(f"ROI {tuple(roi_coordinates)} çerçevenin ({width}x{height}) dışında")
+
+
+def open_capture(source):
+    """Kamera indeksi (ör. '0') veya video dosyası/URL için VideoCapture açar."""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise ValueError(f"Video kaynağı açılamadı: {source}")
+    return capture
+
+
+class FrameStream:
+    """Video dosyası veya kameradan gelen çerçevelere sabit ROI ile dedektör zincirini uygular.
+
+    Yakalama ve işleme ayrı iş parçacıklarında çalışır; aradaki sınırlı kuyruk dolduğunda
+    drop_oldest, drop_newest veya block politikası uygulanır.
+
+    processes verilirse çerçeveler paylaşılan bellek halkasıyla (shm_ring) o kadar süreçte sayılır;
+    halka doluysa block dışındaki politikalarda yeni çerçeve düşer. Bu modda görüntü döndürülmez
+    (keep_images) ve tampon havuzu kullanılmaz.
+
+    pooled ve keep_images birlikteyse sonuçtaki görüntüler havuz tamponlarıdır; başka bir iş
+    parçacığında kullanılacaksa on_result içinde kopyalanmalıdır (işleme iş parçacığı bekletilmez).
+
+    Bir çerçevenin işlenmesi hata verirse çerçeve atlanır, akış sürer; hata stats'a yazılır ve
+    on_error(çerçeve_indeksi, hata) işleme iş parçacığında çağrılır.
+    """
+
+    def __init__(self, source, roi_coordinates=None, params=None, queue_size=4, policy=DROP_OLDEST,
+                 on_result=None, realtime=False, keep_images=False, max_frames=None,
+                 scanlines=None, aggregate='median', profile=None, strip=False, pooled=False, processes=None,
+                 on_error=None):
+        if processes and keep_images:
+            raise ValueError("Süreç modunda görüntüler döndürülemez (keep_images)")
+        self.source = source
+        self.roi_coordinates = roi_coordinates
+        self.params = params
+        self.profile = profile
+        self.pipeline = get_pipeline(params, profile)
+        self.queue = FrameQueue(queue_size, policy)
+        self.on_result = on_result
+        self.on_error = on_error
+        self.realtime = realtime
+        self.keep_images = keep_images
+        self.max_frames = max_frames
+        self.scanlines = scanlines
+        self.aggregate = aggregate
+        self.strip = strip
+        # Tampon havuzu: sabit ROI boyutunda adımlar her karede aynı tamponlara yazar.
+        # keep_images ile sonuçtaki görüntüler birkaç kare boyunca üzerine yazılmadan kalır.
+        self.pool = BufferPool(generations=POOL_GENERATIONS if keep_images else 1) if pooled else None
+        self.processes = processes
+        self.workers = None
+        self.stats = StreamStats()
+
+        self._stop_event = threading.Event()
+        self._capture_thread = None
+        self._process_thread = None
+
+    @property
+    def running(self):
+        return self._process_thread is not None and self._process_thread.is_alive()
+
+    def start(self):
+        """Yakalama ve işleme iş parçacıklarını başlatır."""
+        capture = open_capture(self.source)
+        shape = capture_frame_shape(capture)
+        try:
+            # Sabit görüntüde seçilen ROI daha küçük kamera çerçevesine uymayabilir
+            if self.roi_coordinates is not None and shape is not None:
+                validate_roi(self.roi_coordinates, shape)
+            if self.processes and shape is None:
+                raise ValueError(f"Çerçeve boyutu okunamadı: {self.source}")
+        except ValueError:
+            capture.release()
+            raise
+        if self.processes:
+            self.workers = RingWorkers(shape, count_ring_frame,
+                                       (self.roi_coordinates, self.params, self.profile, self.scanlines,
+                                        self.aggregate, self.strip),
+                                       self.processes, self.queue.maxsize + self.processes)
+        self.stats.start()
+        self._capture_thread = threading.Thread(target=self._capture_loop, args=(capture,),
+                                                name='FrameCapture', daemon=True)
+        self._process_thread = threading.Thread(target=self._process_loop, name='FrameProcess', daemon=True)
+        self._capture_thread.start()
+        self._process_thread.start()
+        return self
+
+    def stop(self):
+        """Akışı durdurur."""
+        self._stop_event.set()
+        self.queue.close()
+
+    def join(self, timeout=None):
+        for thread in (self._capture_thread, self._process_thread):
+            if thread is not None:
+                thread.join(timeout)
+
+    def wait(self, timeout=None):
+        """İşleme bitene veya timeout dolana kadar bekler; akış sürüyorsa True döndürür."""
+        if self._process_thread is not None:
+            self._process_thread.join(timeout)
+        return self.running
+
+    def run(self):
+        """Akışı başlatır ve kaynak bitene (veya stop çağrılana) kadar bekler."""
+        self.start()
+        try:
+            while self.wait(0.2):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+        self.join()
+        return self.stats.snapshot()
+
+    def _capture_loop(self, capture):
+        frame_interval = 0.0
+        if self.realtime:
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            frame_interval = 1.0 / fps if fps and fps > 0 else 0.0
+        next_frame_at = time.perf_counter()
+        frame_index = 0
+
+        try:
+            while not self._stop_event.is_set():
+                if self.max_frames is not None and frame_index >= self.max_frames:
+                    break
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                captured_at = time.perf_counter()
+                self.stats.captured += 1
+                if self.workers is not None:
+                    self.workers.put(frame, frame_index, captured_at, block=self.queue.policy == BLOCK)
+                    self.stats.dropped = self.workers.ring.dropped
+                else:
+                    self.queue.put((frame_index, captured_at, frame))
+                    self.stats.dropped = self.queue.dropped
+                frame_index += 1
+
+                # Dosya kaynaklarında kameranın hızını taklit et
+                if frame_interval:
+                    next_frame_at += frame_interval
+                    delay = next_frame_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            capture.release()
+            self.queue.close()
+            if self.workers is not None:
+                self.workers.close()
+
+    def _process_loop(self):
+        try:
+            if self.workers is not None:
+                self._collect_results()
+            else:
+                self._process_frames()
+        finally:
+            self.stats.finish()
+            self._stop_event.set()
+            self.queue.close()
+
+    def _process_frames(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            frame_index, captured_at, frame = item
+            try:
+                self._process_frame(frame_index, captured_at, frame)
+            except Exception as e:
+                self._report_error(frame_index, e)
+
+    def _report_error(self, frame_index, error):
+        self.stats.record_error(error)
+        if self.on_error is not None:
+            self.on_error(frame_index, error)
+
+    def _process_frame(self, frame_index, captured_at, frame):
+        start = time.perf_counter()
+
+        roi = frame
+        if self.roi_coordinates is not None:
+            x1, y1, x2, y2 = self.roi_coordinates
+            roi = frame[y1:y2, x1:x2]
+        if self.pool is not None:
+            self.pool.next_frame()
+        if roi.ndim == 2:
+            gray = roi
+        elif self.pool is not None:
+            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=self.pool.get('gray', roi.shape[:2]))
+        else:
+            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        timings = {}
+        edge_count, agreement, processed, edges = count_gray(gray, self.pipeline, self.scanlines, self.aggregate,
+                                                             self.strip, self.pool, timings)
+
+        done = time.perf_counter()
+        latency_ms = (done - captured_at) * 1000
+        process_ms = (done - start) * 1000
+        self.stats.record(latency_ms, process_ms)
+
+        if self.on_result is not None:
+            result = {
+                'frame_index': frame_index,
+                'edge_count': edge_count,
+                'agreement': agreement,
+                'roi_size': (gray.shape[1], gray.shape[0]),
+                'latency_ms': latency_ms,
+                'process_ms': process_ms,
+                'timings': timings,
+            }
+            if self.keep_images:
+                result['processed_image'] = processed
+                result['edges'] = edges
+            self.on_result(result)
+
+    def _collect_results(self):
+        # Süreç modunda işleme iş parçacığı yalnızca sonuçları toplar; sıra süreçlere göre karışabilir
+        try:
+            while True:
+                item = self.workers.get_result()
+                if item is None:
+                    break
+                frame_index, captured_at, result = item
+                if isinstance(result, RingTaskError):
+                    self._report_error(frame_index, result)
+                    continue
+                latency_ms = (time.perf_counter() - captured_at) * 1000
+                self.stats.record(latency_ms, result['process_ms'])
+                if self.on_result is not None:
+                    self.on_result(dict(result, frame_index=frame_index, latency_ms=latency_ms))
+        finally:
+            self.workers.join()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Video/kamera akışında kenar sayımı")
+    parser.add_argument('source', help="Video dosyası, URL veya kamera indeksi (ör. 0)")
+    parser.add_argument('--roi', type=int, nargs=4, metavar=('X1', 'Y1', 'X2', 'Y2'),
+                        help="Sabit ROI koordinatları; verilmezse tüm çerçeve işlenir")
+    parser.add_argument('--queue-size', type=int, default=4, help="Yakalama kuyruğu kapasitesi")
+    parser.add_argument('--policy', choices=QUEUE_POLICIES, default=DROP_OLDEST,
+                        help="Kuyruk dolunca uygulanacak politika")
+    parser.add_argument('--realtime', action='store_true',
+                        help="Video dosyasını kendi FPS değerinde oku (kamera hızını taklit eder)")
+    parser.add_argument('--max-frames', type=int, default=None)
+    parser.add_argument('--scanlines', type=int, default=None,
+                        help="Çoklu tarama çizgisi sayısı (0: tüm sütunlar); verilmezse orta sütun")
+    parser.add_argument('--aggregate', choices=('median', 'mode'), default='median')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=None,
+                        help="Filtre profili (varsayılan: accurate)")
+    parser.add_argument('--strip', action='store_true',
+                        help="Yalnızca tarama sütunlarının çevresindeki şeridi işle")
+    parser.add_argument('--pooled', action='store_true',
+                        help="Adım çıktılarını her karede aynı önceden ayrılmış tamponlara yaz")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="Çerçeveleri paylaşılan bellek halkasıyla bu kadar süreçte say")
+    parser.add_argument('--report-every', type=float, default=2.0, help="İstatistik yazdırma aralığı (s)")
+    return parser.parse_args(argv)
+
+
+def format_stats(stats):
+    latency = stats['latency_ms_p50']
+    latency_text = (f"gecikme p50 {latency:.1f} ms / p95 {stats['latency_ms_p95']:.1f} ms"
+                    if latency is not None else "gecikme -")
+    errors = f", {stats['errors']} hata (son: {stats['last_error']})" if stats['errors'] else ''
+    return (f"{stats['processed']}/{stats['captured']} çerçeve, {stats['dropped']} düşen, "
+            f"{stats['fps']:.2f} FPS, {latency_text}{errors}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    last_count = {'value': None}
+
+    def on_result(result):
+        last_count['value'] = result['edge_count']
+
+    stream = FrameStream(args.source, tuple(args.roi) if args.roi else None,
+                         queue_size=args.queue_size, policy=args.policy, on_result=on_result,
+                         realtime=args.realtime, max_frames=args.max_frames,
+                         scanlines=args.scanlines, aggregate=args.aggregate, profile=args.profile,
+                         strip=args.strip, pooled=args.pooled, processes=args.processes)
+    stream.start()
+    try:
+        while stream.wait(args.report_every):
+            print(f"Son sayım: {last_count['value']} | {format_stats(stream.stats.snapshot())}")
+    except KeyboardInterrupt:
+        stream.stop()
+    stream.join()
+    print(f"Son sayım: {last_count['value']} | {format_stats(stream.stats.snapshot())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# strip.py → 18.10.2026
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from core import aggregate_scanlines, count_edges_multiline, count_vertical_edges, scanline_columns
+from pipeline import get_pipeline
+from samples import load_samples, synthetic_stack
+
+# Canny histerezisi yerel değildir; belirsiz bileşen kalırsa şerit bu paydan başlayıp genişletilir
+DEFAULT_MARGIN = 16
+# Tahmini şerit genişliği ROI genişliğinin bu oranını aşarsa tam ROI işlenir
+FULL_ROI_RATIO = 0.5
+
+
+def _reflect_101(index, size):
+    """BORDER_REFLECT_101 ile görüntü dışına taşan indeksleri geri yansıtır."""
+    return np.where(index >= size, 2 * (size - 1) - index, index)
+
+
+def clahe_tile_size(shape, tile_grid_size=(8, 8)):
+    """OpenCV CLAHE'nin kullandığı karo boyutunu (genişlik, yükseklik) hesaplar.
+
+    Boyutlar karo sayısına tam bölünmüyorsa OpenCV görüntüyü sağdan ve alttan
+    (tiles - boyut % tiles) kadar yansıtarak büyütür; tam bölünen eksen de bu durumda büyür.
+    """
+    height, width = shape
+    tiles_x, tiles_y = tile_grid_size
+    if width % tiles_x == 0 and height % tiles_y == 0:
+        return width // tiles_x, height // tiles_y
+    return (width + tiles_x - width % tiles_x) // tiles_x, (height + tiles_y - height % tiles_y) // tiles_y
+
+
+def clahe_luts(hist, tile_area, clip_limit):
+    """Karo histogramlarından (karo x 256) OpenCV ile aynı kırpılmış eşitleme LUT'larını üretir."""
+    hist = hist.astype(np.int64)
+    if clip_limit > 0:
+        clip = max(int(clip_limit * tile_area / 256), 1)
+        for row in hist:
+            over = row > clip
+            clipped = int((row[over] - clip).sum())
+            row[over] = clip
+            # Kırpılan pikseller önce eşit, kalanı residual_step aralıkla dağıtılır
+            batch, residual = divmod(clipped, 256)
+            row += batch
+            if residual:
+                row[0:256:max(256 // residual, 1)][:residual] += 1
+
+    lut_scale = np.float32(255.0 / tile_area)
+    return np.clip(np.rint(np.cumsum(hist, axis=1).astype(np.float32) * lut_scale), 0, 255)
+
+
+def _tile_histogram(gray, y0, x0, tile_h, tile_w):
+    height, width = gray.shape
+    if y0 + tile_h <= height and x0 + tile_w <= width:
+        tile = gray[y0:y0 + tile_h, x0:x0 + tile_w]
+    else:
+        # Sağ/alt kenardaki karolar OpenCV gibi yansıtılarak tamamlanır
+        rows = _reflect_101(np.arange(y0, y0 + tile_h), height)
+        cols = _reflect_101(np.arange(x0, x0 + tile_w), width)
+        tile = gray[np.ix_(rows, cols)]
+    return cv2.calcHist([tile], [0], None, [256], [0, 256]).ravel()
+
+
+def clahe_columns(gray, x0, x1, clip_limit=2.0, tile_grid_size=(8, 8)):
+    """Tam görüntüye uygulanan OpenCV CLAHE'nin [x0, x1) sütunlarını birebir aynı hesaplar.
+
+    Yalnızca bu sütunların enterpolasyonunda kullanılan karo sütunlarının histogramı çıkarılır.
+    """
+    height, width = gray.shape
+    tiles_x, tiles_y = tile_grid_size
+    tile_w, tile_h = clahe_tile_size(gray.shape, tile_grid_size)
+
+    # Sütun enterpolasyon ağırlıkları (OpenCV ile aynı float32 aritmetiği)
+    txf = np.arange(x0, x1).astype(np.float32) * (np.float32(1.0) / np.float32(tile_w)) - np.float32(0.5)
+    tx1 = np.floor(txf).astype(np.int32)
+    xa = txf - tx1.astype(np.float32)
+    tx2 = np.minimum(tx1 + 1, tiles_x - 1)
+    tx1 = np.maximum(tx1, 0)
+    first, last = int(tx1.min()), int(tx2.max())
+    used = last - first + 1
+
+    hist = np.array([_tile_histogram(gray, ty * tile_h, tx * tile_w, tile_h, tile_w)
+                     for ty in range(tiles_y) for tx in range(first, last + 1)])
+    lut = clahe_luts(hist, tile_w * tile_h, clip_limit).ravel()
+
+    tyf = np.arange(height).astype(np.float32) * (np.float32(1.0) / np.float32(tile_h)) - np.float32(0.5)
+    ty1 = np.floor(tyf).astype(np.int32)
+    ya = (tyf - ty1.astype(np.float32))[:, None]
+    row1 = (np.maximum(ty1, 0) * used * 256)[:, None]
+    row2 = (np.minimum(ty1 + 1, tiles_y - 1) * used * 256)[:, None]
+
+    # LUT'taki düz indeksler: (karo satırı, karo sütunu, gri değer)
+    values = gray[:, x0:x1].astype(np.int32)
+    col1 = values + ((tx1 - first) * 256)[None, :]
+    col2 = values + ((tx2 - first) * 256)[None, :]
+    xa = xa[None, :]
+    xa1 = np.float32(1.0) - xa
+    top = lut.take(row1 + col1) * xa1 + lut.take(row1 + col2) * xa
+    bottom = lut.take(row2 + col1) * xa1 + lut.take(row2 + col2) * xa
+    result = top * (np.float32(1.0) - ya) + bottom * ya
+    return np.clip(np.rint(result), 0, 255).astype(np.uint8)
+
+
+def strip_edges(gray, pipeline, x_min, x_max, margin=DEFAULT_MARGIN, timings=None):
+    """[x_min, x_max] sütunlarını içeren dikey şeritte tam ROI ile aynı Canny kenarlarını üretir.
+
+    Şerit her adımın yarıçapı kadar halo ile hesaplanır. Canny histerezisi şerit dışına
+    uzanabildiğinden, tarama sütununa değen ve kesin bölgenin kenarına dayanan güçlü pikselsiz
+    bir aday bileşen kalırsa şerit iki kat payla yeniden hesaplanır.
+    Dönen sözlük: edges (şerit), x0 (şeridin ROI içindeki başlangıcı), attempts.
+    """
+    if pipeline.scale != 1.0:
+        raise ValueError("Şerit modu ölçekleme (resize) içeren profillerle kullanılamaz")
+
+    width = gray.shape[1]
+    halo = pipeline.filter_halo + pipeline.stage_radius['canny']
+    attempts = 0
+    while True:
+        attempts += 1
+        x0 = max(x_min - halo - margin, 0)
+        x1 = min(x_max + 1 + halo + margin, width)
+
+        start = time.perf_counter()
+        image = clahe_columns(gray, x0, x1, pipeline.clahe_clip_limit, pipeline.clahe_tile_grid_size)
+        if timings is not None:
+            timings['clahe'] = timings.get('clahe', 0.0) + time.perf_counter() - start
+        processed = pipeline.apply_after('clahe', image, timings)
+
+        start = time.perf_counter()
+        edges = cv2.Canny(processed, pipeline.canny_low, pipeline.canny_high)
+        if x0 == 0 and x1 == width:
+            exact = True
+        else:
+            exact = _hysteresis_is_local(processed, pipeline, x0, x1, width, halo, x_min, x_max)
+        if timings is not None:
+            timings['canny'] = timings.get('canny', 0.0) + time.perf_counter() - start
+
+        if exact:
+            return {'edges': edges, 'x0': x0, 'attempts': attempts}
+        margin = max(2 * margin, halo)
+
+
+def _hysteresis_is_local(processed, pipeline, x0, x1, width, halo, x_min, x_max):
+    """Tarama sütunlarındaki kenar kararlarının şerit dışına bağlı olup olmadığını denetler."""
+    # Kesin bölge: halo payları çıkarıldıktan sonra tam ROI ile aynı aday/güçlü piksel maskesi
+    left = 0 if x0 == 0 else halo
+    right = processed.shape[1] - (0 if x1 == width else halo)
+    candidates = cv2.Canny(processed, pipeline.canny_low, pipeline.canny_low)[:, left:right]
+    strong = cv2.Canny(processed, pipeline.canny_high, pipeline.canny_high)[:, left:right]
+
+    _, labels = cv2.connectedComponents(candidates, connectivity=8)
+    scan = labels[:, x_min - x0 - left:x_max - x0 - left + 1]
+    read = np.unique(scan[scan > 0])
+    if read.size == 0:
+        return True
+
+    border = []
+    if x0 > 0:
+        border.append(labels[:, 0])
+    if x1 < width:
+        border.append(labels[:, -1])
+    touching = np.intersect1d(read, np.unique(np.concatenate(border)))
+    if touching.size == 0:
+        return True
+    anchored = np.unique(labels[strong > 0])
+    return bool(np.isin(touching, anchored).all())
+
+
+def _column_groups(columns, reach):
+    """Birbirine reach'ten yakın tarama sütunlarını ortak şeritlerde toplar."""
+    groups = [[int(columns[0])]]
+    for column in columns[1:]:
+        if column - groups[-1][-1] <= 2 * reach:
+            groups[-1].append(int(column))
+        else:
+            groups.append([int(column)])
+    return groups
+
+
+def count_strip(gray, pipeline=None, scanlines=None, aggregate='median', margin=DEFAULT_MARGIN,
+                timings=None):
+    """Yalnızca tarama sütunlarının çevresindeki şeritleri işleyerek tam ROI ile aynı sayımı verir.
+
+    scanlines None ise orta sütun (count_vertical_edges), aksi halde çoklu tarama
+    (0: tüm sütunlar) kullanılır. Yakın sütunlar tek şeritte birleştirilir; dar ROI'lerde ve
+    ölçekleme içeren profillerde tam ROI yoluna düşülür.
+    """
+    pipeline = pipeline or get_pipeline()
+    width = gray.shape[1]
+    line_x = width // 2
+    columns = np.array([line_x]) if scanlines is None else scanline_columns(width, scanlines or None)
+
+    reach = pipeline.filter_halo + pipeline.stage_radius['canny'] + margin
+    groups = _column_groups(columns, reach)
+    estimated = sum(min(group[-1] + reach + 1, width) - max(group[0] - reach, 0) for group in groups)
+
+    result = {'strip_width': 0, 'attempts': 0, 'agreement': None}
+    if estimated > width * FULL_ROI_RATIO or pipeline.scale != 1.0:
+        # Şeritler ROI'nin çoğunu kaplıyorsa tam ROI yolu daha ucuzdur (sonuç aynı)
+        _, edges = pipeline.detect_edges(gray, timings)
+        binary = edges[:, columns] > 0
+        result['strip_width'] = width
+    else:
+        binary = np.zeros((gray.shape[0], len(columns)), bool)
+        index = 0
+        for group in groups:
+            strip = strip_edges(gray, pipeline, group[0], group[-1], margin, timings)
+            edges = strip['edges']
+            binary[:, index:index + len(group)] = edges[:, np.array(group) - strip['x0']] > 0
+            index += len(group)
+            result['strip_width'] += edges.shape[1]
+            result['attempts'] += strip['attempts']
+
+    if scanlines is None:
+        result['count'] = count_vertical_edges(binary, 0)
+    else:
+        multiline = aggregate_scanlines(binary, columns, aggregate)
+        result['count'] = multiline['count']
+        result['agreement'] = multiline['agreement']
+    return result
+
+
+def verify_clahe(cases=200, seed=0, images=()):
+    """clahe_columns çıktısını rastgele boyut, karo ızgarası, kırpma ve şeritlerde cv2 CLAHE ile karşılaştırır.
+
+    Farklı çıkan durumların listesini döndürür (boş liste: birebir eşleşme).
+    """
+    rng = np.random.default_rng(seed)
+    failures = []
+    for case in range(cases):
+        if images and case % 2 == 0:
+            source = images[case // 2 % len(images)]
+            height = int(rng.integers(8, source.shape[0] + 1))
+            width = int(rng.integers(8, source.shape[1] + 1))
+            y = int(rng.integers(0, source.shape[0] - height + 1))
+            x = int(rng.integers(0, source.shape[1] - width + 1))
+            gray = source[y:y + height, x:x + width]
+        else:
+            height, width = int(rng.integers(8, 400)), int(rng.integers(8, 400))
+            gray = rng.integers(0, 256, (height, width), dtype=np.uint8)
+            if case % 4 == 1:
+                gray = (gray // 8 + 100).astype(np.uint8)  # Dar histogram: kırpma devreye girer
+
+        clip_limit = float(rng.choice([0.0, 1.0, 2.0, 4.0, 40.0]))
+        grid = (int(rng.integers(1, 12)), int(rng.integers(1, 12)))
+        x0 = int(rng.integers(0, width))
+        x1 = int(rng.integers(x0 + 1, width + 1))
+
+        expected = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=grid).apply(gray)[:, x0:x1]
+        actual = clahe_columns(gray, x0, x1, clip_limit, grid)
+        if not np.array_equal(actual, expected):
+            failures.append({'shape': gray.shape, 'clip_limit': clip_limit, 'grid': grid, 'columns': (x0, x1),
+                             'max_diff': int(np.abs(actual.astype(int) - expected).max())})
+    return failures
+
+
+def verify_counts(images, pipeline=None, scanlines=(None, 0, 5)):
+    """Şerit sayımını tam ROI sayımıyla karşılaştırır; farklı çıkanları döndürür."""
+    pipeline = pipeline or get_pipeline()
+    failures = []
+    for name, gray in images:
+        _, edges = pipeline.detect_edges(gray)
+        for lines in scanlines:
+            if lines is None:
+                expected = count_vertical_edges(edges)
+            else:
+                expected = count_edges_multiline(edges, lines or None)['count']
+            actual = count_strip(gray, pipeline, lines)['count']
+            if actual != expected:
+                failures.append({'image': name, 'scanlines': lines, 'expected': expected, 'actual': actual})
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Şerit modunun tam ROI ile eşdeğerlik denetimi ve hız ölçümü")
+    parser.add_argument('--assets', default='assets', help="Örnek görüntü klasörü")
+    parser.add_argument('--cases', type=int, default=200, help="Rastgele CLAHE karşılaştırma sayısı")
+    parser.add_argument('--repeats', type=int, default=10, help="Hız ölçümü tekrar sayısı")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = load_samples(args.assets) if os.path.isdir(args.assets) else []
+    full_images = []
+    if os.path.isdir(args.assets):
+        for name in sorted(os.listdir(args.assets)):
+            image = cv2.imread(os.path.join(args.assets, name), cv2.IMREAD_GRAYSCALE)
+            if image is not None:
+                full_images.append(image)
+
+    failures = verify_clahe(args.cases, images=full_images)
+    print(f"CLAHE eşdeğerliği: {args.cases - len(failures)}/{args.cases} birebir")
+    for failure in failures:
+        print(f"  FARKLI: {failure}")
+
+    wide = [(f"synthetic_{h}x{w}", synthetic_stack(h, w)) for h, w in ((1024, 512), (1024, 2048))]
+    count_failures = verify_counts(samples + wide)
+    print(f"Sayım eşdeğerliği: {len(count_failures)} fark")
+    for failure in count_failures:
+        print(f"  FARKLI: {failure}")
+
+    pipeline = get_pipeline()
+    for name, gray in samples + wide:
+        full, strip = [], []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            _, edges = pipeline.detect_edges(gray)
+            count_vertical_edges(edges)
+            full.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            result = count_strip(gray, pipeline)
+            strip.append(time.perf_counter() - start)
+        full_ms, strip_ms = np.median(full) * 1000, np.median(strip) * 1000
+        print(f"  {name:<22} {gray.shape[1]:>5} px genişlik: tam {full_ms:8.2f} ms, şerit {strip_ms:7.2f} ms "
+              f"({result['strip_width']} px, x{full_ms / strip_ms:.1f})")
+
+    if failures or count_failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+# sweep.py → 18.10.2026
+import argparse
+import ast
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from core import count_edges_multiline, count_vertical_edges
+from pipeline import PROFILES, freeze_params, get_pipeline, resolve_params
+from samples import SAMPLE_ROIS
+
+# Ön işleme (CLAHE/blur/bilateral) grupları; bu gruplarda aynı olan adaylar ortak çıktıyı paylaşır
+PREFIX_GROUPS = ('resize', 'clahe', 'blur', 'bilateral')
+FILTER_GROUPS = PREFIX_GROUPS + ('gabor', 'morphological')
+
+# Varsayılan arama uzayı: Gabor ve Canny parametreleri mevcut değerlerin çevresinde
+DEFAULT_SPACE = {
+    'gabor.theta': [np.pi / 2 - 0.1, np.pi / 2, np.pi / 2 + 0.1],
+    'gabor.lambd': [8.0, 10.0, 12.0],
+    'gabor.sigma': [4.7, 5.7, 6.7],
+    'gabor.ksize': [8, 10, 12],
+    'canny.low': [30, 50, 70],
+    'canny.high': [120, 150, 180],
+}
+
+_worker_images = []
+
+
+def load_labels(path=None, assets_dir='assets', reference_profile='accurate'):
+    """Sayımı bilinen (ad, gri ROI, beklenen sayım) örneklerini yükler.
+
+    path verilirse JSON dosyası {"görüntü": {"roi": [x1, y1, x2, y2], "count": N}} biçimindedir
+    (yollar dosyanın klasörüne göredir). Verilmezse ROI'si bilinen örnek görüntüler
+    reference_profile ile sayılır; bu durumda arama o profile en yakın yapılandırmayı bulur.
+    """
+    samples = []
+    if path is not None:
+        with open(path, encoding='utf-8') as f:
+            labels = json.load(f)
+        base = os.path.dirname(os.path.abspath(path))
+        for name, label in labels.items():
+            gray = cv2.imread(os.path.join(base, name), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                raise ValueError(f"Görüntü yüklenemedi: {name}")
+            if label.get('roi'):
+                x1, y1, x2, y2 = label['roi']
+                gray = gray[y1:y2, x1:x2].copy()
+            samples.append((name, gray, int(label['count'])))
+        return samples
+
+    pipeline = get_pipeline(profile=reference_profile)
+    for name in sorted(os.listdir(assets_dir)):
+        if name not in SAMPLE_ROIS:
+            continue
+        gray = cv2.imread(os.path.join(assets_dir, name), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            continue
+        x1, y1, x2, y2 = SAMPLE_ROIS[name]
+        gray = gray[y1:y2, x1:x2].copy()
+        _, edges = pipeline.detect_edges(gray)
+        samples.append((name, gray, count_vertical_edges(edges)))
+    return samples
+
+
+def parse_space(items):
+    """'grup.ad=d1,d2,...' ifadelerini arama uzayı sözlüğüne çevirir."""
+    space = {}
+    for item in items:
+        key, _, values = item.partition('=')
+        if '.' not in key or not values:
+            raise ValueError(f"Geçersiz arama ifadesi: {item} (ör. gabor.lambd=8,10,12)")
+        space[key] = [ast.literal_eval(value) for value in values.split(',')]
+    return space
+
+
+def make_candidate(base_params, assignment):
+    """Temel parametrelere bir atamayı ({'grup.ad': değer}) uygulayıp çözümlenmiş parametreleri döndürür."""
+    params = dict(base_params)
+    for key, value in assignment.items():
+        group, name = key.split('.', 1)
+        params[group] = dict(params[group], **{name: value})
+    return resolve_params(params)
+
+
+def grid_candidates(space):
+    """Arama uzayının tüm kombinasyonlarını (atama sözlükleri) üretir."""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def random_candidates(space, samples, seed=0):
+    """Arama uzayından tekrarsız rastgele samples kombinasyon seçer."""
+    grid = grid_candidates(space)
+    rng = random.Random(seed)
+    return rng.sample(grid, min(samples, len(grid)))
+
+
+def _init_worker(samples, opencv_threads):
+    global _worker_images
+    _worker_images = samples
+    if opencv_threads is not None:
+        cv2.setNumThreads(opencv_threads)
+
+
+def _evaluate_chunk(task):
+    """Aynı ön işleme parametrelerini paylaşan adayları seçilen görüntülerde değerlendirir.
+
+    Ön işleme görüntü başına bir kez, Gabor/morfoloji çıktısı ise aynı filtre parametrelerini
+    paylaşan ardışık adaylar için bir kez hesaplanır. Her adayın süresi, tek başına çalışsaydı
+    harcayacağı süredir (paylaşılan adımların ölçülen süresi dahil).
+    """
+    candidates, image_indices, scanlines = task
+    images = [_worker_images[index] for index in image_indices]
+    prefix = get_pipeline(candidates[0]['params'])
+
+    prepared = []
+    for _, gray, _ in images:
+        start = time.perf_counter()
+        pre = prefix.preprocess(gray)
+        prepared.append((pre, time.perf_counter() - start))
+
+    results = []
+    filtered_key = None
+    filtered = None
+    for candidate in candidates:
+        pipeline = get_pipeline(candidate['params'])
+        key = freeze_params({group: candidate['params'][group] for group in FILTER_GROUPS})
+        if key != filtered_key:
+            filtered_key = key
+            filtered = []
+            for pre, _ in prepared:
+                start = time.perf_counter()
+                image = pipeline.filter(pre)
+                filtered.append((image, time.perf_counter() - start))
+
+        counts = []
+        seconds = 0.0
+        for (image, filter_s), (_, pre_s) in zip(filtered, prepared):
+            start = time.perf_counter()
+            edges = cv2.Canny(image, pipeline.canny_low, pipeline.canny_high)
+            if scanlines is None:
+                counts.append(count_vertical_edges(edges))
+            else:
+                counts.append(count_edges_multiline(edges, scanlines or None)['count'])
+            seconds += pre_s + filter_s + time.perf_counter() - start
+
+        expected = [count for _, _, count in images]
+        errors = [abs(actual - target) for actual, target in zip(counts, expected)]
+        results.append({
+            'id': candidate['id'],
+            'assignment': candidate['assignment'],
+            'counts': dict(zip([name for name, _, _ in images], counts)),
+            'images': len(images),
+            'accuracy': sum(error == 0 for error in errors) / len(errors),
+            'mean_abs_error': float(np.mean(errors)),
+            'ms_per_image': seconds / len(images) * 1000,
+        })
+    return results
+
+
+def _make_tasks(candidates, image_indices, workers, scanlines):
+    """Adayları ön işleme anahtarına göre gruplar ve işçilere dağıtılacak parçalara böler."""
+    groups = {}
+    for candidate in candidates:
+        key = freeze_params({group: candidate['params'][group] for group in PREFIX_GROUPS})
+        groups.setdefault(key, []).append(candidate)
+
+    tasks = []
+    for group in groups.values():
+        # Aynı filtre parametreleri art arda gelsin ki Gabor çıktısı paylaşılsın
+        group.sort(key=lambda c: repr(freeze_params({g: c['params'][g] for g in FILTER_GROUPS})))
+        size = max(1, math.ceil(len(group) / workers))
+        for start in range(0, len(group), size):
+            tasks.append((group[start:start + size], image_indices, scanlines))
+    return tasks
+
+
+def rank_results(results):
+    """Sonuçları doğruluk (azalan), ortalama mutlak hata ve süreye göre sıralar."""
+    return sorted(results, key=lambda r: (-r['accuracy'], r['mean_abs_error'], r['ms_per_image']))
+
+
+class SweepRunner:
+    """Süreç havuzunu tüm tur boyunca açık tutan değerlendirici"""
+
+    def __init__(self, samples, workers=None, opencv_threads=1, scanlines=None):
+        self.samples = samples
+        self.workers = workers or os.cpu_count()
+        self.scanlines = scanlines
+        self._executor = None
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(samples, opencv_threads))
+        else:
+            _init_worker(samples, opencv_threads)
+
+    def evaluate(self, candidates, image_indices=None):
+        if image_indices is None:
+            image_indices = list(range(len(self.samples)))
+        tasks = _make_tasks(candidates, image_indices, self.workers, self.scanlines)
+        if self._executor is None:
+            chunks = map(_evaluate_chunk, tasks)
+        else:
+            chunks = self._executor.map(_evaluate_chunk, tasks)
+        return rank_results([result for chunk in chunks for result in chunk])
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def successive_halving(runner, candidates, eta=3, min_images=1):
+    """Adayları az görüntüyle başlatıp her turda en iyi 1/eta'sını daha çok görüntüyle yeniden dener."""
+    total = len(runner.samples)
+    rounds = max(1, math.ceil(math.log(max(len(candidates), 1), eta)))
+    images = max(min_images, total // eta ** (rounds - 1)) if rounds > 1 else total
+    history = []
+    while True:
+        images = min(images, total)
+        ranked = runner.evaluate(candidates, list(range(images)))
+        history.append({'candidates': len(candidates), 'images': images})
+        if images >= total:
+            return ranked, history
+        keep = {r['id'] for r in ranked[:max(1, len(ranked) // eta)]}
+        candidates = [c for c in candidates if c['id'] in keep]
+        images *= eta
+
+
+def build_candidates(space, method='grid', samples=50, seed=0, profile=None, params=None):
+    base = resolve_params(params, profile)
+    if method == 'grid':
+        assignments = grid_candidates(space)
+    else:
+        assignments = random_candidates(space, samples, seed)
+    return [{'id': index, 'assignment': assignment, 'params': make_candidate(base, assignment)}
+            for index, assignment in enumerate(assignments)]
+
+
+def run_sweep(samples, space=None, method='grid', samples_count=50, eta=3, workers=None, opencv_threads=1,
+              scanlines=None, profile=None, seed=0):
+    """Arama uzayını seçilen yöntemle değerlendirir; sıralı sonuçları ve özet bilgiyi döndürür."""
+    space = space or DEFAULT_SPACE
+    candidates = build_candidates(space, 'grid' if method == 'grid' else 'random', samples_count, seed, profile)
+    start = time.perf_counter()
+    history = None
+    with SweepRunner(samples, workers, opencv_threads, scanlines) as runner:
+        if method == 'halving':
+            ranked, history = successive_halving(runner, candidates, eta)
+        else:
+            ranked = runner.evaluate(candidates)
+    return {
+        'method': method,
+        'candidates': len(candidates),
+        'images': [name for name, _, _ in samples],
+        'expected': {name: count for name, _, count in samples},
+        'elapsed_s': time.perf_counter() - start,
+        'rounds': history,
+        'ranked': ranked,
+    }
+
+
+def format_table(report, top=10):
+    """Sıralı sonuçların ilk top satırını tablo olarak biçimlendirir."""
+    expected = ', '.join(f"{name}={count}" for name, count in report['expected'].items())
+    lines = [f"{report['candidates']} aday, {report['elapsed_s']:.1f} s ({report['method']}); beklenen: {expected}"]
+    for rank, result in enumerate(report['ranked'][:top], 1):
+        assignment = ', '.join(f"{key}={value:.4g}" if isinstance(value, float) else f"{key}={value}"
+                               for key, value in result['assignment'].items())
+        lines.append(f"{rank:>3}. doğruluk %{result['accuracy'] * 100:5.1f}  ort. hata {result['mean_abs_error']:5.2f}  "
+                     f"{result['ms_per_image']:7.2f} ms/görüntü ({result['images']} görüntü)  {assignment}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gabor/Canny parametre taraması ve otomatik ayar")
+    parser.add_argument('--labels', help="Beklenen sayımları içeren JSON dosyası; verilmezse referans profil kullanılır")
+    parser.add_argument('--assets', default='assets', help="Örnek görüntü klasörü (--labels yoksa)")
+    parser.add_argument('--reference-profile', choices=sorted(PROFILES), default='accurate')
+    parser.add_argument('--space', nargs='+', default=None,
+                        help="Arama uzayı, ör. gabor.lambd=8,10,12 canny.low=30,50 (varsayılan: Gabor+Canny ızgarası)")
+    parser.add_argument('--method', choices=('grid', 'random', 'halving'), default='grid')
+    parser.add_argument('--samples', type=int, default=50, help="random/halving için aday sayısı")
+    parser.add_argument('--eta', type=int, default=3, help="halving: her turda kalan oran 1/eta")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=None, help="Adayların temel profili")
+    parser.add_argument('--scanlines', type=int, default=None,
+                        help="Çoklu tarama çizgisi sayısı (0: tüm sütunlar); verilmezse orta sütun")
+    parser.add_argument('--workers', type=int, default=None, help="İşçi süreç sayısı")
+    parser.add_argument('--opencv-threads', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', help="Tüm sıralı sonuçların yazılacağı JSON dosyası")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = load_labels(args.labels, args.assets, args.reference_profile)
+    if not samples:
+        raise SystemExit("Sayımı bilinen görüntü bulunamadı")
+
+    space = parse_space(args.space) if args.space else None
+    report = run_sweep(samples, space, args.method, args.samples, args.eta, args.workers,
+                       args.opencv_threads, args.scanlines, args.profile, args.seed)
+    print(format_table(report, args.top))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
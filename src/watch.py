@@ -0,0 +1,359 @@
+# watch.py → 18.10.2026
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import cv2
+
+from batch import IMAGE_EXTENSIONS, RESULT_FIELDS, init_worker
+from multi_roi import count_roi, crop_roi, load_rois, normalize_rois
+from pipeline import PROFILES, get_pipeline
+
+DEFAULT_FOLDER = 'incoming'
+DEFAULT_LOG = 'watch_results.csv'
+# Klasör tarama aralığı (s); ağ paylaşımlarında inotify olayları güvenilir gelmediği için yoklama
+POLL_INTERVAL = 0.5
+# Boyut ve değişiklik zamanı bu süre sabit kalırsa dosyanın yazımı bitmiş sayılır (s)
+SETTLE_S = 1.0
+# JPEG bitiş işareti hiç gelmeyen dosya bu süre sabit kaldıktan sonra yine işlenir (hata satırı olur)
+STALE_S = 30.0
+# Aynı anda çözülmüş/işlenen en fazla görüntü; fazlası diskte bekler (bellek sınırı)
+MAX_INFLIGHT = 8
+IO_THREADS = 2
+JPEG_EOI = b'\xff\xd9'
+LOG_FIELDS = ['processed_at'] + RESULT_FIELDS
+
+
+def has_jpeg_end(path):
+    """JPEG dosyası bitiş işaretiyle (FFD9) bitiyor mu; yarım yazılmış dosyada False."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 64))
+        # Bazı yakalayıcılar dosyayı sıfırlarla doldurur
+        return f.read().rstrip(b'\x00').endswith(JPEG_EOI)
+
+
+def _init_counter():
+    # Ctrl+C yalnızca izleyiciyi durdurur; işçiler kalan sayımları bitirip havuzla kapanır
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    init_worker(1)
+
+
+def count_crops(crops, params, profile, scanlines, aggregate):
+    """İşçi süreç işi: griye çevrilmiş ROI kırpıntılarını sayar; RESULT_FIELDS satırları döndürür."""
+    pipeline = get_pipeline(params, profile)
+    rows = []
+    for name, gray in crops:
+        row = count_roi(gray, name, (0, 0, gray.shape[1], gray.shape[0]), pipeline, scanlines, aggregate)
+        rows.append(dict(dict.fromkeys(RESULT_FIELDS), roi_name=name, edge_count=row['edge_count'],
+                         agreement=row['agreement'], roi_width=row['roi_width'], roi_height=row['roi_height'],
+                         process_ms=row['process_ms']))
+    return rows
+
+
+class ResultLog:
+    """Sonuç satırlarını CSV'ye veya (.jsonl uzantısında) JSON satırlarına ekler; her satır hemen diske yazılır."""
+
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = path.lower().endswith('.jsonl')
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        if not self.jsonl:
+            self._writer = csv.DictWriter(self._file, fieldnames=LOG_FIELDS)
+            if new:
+                self._writer.writeheader()
+
+    def write(self, rows):
+        processed_at = datetime.now().isoformat(timespec='milliseconds')
+        for row in rows:
+            row = dict(processed_at=processed_at, **row)
+            if self.jsonl:
+                self._file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            else:
+                self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class HotFolderWatcher:
+    """Klasöre düşen görüntüleri yazımları bitince sayar (asyncio).
+
+    Tarama ve çözme G/Ç iş parçacıklarında, sayım süreç havuzunda yapılır. En fazla max_inflight
+    görüntü aynı anda bellekte bulunur; ani bir yığında fazlası diskte sırasını bekler.
+    on_result(satırlar, görüntü) olay döngüsü iş parçacığında çağrılır; görüntü yalnızca
+    keep_images True ise verilir. İzleme başladıktan sonra beklenmeyen bir hatayla durursa hata
+    error alanına yazılır ve on_error(hata) aynı iş parçacığında çağrılır.
+    """
+
+    def __init__(self, folder, roi_coordinates=None, rois=None, canny_low=50, canny_high=150, scanlines=None,
+                 aggregate='median', profile=None, grayscale=True, workers=None, max_inflight=MAX_INFLIGHT,
+                 log_path=None, on_result=None, keep_images=False, existing=False,
+                 interval=POLL_INTERVAL, settle_s=SETTLE_S, on_error=None):
+        if max_inflight < 1:
+            raise ValueError("max_inflight en az 1 olmalı")
+        self.folder = folder
+        self.rois = normalize_rois(rois) if rois else [(None, roi_coordinates)]
+        self.params = {'canny': {'low': canny_low, 'high': canny_high}}
+        self.profile = profile
+        self.scanlines = scanlines
+        self.aggregate = aggregate
+        self.grayscale = grayscale
+        self.workers = workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight
+        self.log_path = log_path
+        self.on_result = on_result
+        self.on_error = on_error
+        self.keep_images = keep_images
+        self.existing = existing
+        self.interval = interval
+        self.settle_s = settle_s
+        self.stats = {'processed': 0, 'failed': 0, 'inflight': 0, 'peak_inflight': 0, 'waiting': 0}
+        # yol → (boyut, mtime_ns, sabitlendiği an); işlenen dosyalar imzalarıyla tutulur
+        self._pending = {}
+        self._done = {}
+        self._loop = None
+        self._stop = None
+        self._thread = None
+        self.error = None
+
+    def _scan(self):
+        """Yazımı bitmiş yeni dosyaları değişiklik zamanı sırasıyla döndürür (G/Ç iş parçacığında)."""
+        now = time.monotonic()
+        present, ready = set(), []
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                path = entry.path
+                present.add(path)
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                signature = (stat.st_size, stat.st_mtime_ns)
+                if self._done.get(path) == signature:
+                    continue
+                previous = self._pending.get(path)
+                if previous is None or previous[:2] != signature:
+                    self._pending[path] = (*signature, now)
+                    continue
+                stable_s = now - previous[2]
+                if stat.st_size == 0 or stable_s < self.settle_s:
+                    continue
+                if (path.lower().endswith(('.jpg', '.jpeg')) and stable_s < STALE_S
+                        and not has_jpeg_end(path)):
+                    continue
+                ready.append((stat.st_mtime_ns, path, signature))
+        # Silinen dosyaların kayıtları büyümesin
+        for registry in (self._pending, self._done):
+            for path in registry.keys() - present:
+                del registry[path]
+        return [(path, signature) for _, path, signature in sorted(ready)]
+
+    def _skip_existing(self):
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    stat = entry.stat()
+                    self._done[entry.path] = (stat.st_size, stat.st_mtime_ns)
+
+    def _load(self, path):
+        """Görüntüyü çözer ve ROI'leri gri kırpıntılar olarak ayırır (G/Ç iş parçacığında)."""
+        start = time.perf_counter()
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE if self.grayscale else cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Görüntü yüklenemedi")
+        crops = []
+        for name, roi in self.rois:
+            view = crop_roi(image, roi) if roi is not None else image
+            # Gri dönüşüm veya kopya, süreç havuzuna yalnızca ROI'nin gitmesini sağlar
+            crops.append((name, cv2.cvtColor(view, cv2.COLOR_BGR2GRAY) if view.ndim == 3 else view.copy()))
+        return crops, image if self.keep_images else None, (time.perf_counter() - start) * 1000
+
+    async def _process(self, path, io_executor, cpu_executor, log):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        image = None
+        try:
+            crops, image, load_ms = await loop.run_in_executor(io_executor, self._load, path)
+            rows = await loop.run_in_executor(cpu_executor, count_crops, crops, self.params, self.profile,
+                                              self.scanlines, self.aggregate)
+            total_ms = (time.perf_counter() - start) * 1000
+            rows = [dict(row, image_path=path, load_ms=load_ms, total_ms=total_ms) for row in rows]
+            self.stats['processed'] += 1
+        except Exception as e:
+            rows = [dict(dict.fromkeys(RESULT_FIELDS), image_path=path, error=str(e),
+                         total_ms=(time.perf_counter() - start) * 1000)]
+            self.stats['failed'] += 1
+        finally:
+            self.stats['inflight'] -= 1
+            self._inflight.release()
+        if log is not None:
+            log.write(rows)
+        if self.on_result is not None:
+            self.on_result(rows, image)
+
+    async def run(self):
+        """stop() çağrılana kadar klasörü izler; işlenmekte olan görüntüler bitirilerek çıkılır."""
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        if not self.existing:
+            self._skip_existing()
+        log = ResultLog(self.log_path) if self.log_path else None
+
+        io_executor = ThreadPoolExecutor(IO_THREADS, thread_name_prefix='watch-io')
+        # spawn: GUI gibi çok iş parçacıklı süreçlerden fork güvenli değil
+        cpu_executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=_init_counter)
+        tasks = set()
+        try:
+            while not self._stop.is_set():
+                try:
+                    ready = await self._loop.run_in_executor(io_executor, self._scan)
+                except OSError:
+                    ready = []  # Ağ paylaşımı geçici olarak erişilemez; sonraki taramada yeniden denenir
+                self.stats['waiting'] = len(ready)
+                for path, signature in ready:
+                    # Geri basınç: sınır doluysa bir görüntü bitene kadar yeni dosya çözülmez
+                    await self._inflight.acquire()
+                    if self._stop.is_set():
+                        self._inflight.release()
+                        break
+                    self._done[path] = signature
+                    self._pending.pop(path, None)
+                    self.stats['waiting'] -= 1
+                    self.stats['inflight'] += 1
+                    self.stats['peak_inflight'] = max(self.stats['peak_inflight'], self.stats['inflight'])
+                    task = asyncio.create_task(self._process(path, io_executor, cpu_executor, log))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                try:
+                    await asyncio.wait_for(self._stop.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            cpu_executor.shutdown(cancel_futures=True)
+            io_executor.shutdown()
+            if log is not None:
+                log.close()
+
+    def start(self):
+        """İzlemeyi kendi olay döngüsüyle arka plan iş parçacığında başlatır; klasör yoksa oluşturulur.
+
+        Başlangıç hataları (ör. klasör veya günlük açılamıyor) burada yeniden fırlatılır.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        self.error = None
+        started = threading.Event()
+        startup_error = []
+
+        async def main():
+            task = asyncio.create_task(self.run())
+            await asyncio.sleep(0)
+            # run() ilk beklemeye kadar klasörü, havuzları ve günlüğü hazırlar; orada düşerse çağırana iletilir
+            if task.done() and task.exception() is not None:
+                startup_error.append(task.exception())
+                started.set()
+                return
+            started.set()
+            try:
+                await task
+            except Exception as e:
+                self.error = e
+                if self.on_error is not None:
+                    self.on_error(e)
+
+        self._thread = threading.Thread(target=asyncio.run, args=(main(),), name='HotFolderWatcher', daemon=True)
+        self._thread.start()
+        started.wait()
+        if startup_error:
+            self._thread.join()
+            self._thread = None
+            raise startup_error[0]
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """İzlemeyi durdurur; başka iş parçacığından da çağrılabilir."""
+        if self.running and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def format_rows(rows):
+    """Bir dosyanın sonuç satırlarını tek satırlık özet olarak biçimlendirir."""
+    path = os.path.basename(rows[0]['image_path'])
+    if rows[0]['error'] is not None:
+        return f"{path}: HATA - {rows[0]['error']}"
+    counts = ', '.join(f"{row['roi_name']}: {row['edge_count']}" if row['roi_name'] else str(row['edge_count'])
+                       for row in rows)
+    return f"{path}: {counts} kenar ({rows[0]['total_ms']:.1f} ms)"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Klasöre düşen görüntüleri yazımları bitince sayan sıcak klasör izleyici")
+    parser.add_argument('folder', nargs='?', default=DEFAULT_FOLDER, help="İzlenecek klasör (ağ paylaşımı olabilir)")
+    parser.add_argument('--roi', type=int, nargs=4, metavar=('X1', 'Y1', 'X2', 'Y2'),
+                        help="ROI koordinatları; verilmezse tüm görüntü işlenir")
+    parser.add_argument('--rois', help="Adlandırılmış ROI'lerin JSON dosyası; her ROI ayrı satır olarak sayılır")
+    parser.add_argument('--log', default=DEFAULT_LOG, help="Sonuç günlüğü (.csv veya .jsonl)")
+    parser.add_argument('--workers', type=int, default=None, help="Sayım süreç sayısı (varsayılan: tüm çekirdekler)")
+    parser.add_argument('--max-inflight', type=int, default=MAX_INFLIGHT,
+                        help="Aynı anda bellekte bulunabilecek en fazla görüntü")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Tarama aralığı (s)")
+    parser.add_argument('--settle', type=float, default=SETTLE_S,
+                        help="Yazımın bittiği kabul edilmeden önce dosyanın sabit kalacağı süre (s)")
+    parser.add_argument('--existing', action='store_true', help="Başlangıçta klasörde olan dosyaları da işle")
+    parser.add_argument('--canny-low', type=int, default=50)
+    parser.add_argument('--canny-high', type=int, default=150)
+    parser.add_argument('--scanlines', type=int, default=None,
+                        help="Çoklu tarama çizgisi sayısı (0: tüm sütunlar); verilmezse orta sütun")
+    parser.add_argument('--aggregate', choices=('median', 'mode'), default='median')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=None)
+    parser.add_argument('--color-decode', action='store_true', help="Görüntüyü renkli çözüp griye çevir")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    watcher = HotFolderWatcher(args.folder, tuple(args.roi) if args.roi else None,
+                               load_rois(args.rois) if args.rois else None, args.canny_low, args.canny_high,
+                               args.scanlines, args.aggregate, args.profile, not args.color_decode, args.workers,
+                               args.max_inflight, args.log, on_result=lambda rows, image: print(format_rows(rows)),
+                               existing=args.existing, interval=args.interval, settle_s=args.settle)
+    print(f"{args.folder} izleniyor (günlük: {args.log}, en fazla {args.max_inflight} görüntü); durdurmak için Ctrl+C")
+    watcher.start()
+    try:
+        while watcher.running:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    if watcher.error is not None:
+        print(f"İzleme hatayla durdu: {type(watcher.error).__name__}: {watcher.error}")
+    stats = watcher.stats
+    print(f"{stats['processed']} görüntü işlendi, {stats['failed']} hata, "
+          f"en yüksek eşzamanlı {stats['peak_inflight']}/{args.max_inflight}")
+
+
+if __name__ == "__main__":
+    main()
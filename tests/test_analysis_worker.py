@@ -0,0 +1,37 @@
+# test_analysis_worker.py → 18.10.2026
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from analysis_worker import analyze_rois
+from pipeline import StageGraph
+from samples import synthetic_stack
+
+
+class _Job:
+    cancelled = False
+
+    def report(self, fraction, message=''):
+        pass
+
+
+class AnalyzeRoisGraphTest(unittest.TestCase):
+    def test_second_run_reuses_every_roi_chain(self):
+        image = synthetic_stack(512, 320)
+        rois = [(f'roi{i}', (i * 60, 20, i * 60 + 80, 480)) for i in range(4)]
+        # Varsayılan boyutlar (8 kaynak, 32 çıktı) dört ROI'ye yetmez; analiz grafiği kendisi büyütmeli
+        graph = StageGraph()
+        first = analyze_rois(_Job(), image, rois, graph=graph, workers=1)
+        graph.hits = graph.misses = 0
+        second = analyze_rois(_Job(), image, rois, graph=graph, workers=1)
+
+        self.assertEqual(graph.misses, 0)
+        self.assertIn('canny', second['reused_stages'])
+        self.assertEqual([row['edge_count'] for row in second['table']],
+                         [row['edge_count'] for row in first['table']])
+
+
+if __name__ == '__main__':
+    unittest.main()
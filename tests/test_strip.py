@@ -0,0 +1,41 @@
+# test_strip.py → 18.10.2026
+import os
+import sys
+import unittest
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from pipeline import get_pipeline
+from samples import synthetic_stack
+from strip import clahe_columns, count_strip, verify_clahe, verify_counts
+
+
+class ClaheColumnsTest(unittest.TestCase):
+    def test_matches_opencv_clahe_bit_exact(self):
+        self.assertEqual(verify_clahe(cases=100), [])
+
+    def test_synthetic_stack_columns(self):
+        gray = synthetic_stack(512, 256)
+        expected = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+        for x0, x1 in ((0, 1), (100, 160), (250, 256)):
+            np.testing.assert_array_equal(clahe_columns(gray, x0, x1), expected[:, x0:x1])
+
+
+class StripCountTest(unittest.TestCase):
+    def test_counts_match_full_roi(self):
+        # Dar ROI'de şerit tam ROI'ye yayılır; geniş ROI'de gerçekten dar şerit işlenir
+        images = [(f'synthetic_{h}x{w}', synthetic_stack(h, w, seed=seed))
+                  for seed, (h, w) in enumerate(((256, 64), (1024, 512), (768, 1536)))]
+        self.assertEqual(verify_counts(images), [])
+
+    def test_wide_roi_processes_narrow_strip(self):
+        gray = synthetic_stack(512, 1024)
+        result = count_strip(gray, get_pipeline())
+        self.assertLess(result['strip_width'], gray.shape[1] // 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+# test_tiled.py → 18.10.2026
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from pipeline import PROFILES, get_pipeline
+from samples import synthetic_stack
+from tiled import detect_edges_tiled, get_executor, tile_bounds, verify_tiled
+
+
+class TileBoundsTest(unittest.TestCase):
+    def test_cores_cover_image_without_overlap(self):
+        for height, tile_height, halo in ((100, 7, 3), (128, 128, 10), (5, 1, 4)):
+            bounds = tile_bounds(height, tile_height, halo)
+            cores = [(core_start, core_end) for _, _, core_start, core_end in bounds]
+            self.assertEqual(cores[0][0], 0)
+            self.assertEqual(cores[-1][1], height)
+            self.assertTrue(all(a[1] == b[0] for a, b in zip(cores, cores[1:])))
+            for read_start, read_end, core_start, core_end in bounds:
+                self.assertEqual(read_start, max(core_start - halo, 0))
+                self.assertEqual(read_end, min(core_end + halo, height))
+
+
+class TiledEquivalenceTest(unittest.TestCase):
+    def test_random_cases_match_untiled(self):
+        self.assertEqual(verify_tiled(cases=30, workers=2), [])
+
+    def test_every_profile_on_synthetic_stack(self):
+        gray = synthetic_stack(600, 96)
+        for profile in PROFILES:
+            pipeline = get_pipeline(profile=profile)
+            expected = pipeline.detect_edges(gray)
+            for tile_height in (1, 37, 128):
+                actual = detect_edges_tiled(pipeline, gray, workers=2, tile_height=tile_height)
+                for a, b in zip(actual, expected):
+                    np.testing.assert_array_equal(a, b, err_msg=f'{profile} karo={tile_height}')
+
+    def test_executor_is_shared_per_worker_count(self):
+        self.assertIs(get_executor(3), get_executor(3))
+        self.assertIsNot(get_executor(3), get_executor(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,304 @@
+# analysis_worker.py → 18.10.2026
+import threading
+import time
+from functools import partial
+
+from core import EnhancedGaborDetector, _to_gray, count_edges_multiline, count_vertical_edges
+from multi_roi import crop_roi, normalize_rois
+from periodicity import count_periodic
+from pipeline import StageGraph
+from pyramid import preview_count
+from result_cache import hash_array, result_key
+from tiled import get_executor
+
+# Çoklu ROI analizinin grafikte kapladığı yer: görüntü ve gri görüntü ortak; ROI başına kırpıntı,
+# bilateral ve filtre çıktısı kaynak, kırpmadan Canny'ye yedi adım çıktısı
+GRAPH_SOURCES = 2
+ROI_GRAPH_SOURCES = 3
+ROI_GRAPH_OUTPUTS = 7
+
+
+class AnalysisCancelled(Exception):
+    """İş iptal edildiğinde fırlatılır."""
+
+
+class AnalysisJob:
+    """Arka planda çalışan tek bir analiz işi"""
+
+    def __init__(self, worker, task, args, kwargs, on_result):
+        self.worker = worker
+        self.task = task
+        self.args = args
+        self.kwargs = kwargs
+        self.on_result = on_result
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """İşi iptal edilmiş olarak işaretler; bir sonraki kontrolde durur."""
+        self._cancel_event.set()
+
+    def check(self):
+        """İş iptal edildiyse AnalysisCancelled fırlatır."""
+        if self._cancel_event.is_set():
+            raise AnalysisCancelled()
+
+    def report(self, fraction, message=''):
+        """İlerlemeyi bildirir ve iptal kontrolü yapar."""
+        self.check()
+        self.worker._dispatch(self.worker.on_progress, self, fraction, message)
+
+    def preview(self, result):
+        """Kesin sonuç hazır olmadan önce ara sonucu (ör. kaba sayım) bildirir."""
+        self.check()
+        self.worker._dispatch(self.worker.on_preview, self, result)
+
+
+class AnalysisWorker:
+    """Analizleri UI iş parçacığı dışında, tek bir arka plan iş parçacığında çalıştırır.
+
+    Çalışan iş sürerken gelen yeni istek, bekleyen isteğin yerini alır (kuyruk oluşmaz).
+    Geri çağrılar scheduler üzerinden (ör. Kivy Clock) ana iş parçacığına iletilir.
+    """
+
+    def __init__(self, scheduler=None, on_progress=None, on_error=None, on_cancel=None, on_preview=None):
+        self.scheduler = scheduler
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.on_preview = on_preview
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._current = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='AnalysisWorker', daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        with self._cond:
+            return self._current is not None or self._pending is not None
+
+    def submit(self, task, *args, on_result=None, **kwargs):
+        """task(job, *args, **kwargs) işini sıraya koyar; bekleyen eski isteğin yerini alır."""
+        job = AnalysisJob(self, task, args, kwargs, on_result)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Worker durduruldu")
+            if self._pending is not None:
+                self._pending.cancel()
+            self._pending = job
+            self._cond.notify()
+        return job
+
+    def cancel(self):
+        """Bekleyen ve çalışan işleri iptal eder."""
+        with self._cond:
+            for job in (self._pending, self._current):
+                if job is not None:
+                    job.cancel()
+            self._pending = None
+
+    def shutdown(self, wait=False):
+        """Worker'ı durdurur."""
+        self.cancel()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if wait:
+            self._thread.join()
+
+    def _dispatch(self, callback, *args):
+        if callback is None:
+            return
+        if self.scheduler is None:
+            callback(*args)
+        else:
+            self.scheduler(lambda: callback(*args))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                job, self._pending = self._pending, None
+                self._current = job
+
+            try:
+                job.check()
+                result = job.task(job, *job.args, **job.kwargs)
+                job.check()
+                self._dispatch(job.on_result, job, result)
+            except AnalysisCancelled:
+                self._dispatch(self.on_cancel, job)
+            except Exception as e:
+                self._dispatch(self.on_error, job, e)
+            finally:
+                with self._cond:
+                    self._current = None
+
+
+def analyze_roi(job, roi_image, canny_low=50, canny_high=150, scanlines=0, aggregate='median', graph=None,
+                cache=None, roi_coords=None, preview=False):
+    """ROI üzerinde filtre zincirini, Canny'yi ve kenar sayımını çalıştırır (worker görevi).
+
+    graph (StageGraph) verilirse aynı ROI'nin tekrar analizinde değişmeyen adımlar yeniden hesaplanmaz.
+    cache (ResultCache) verilirse aynı piksel içeriği, ROI ve parametrelerle yapılmış analiz hiç
+    çalıştırılmaz; sonuç önbellekten döner ('cache' alanı katmanı gösterir).
+    preview True ise tam zincirden önce kaba seviye (pyrDown) sayımı job.preview ile bildirilir.
+    """
+    job.report(0.0, 'Hazırlanıyor')
+    if cache is not None:
+        start = time.perf_counter()
+        key = result_key(hash_array(roi_image), roi_coords, {'canny': {'low': canny_low, 'high': canny_high}},
+                         kind='analysis', scanlines=scanlines, aggregate=aggregate)
+        entry, tier = cache.lookup(key)
+        if entry is not None:
+            analysis = _cached_analysis(roi_image, entry, graph)
+            analysis.update(timings={'cache': time.perf_counter() - start}, cache=tier)
+            job.report(1.0, 'Tamamlandı')
+            return analysis
+
+    detector = EnhancedGaborDetector(roi_image, graph)
+    if preview:
+        coarse = preview_count(detector.image, {'canny': {'low': canny_low, 'high': canny_high}}, None,
+                               scanlines, aggregate)
+        if coarse is not None:
+            job.preview(coarse['count'])
+
+    def on_stage(name, index, total):
+        job.report(index / (total + 1), name)
+
+    with detector.collect_timings() as timings:
+        processed_image = detector.process_image(progress_callback=on_stage)
+        edges = detector.detect_edges(canny_low, canny_high)
+        with detector.timed_stage('count'):
+            edge_count = count_vertical_edges(edges)
+            multiline = count_edges_multiline(edges, scanlines or None, aggregate)
+        with detector.timed_stage('periodic'):
+            # Toplu yolla aynı sinyal: filtrelenmemiş gri ROI
+            periodic = _periodic_estimate(detector.source_image)
+    height, width = edges.shape
+    if cache is not None:
+        cache.store(key, {
+            'edge_count': edge_count,
+            'multiline': {name: multiline[name] for name in ('count', 'agreement', 'aggregate')},
+            'periodic': periodic,
+            'roi_size': [width, height],
+        }, {'processed_image': processed_image, 'edges': edges,
+            'per_line': multiline['per_line'], 'columns': multiline['columns']})
+    job.report(1.0, 'Tamamlandı')
+
+    return {
+        'detector': detector,
+        'processed_image': processed_image,
+        'edges': edges,
+        'edge_count': edge_count,
+        'multiline': multiline,
+        'periodic': periodic,
+        'roi_size': (width, height),
+        'timings': timings,
+        'reused_stages': detector.reused_stages,
+        'cache': None,
+    }
+
+
+def _periodic_estimate(gray):
+    """Canny sayımının çapraz kontrolü için profil periyodikliği tahmini; çok kısa ROI'de None."""
+    try:
+        return count_periodic(gray)
+    except ValueError:
+        return None
+
+
+def _cached_analysis(roi_image, entry, graph=None):
+    """Önbellek kaydından analyze_roi ile aynı biçimde sonuç oluşturur (filtreler çalışmaz)."""
+    meta, arrays = entry['meta'], entry['arrays']
+    return {
+        'detector': EnhancedGaborDetector(roi_image, graph),
+        'processed_image': arrays['processed_image'],
+        'edges': arrays['edges'],
+        'edge_count': meta['edge_count'],
+        'multiline': dict(meta['multiline'], per_line=arrays['per_line'], columns=arrays['columns']),
+        'periodic': meta['periodic'],
+        'roi_size': tuple(meta['roi_size']),
+        'reused_stages': [],
+    }
+
+
+class _RoiProgress:
+    """Eşzamanlı ROI analizlerinin ilerlemesini tek bir işin ilerlemesinde birleştirir."""
+
+    def __init__(self, job, count):
+        self.job = job
+        self.fractions = [0.0] * count
+        self._lock = threading.Lock()
+
+    def report(self, index, name, fraction, message=''):
+        with self._lock:
+            self.fractions[index] = fraction
+            total = sum(self.fractions) / len(self.fractions)
+        self.job.report(total, f'{name}: {message}')
+
+
+class _RoiJob:
+    """analyze_roi'ye iş yerine verilir; ilerlemeyi ortak işe ROI adıyla iletir."""
+
+    def __init__(self, progress, index, name):
+        self.progress = progress
+        self.index = index
+        self.name = name
+
+    def report(self, fraction, message=''):
+        self.progress.report(self.index, self.name, fraction, message)
+
+
+def analyze_rois(job, image, rois, canny_low=50, canny_high=150, scanlines=0, aggregate='median', graph=None,
+                 workers=None, cache=None):
+    """Aynı görüntüdeki adlandırılmış ROI'leri eşzamanlı analiz eder (worker görevi).
+
+    Gri dönüşüm tüm görüntü için bir kez yapılır; ROI'ler bu gri görüntünün görünümleridir.
+    Kırpma da grafikte bir adım olduğundan aynı ROI'lerin tekrar analizinde önbellek kullanılır.
+    """
+    rois = normalize_rois(rois)
+    graph = graph if graph is not None else StageGraph()
+    # Tüm ROI zincirleri grafikte kalmalı; yoksa tekrar analizde kaynaklar tahliye edilir ve hiçbir adım eşleşmez
+    graph.reserve(GRAPH_SOURCES + ROI_GRAPH_SOURCES * len(rois), GRAPH_SOURCES + ROI_GRAPH_OUTPUTS * len(rois))
+    job.report(0.0, 'Hazırlanıyor')
+    start = time.perf_counter()
+    gray = graph.run(image, [] if image.ndim == 2 else [('gray', _to_gray, None)])
+    progress = _RoiProgress(job, len(rois))
+
+    def analyze(index, name, roi):
+        view = graph.run(gray, [('crop', partial(crop_roi, roi=roi), roi)])
+        analysis = analyze_roi(_RoiJob(progress, index, name), view, canny_low, canny_high, scanlines, aggregate,
+                               graph, cache, roi)
+        analysis.update(name=name, roi_coords=roi)
+        return analysis
+
+    executor = get_executor(workers)
+    futures = [executor.submit(analyze, index, name, roi) for index, (name, roi) in enumerate(rois)]
+    analyses = [future.result() for future in futures]
+    job.report(1.0, 'Tamamlandı')
+
+    timings = {}
+    for analysis in analyses:
+        for name, seconds in analysis['timings'].items():
+            timings[name] = timings.get(name, 0.0) + seconds
+    return {
+        'analyses': analyses,
+        'table': [{'name': a['name'], 'roi': a['roi_coords'], 'edge_count': a['edge_count'],
+                   'agreement': a['multiline']['agreement'], 'roi_width': a['roi_size'][0],
+                   'roi_height': a['roi_size'][1]} for a in analyses],
+        'timings': timings,
+        'pixels': sum(a['roi_size'][0] * a['roi_size'][1] for a in analyses),
+        'elapsed_ms': (time.perf_counter() - start) * 1000,
+        'reused_stages': sorted({stage for a in analyses for stage in a['reused_stages']}),
+        'cached': [a['name'] for a in analyses if a['cache'] is not None],
+    }
@@ -0,0 +1,444 @@
+# batch.py → 18.10.2026
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from core import EnhancedGaborDetector, count_edges_multiline, count_vertical_edges
+from multi_roi import count_roi, count_rois, crop_roi, load_rois, normalize_rois
+from periodicity import MIN_PERIODS, count_periodic
+from pipeline import PROFILES, get_pipeline
+from pyramid import count_pyramid
+from result_cache import format_stats, get_result_cache, hash_file, result_key
+from shm_ring import RingTaskError, RingWorkers
+from strip import count_strip
+from tiled import detect_edges_tiled
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+RESULT_FIELDS = ['image_path', 'roi_name', 'edge_count', 'agreement', 'periodic_count', 'pitch',
+                 'roi_width', 'roi_height', 'load_ms', 'process_ms', 'total_ms', 'cache', 'error']
+# Sonuç önbelleğinde saklanan alanlar
+CACHED_FIELDS = ['edge_count', 'agreement', 'periodic_count', 'pitch', 'roi_width', 'roi_height']
+
+
+def collect_images(source):
+    """Klasör veya glob deseninden işlenecek görüntü yollarını toplar."""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source)
+    return sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def init_worker(opencv_threads):
+    """İşçi süreçte OpenCV iş parçacığı sayısını ayarlar (süreç havuzu başlatıcısı)."""
+    if opencv_threads is not None:
+        cv2.setNumThreads(opencv_threads)
+
+
+def count_image(image_path, roi_coordinates=None, canny_low=50, canny_high=150,
+                scanlines=None, aggregate='median', profile=None, grayscale=True, strip=False,
+                tile_threads=None, cache_path=None, periodic=False, pyramid=False):
+    """Tek bir görüntüde ROI'yi işler ve kenar sayımı sonucunu döndürür.
+
+    scanlines None ise orta sütun sayılır; 0 tüm sütunları, N ise N tarama çizgisini kullanır.
+    strip True ise yalnızca tarama sütunlarının çevresindeki şerit işlenir (aynı sayım).
+    tile_threads verilirse filtre zinciri o kadar iş parçacığında satır bantlarıyla işlenir (aynı sayım).
+    cache_path verilirse sonuç dosya içeriği, ROI ve parametrelerle SQLite önbelleğinden okunur/yazılır.
+    periodic True ise Canny sayımının yanında parlaklık profili periyodikliğinden sayım ve adım da yazılır.
+    pyramid True ise kaba seviyede sayılır, yalnızca belirsiz bantlar tam çözünürlükte yeniden işlenir.
+    """
+    result = dict.fromkeys(RESULT_FIELDS)
+    result['image_path'] = image_path
+    start = time.perf_counter()
+    params = {'canny': {'low': canny_low, 'high': canny_high}}
+
+    try:
+        if cache_path:
+            cache = get_result_cache(cache_path)
+            # Şerit ve karolu yol aynı sayımı verdiği için anahtara girmez
+            key = result_key(hash_file(image_path), roi_coordinates, params, profile, grayscale=grayscale,
+                             scanlines=scanlines, aggregate=aggregate, periodic=periodic, pyramid=pyramid)
+            entry, tier = cache.lookup(key)
+            result['cache'] = tier or 'miss'
+            if entry is not None:
+                result.update(entry['meta'])
+                result['total_ms'] = (time.perf_counter() - start) * 1000
+                return result
+
+        # Gri çözme ve önce kırpma: bellek ve süre ROI boyutuyla ölçeklenir
+        detector = EnhancedGaborDetector.from_file(image_path, roi_coordinates, grayscale)
+        loaded = time.perf_counter()
+
+        # Derlenmiş pipeline işçi süreç içinde önbellekten tekrar kullanılır
+        pipeline = get_pipeline(params, profile)
+        height, width = detector.image.shape
+        if pyramid:
+            counted = count_pyramid(detector.image, params, profile, scanlines, aggregate)
+            result['edge_count'] = counted['count']
+            result['agreement'] = counted['agreement']
+        elif strip:
+            counted = count_strip(detector.image, pipeline, scanlines, aggregate)
+            result['edge_count'] = counted['count']
+            result['agreement'] = counted['agreement']
+        else:
+            if tile_threads:
+                _, edges = detect_edges_tiled(pipeline, detector.image, tile_threads)
+            else:
+                _, edges = pipeline.detect_edges(detector.image)
+            if scanlines is None:
+                result['edge_count'] = count_vertical_edges(edges)
+            else:
+                multiline = count_edges_multiline(edges, scanlines or None, aggregate)
+                result['edge_count'] = multiline['count']
+                result['agreement'] = multiline['agreement']
+        if periodic and height >= 2 * MIN_PERIODS:
+            estimate = count_periodic(detector.image)
+            # Güvenilmez tahmin boş bırakılır; Canny sayımı yine yazılır
+            if estimate['reliable']:
+                result['periodic_count'] = estimate['count']
+                result['pitch'] = round(estimate['pitch'], 2)
+        result['roi_width'] = width
+        result['roi_height'] = height
+        result['load_ms'] = (loaded - start) * 1000
+        result['process_ms'] = (time.perf_counter() - loaded) * 1000
+        if cache_path:
+            cache.store(key, {field: result[field] for field in CACHED_FIELDS})
+    except Exception as e:
+        result['error'] = str(e)
+
+    result['total_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def count_image_rois(image_path, rois, canny_low=50, canny_high=150, scanlines=None, aggregate='median',
+                     profile=None, grayscale=True, workers=None, cache_path=None):
+    """Görüntüyü bir kez çözer ve tüm adlandırılmış ROI'leri sayar; ROI başına bir sonuç döndürür.
+
+    cache_path verilirse yalnızca önbellekte olmayan ROI'ler işlenir; hepsi önbellekteyse görüntü çözülmez.
+    """
+    start = time.perf_counter()
+    params = {'canny': {'low': canny_low, 'high': canny_high}}
+    rois = normalize_rois(rois)
+    results = {}
+    try:
+        keys = {}
+        if cache_path:
+            cache = get_result_cache(cache_path)
+            content = hash_file(image_path)
+            for name, roi in rois:
+                keys[name] = result_key(content, roi, params, profile, grayscale=grayscale,
+                                        scanlines=scanlines, aggregate=aggregate)
+                entry, tier = cache.lookup(keys[name])
+                if entry is not None:
+                    results[name] = dict(dict.fromkeys(RESULT_FIELDS), image_path=image_path, roi_name=name,
+                                         cache=tier, **entry['meta'])
+
+        missing = [(name, roi) for name, roi in rois if name not in results]
+        if missing:
+            image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError("Görüntü yüklenemedi")
+            loaded = time.perf_counter()
+            rows = count_rois(image, missing, get_pipeline(params, profile), scanlines, aggregate, workers)
+            for row in rows:
+                result = dict.fromkeys(RESULT_FIELDS)
+                result.update(image_path=image_path, roi_name=row['name'], edge_count=row['edge_count'],
+                              agreement=row['agreement'], roi_width=row['roi_width'],
+                              roi_height=row['roi_height'], load_ms=(loaded - start) * 1000,
+                              process_ms=row['process_ms'])
+                if cache_path:
+                    result['cache'] = 'miss'
+                    cache.store(keys[row['name']], {field: result[field] for field in CACHED_FIELDS})
+                results[row['name']] = result
+    except Exception as e:
+        result = dict.fromkeys(RESULT_FIELDS)
+        result.update(image_path=image_path, error=str(e), total_ms=(time.perf_counter() - start) * 1000)
+        return [result]
+
+    # ROI'ler eşzamanlı işlendiği için toplam süre görüntü başına ortaktır
+    total_ms = (time.perf_counter() - start) * 1000
+    for result in results.values():
+        result['total_ms'] = total_ms
+    return [results[name] for name, _ in rois]
+
+
+def _count_image_task(task):
+    return count_image(*task)
+
+
+def _count_image_rois_task(task):
+    return count_image_rois(*task)
+
+
+def count_ring_image(image, roi_coordinates, rois, params, profile, scanlines, aggregate):
+    """--shm tüketici işi: paylaşılan bellekte çözülmüş görüntüde ROI'leri kopyalamadan sayar.
+
+    Satırlar RESULT_FIELDS sözlükleridir; image_path, load_ms ve total_ms üreticide doldurulur.
+    """
+    try:
+        pipeline = get_pipeline(params, profile)
+        if rois:
+            rows = count_rois(image, rois, pipeline, scanlines, aggregate, workers=1)
+        else:
+            height, width = image.shape[:2]
+            view = crop_roi(image, roi_coordinates or (0, 0, width, height))
+            # Gri dönüşüm yalnızca ROI'yi paylaşılan bellekten sürecin kendi belleğine okur
+            gray = view if view.ndim == 2 else cv2.cvtColor(view, cv2.COLOR_BGR2GRAY)
+            rows = [count_roi(gray, None, (0, 0, gray.shape[1], gray.shape[0]), pipeline, scanlines, aggregate)]
+    except Exception as e:
+        return [dict(dict.fromkeys(RESULT_FIELDS), error=str(e))]
+    return [dict(dict.fromkeys(RESULT_FIELDS), roi_name=row['name'], edge_count=row['edge_count'],
+                 agreement=row['agreement'], roi_width=row['roi_width'], roi_height=row['roi_height'],
+                 process_ms=row['process_ms'])
+            for row in rows]
+
+
+def run_batch_shm(image_paths, roi_coordinates=None, workers=None, canny_low=50, canny_high=150,
+                  scanlines=None, aggregate='median', profile=None, grayscale=True, rois=None, slots=None):
+    """Görüntüleri üst süreçte çözer, paylaşılan bellek halkasıyla işçi süreçlere pickle'sız dağıtır.
+
+    Halka yuvaları ilk görüntünün boyutundadır; daha büyük görüntüler hata satırı olur.
+    Önbellek, şerit, karolu, periyodik ve piramit seçenekleri bu yolda kullanılmaz.
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    params = {'canny': {'low': canny_low, 'high': canny_high}}
+    rois = normalize_rois(rois) if rois else None
+    mode = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+
+    errors, counted = {}, {}
+    ring_workers = None
+    try:
+        for index, path in enumerate(image_paths):
+            loaded = time.perf_counter()
+            image = cv2.imread(path, mode)
+            load_ms = (time.perf_counter() - loaded) * 1000
+            if image is None:
+                errors[index] = "Görüntü yüklenemedi"
+                continue
+            if ring_workers is None:
+                ring_workers = RingWorkers(image.shape, count_ring_image,
+                                           (roi_coordinates, rois, params, profile, scanlines, aggregate),
+                                           workers, slots or 2 * workers)
+            try:
+                # Dolu halkada üretici bekler; toplu işte görüntü düşürülmez
+                ring_workers.put(image, index, load_ms)
+            except ValueError as e:
+                errors[index] = str(e)
+            except RuntimeError:
+                break  # Tüketiciler sonlandı; kalan görüntüler hata satırı olur
+    finally:
+        if ring_workers is not None:
+            ring_workers.close()
+            while (item := ring_workers.get_result()) is not None:
+                index, load_ms, rows = item
+                counted[int(index)] = (load_ms, rows)
+            ring_workers.join()
+
+    results = []
+    for index, path in enumerate(image_paths):
+        if index in errors:
+            results.append(dict(dict.fromkeys(RESULT_FIELDS), image_path=path, error=errors[index]))
+            continue
+        if index not in counted:
+            results.append(dict(dict.fromkeys(RESULT_FIELDS), image_path=path,
+                                error="İşçi süreç sonuç döndürmeden sonlandı"))
+            continue
+        load_ms, rows = counted[index]
+        if isinstance(rows, RingTaskError):
+            results.append(dict(dict.fromkeys(RESULT_FIELDS), image_path=path, load_ms=load_ms, error=str(rows)))
+            continue
+        for row in rows:
+            process_ms = row['process_ms'] or 0.0
+            results.append(dict(row, image_path=path, load_ms=load_ms, total_ms=load_ms + process_ms))
+    return results, time.perf_counter() - start
+
+
+def run_batch(image_paths, roi_coordinates=None, workers=None, canny_low=50, canny_high=150,
+              chunksize=1, opencv_threads=1, scanlines=None, aggregate='median', profile=None,
+              grayscale=True, strip=False, tile_threads=None, rois=None, cache_path=None, periodic=False,
+              pyramid=False):
+    """Görüntüleri süreç havuzunda işler; sonuçları ve toplam süreyi döndürür.
+
+    rois verilirse her görüntü bir kez çözülür ve her ROI için ayrı bir sonuç satırı üretilir.
+    cache_path verilirse sonuçlar işçiler arasında paylaşılan SQLite önbelleğinden okunur/yazılır.
+    strip, tile_threads, periodic ve pyramid yalnızca tek ROI'li yolda kullanılır.
+    """
+    if rois:
+        # Süreç havuzu zaten paralel; ROI iş parçacıkları yalnızca tek süreçte çekirdekleri doldurur
+        roi_workers = None if workers == 1 else 1
+        task_fn = _count_image_rois_task
+        tasks = [(path, rois, canny_low, canny_high, scanlines, aggregate, profile, grayscale, roi_workers,
+                  cache_path)
+                 for path in image_paths]
+    else:
+        task_fn = _count_image_task
+        tasks = [(path, roi_coordinates, canny_low, canny_high, scanlines, aggregate, profile, grayscale, strip,
+                  tile_threads, cache_path, periodic, pyramid)
+                 for path in image_paths]
+    start = time.perf_counter()
+
+    if workers == 1:
+        init_worker(opencv_threads)
+        results = [task_fn(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(opencv_threads,)) as executor:
+            results = list(executor.map(task_fn, tasks, chunksize=chunksize))
+
+    if rois:
+        results = [result for rows in results for result in rows]
+    return results, time.perf_counter() - start
+
+
+def write_csv(results, path):
+    """Sonuçları CSV dosyasına yazar."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def write_json(results, summary, path):
+    """Sonuçları ve özet bilgiyi JSON dosyasına yazar."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'summary': summary, 'results': results}, f, indent=2, ensure_ascii=False)
+
+
+def summarize(results, elapsed, workers):
+    """Toplu işlem için özet istatistikleri hesaplar (çoklu ROI'de sayımlar sonuç satırı başınadır)."""
+    succeeded = [r for r in results if r['error'] is None]
+    images = len({r['image_path'] for r in results})
+    return {
+        'images': images,
+        'results': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'workers': workers or os.cpu_count(),
+        'elapsed_s': elapsed,
+        'images_per_s': images / elapsed if elapsed > 0 else 0.0,
+        'mean_total_ms': (sum(r['total_ms'] for r in succeeded) / len(succeeded)) if succeeded else None,
+        'cache': cache_summary(results),
+    }
+
+
+def cache_summary(results):
+    """Sonuç satırlarındaki önbellek katmanlarından isabet/ıskalama istatistiği (işçi süreçler dahil)."""
+    tiers = [r['cache'] for r in results if r['cache'] is not None]
+    if not tiers:
+        return None
+    hits = sum(tier != 'miss' for tier in tiers)
+    return {
+        'memory_hits': tiers.count('memory'),
+        'disk_hits': tiers.count('disk'),
+        'misses': tiers.count('miss'),
+        'hit_rate': hits / len(tiers),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ekransız toplu metal sac kenar sayımı")
+    parser.add_argument('source', help="Görüntü klasörü veya glob deseni (ör. 'arsiv/*.jpg')")
+    parser.add_argument('--roi', type=int, nargs=4, metavar=('X1', 'Y1', 'X2', 'Y2'),
+                        help="ROI koordinatları; verilmezse tüm görüntü işlenir")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="İşçi süreç sayısı (varsayılan: tüm çekirdekler)")
+    parser.add_argument('--chunksize', type=int, default=None, help="İşçi başına görev grubu boyutu (varsayılan: 1)")
+    parser.add_argument('--opencv-threads', type=int, default=None,
+                        help="İşçi başına OpenCV iş parçacığı sayısı (varsayılan: 1)")
+    parser.add_argument('--canny-low', type=int, default=50)
+    parser.add_argument('--canny-high', type=int, default=150)
+    parser.add_argument('--scanlines', type=int, default=None,
+                        help="Çoklu tarama çizgisi sayısı (0: tüm sütunlar); verilmezse orta sütun")
+    parser.add_argument('--aggregate', choices=('median', 'mode'), default='median',
+                        help="Çoklu tarama sayımlarını birleştirme yöntemi")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=None,
+                        help="Filtre profili (varsayılan: accurate)")
+    parser.add_argument('--color-decode', action='store_true',
+                        help="Görüntüyü renkli çözüp griye çevir (GUI ile birebir aynı gri değerler)")
+    parser.add_argument('--strip', action='store_true',
+                        help="Yalnızca tarama sütunlarının çevresindeki şeridi işle (geniş ROI'lerde hızlı)")
+    parser.add_argument('--rois', help="Adlandırılmış ROI'lerin JSON dosyası; her ROI ayrı satır olarak sayılır")
+    parser.add_argument('--cache', help="Sonuç önbelleği SQLite dosyası (aynı içerik/ROI/parametre tekrar işlenmez)")
+    parser.add_argument('--periodic', action='store_true',
+                        help="Canny sayımının çapraz kontrolü: parlaklık profili periyodikliğinden sayım ve adım")
+    parser.add_argument('--pyramid', action='store_true',
+                        help="Kaba-ince sayım: pyrDown seviyesinde say, yalnızca belirsiz bantları tam çözünürlükte işle")
+    parser.add_argument('--tile-threads', type=int, default=None,
+                        help="Büyük ROI'leri satır bantlarına bölüp bu kadar iş parçacığında işle (--workers 1 ile)")
+    parser.add_argument('--shm', action='store_true',
+                        help="Görüntüleri üst süreçte çöz, paylaşılan bellek halkasıyla işçilere kopyasız dağıt")
+    parser.add_argument('--csv', help="Sonuçların yazılacağı CSV dosyası")
+    parser.add_argument('--json', help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args(argv)
+    if args.shm:
+        # Paylaşılan bellek yolu yalnızca çözme + ROI sayımı yapar; sessizce yok sayılmasın
+        _reject_options(parser, args, '--shm', ('cache', 'strip', 'tile_threads', 'periodic', 'pyramid',
+                                                'chunksize', 'opencv_threads'))
+    if args.rois:
+        _reject_options(parser, args, '--rois', ('strip', 'tile_threads', 'periodic', 'pyramid'))
+    return args
+
+
+def _reject_options(parser, args, mode, options):
+    given = [f"--{name.replace('_', '-')}" for name in options if getattr(args, name) not in (None, False)]
+    if given:
+        parser.error(f"{mode} ile kullanılamaz: {', '.join(given)}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    image_paths = collect_images(args.source)
+    if not image_paths:
+        raise SystemExit(f"Görüntü bulunamadı: {args.source}")
+
+    roi_coordinates = tuple(args.roi) if args.roi else None
+    if args.shm:
+        results, elapsed = run_batch_shm(image_paths, roi_coordinates, args.workers, args.canny_low,
+                                         args.canny_high, args.scanlines, args.aggregate, args.profile,
+                                         not args.color_decode, load_rois(args.rois) if args.rois else None)
+    else:
+        # --shm ile birlikte reddedildikleri için varsayılanları None; havuz yolunun varsayılanları burada
+        chunksize = args.chunksize or 1
+        opencv_threads = 1 if args.opencv_threads is None else args.opencv_threads
+        results, elapsed = run_batch(image_paths, roi_coordinates, args.workers,
+                                     args.canny_low, args.canny_high, chunksize, opencv_threads,
+                                     args.scanlines, args.aggregate, args.profile,
+                                     not args.color_decode, args.strip, args.tile_threads,
+                                     load_rois(args.rois) if args.rois else None, args.cache, args.periodic,
+                                     args.pyramid)
+    summary = summarize(results, elapsed, args.workers)
+
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.json:
+        write_json(results, summary, args.json)
+
+    for r in results:
+        if r['error'] is None:
+            agreement = f", uyum %{r['agreement'] * 100:.0f}" if r['agreement'] is not None else ''
+            name = f" [{r['roi_name']}]" if r['roi_name'] else ''
+            periodic = f", periyodik {r['periodic_count']}" if r['periodic_count'] is not None else ''
+            print(f"{r['image_path']}{name}: {r['edge_count']} kenar "
+                  f"({r['roi_width']}x{r['roi_height']}, {r['total_ms']:.1f} ms{agreement}{periodic})")
+        else:
+            print(f"{r['image_path']}: HATA - {r['error']}")
+    if args.rois:
+        processed = f"{summary['images']} görüntü ({summary['succeeded']}/{summary['results']} ROI)"
+    else:
+        processed = f"{summary['succeeded']}/{summary['images']} görüntü"
+    print(f"{processed} {summary['elapsed_s']:.2f} s içinde işlendi "
+          f"({summary['images_per_s']:.2f} görüntü/s, {summary['workers']} işçi)")
+    if summary['cache'] is not None:
+        print(format_stats(summary['cache']))
+
+
+if __name__ == "__main__":
+    main()
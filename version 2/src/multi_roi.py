@@ -0,0 +1,135 @@
+# multi_roi.py → 18.10.2026
+import argparse
+import json
+import time
+
+import cv2
+
+from core import count_edges_multiline, count_vertical_edges
+from pipeline import PROFILES, get_pipeline
+from tiled import get_executor
+
+ROI_FIELDS = ['name', 'roi', 'edge_count', 'agreement', 'roi_width', 'roi_height', 'process_ms']
+
+
+def normalize_rois(rois):
+    """{ad: koordinat}, [(ad, koordinat)] veya [koordinat] biçimini [(ad, (x1, y1, x2, y2))] listesine çevirir."""
+    if isinstance(rois, dict):
+        rois = list(rois.items())
+    named = []
+    for index, roi in enumerate(rois, 1):
+        if len(roi) == 2:
+            name, coords = roi
+        else:
+            name, coords = f'ROI {index}', roi
+        if len(coords) != 4:
+            raise ValueError(f"ROI dört koordinat içermeli: {name}")
+        named.append((str(name), tuple(int(value) for value in coords)))
+    if not named:
+        raise ValueError("En az bir ROI gerekli")
+    names = [name for name, _ in named]
+    if len(set(names)) != len(names):
+        raise ValueError(f"ROI adları benzersiz olmalı: {names}")
+    return named
+
+
+def load_rois(path):
+    """JSON dosyasından ROI listesi okur: {"sol": [x1, y1, x2, y2], "sag": [...]}."""
+    with open(path, encoding='utf-8') as f:
+        return normalize_rois(json.load(f))
+
+
+def crop_roi(image, roi):
+    """ROI'nin kopyasız görünümünü döndürür."""
+    x1, y1, x2, y2 = roi
+    view = image[y1:y2, x1:x2]
+    if view.size == 0:
+        raise ValueError(f"ROI görüntü dışında: {roi}")
+    return view
+
+
+def count_roi(gray, name, roi, pipeline, scanlines=None, aggregate='median'):
+    """Tek bir ROI'yi gri görüntünün görünümü üzerinde işler ve sayım satırını döndürür."""
+    start = time.perf_counter()
+    view = crop_roi(gray, roi)
+    _, edges = pipeline.detect_edges(view)
+    row = dict.fromkeys(ROI_FIELDS)
+    row.update(name=name, roi=roi, roi_width=view.shape[1], roi_height=view.shape[0])
+    if scanlines is None:
+        row['edge_count'] = count_vertical_edges(edges)
+    else:
+        multiline = count_edges_multiline(edges, scanlines or None, aggregate)
+        row['edge_count'] = multiline['count']
+        row['agreement'] = multiline['agreement']
+    row['process_ms'] = (time.perf_counter() - start) * 1000
+    return row
+
+
+def count_rois(image, rois, pipeline=None, scanlines=None, aggregate='median', workers=None):
+    """Tek görüntüdeki tüm ROI'leri eşzamanlı sayar; satırları ROI sırasıyla döndürür.
+
+    Görüntü bir kez griye çevrilir, ROI'ler bu gri görüntünün görünümleridir. OpenCV işlemleri
+    GIL'i bıraktığı için ROI'ler iş parçacığı havuzunda paralel çalışır.
+    """
+    rois = normalize_rois(rois)
+    pipeline = pipeline or get_pipeline()
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if len(rois) == 1:
+        return [count_roi(gray, *rois[0], pipeline, scanlines, aggregate)]
+    executor = get_executor(workers)
+    futures = [executor.submit(count_roi, gray, name, roi, pipeline, scanlines, aggregate) for name, roi in rois]
+    return [future.result() for future in futures]
+
+
+def format_table(rows):
+    """ROI başına sayım tablosu."""
+    width = max(len('ROI'), *(len(row['name']) for row in rows))
+    lines = [f"{'ROI':<{width}}  {'Kenar':>5}  {'Boyut':>9}  {'Süre':>8}"]
+    for row in rows:
+        agreement = f"  uyum %{row['agreement'] * 100:.0f}" if row['agreement'] is not None else ''
+        size = f"{row['roi_width']}x{row['roi_height']}"
+        lines.append(f"{row['name']:<{width}}  {row['edge_count']:>5}  {size:>9}  "
+                     f"{row['process_ms']:6.1f} ms{agreement}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tek görüntüde birden çok adlandırılmış ROI'nin sayımı")
+    parser.add_argument('image', help="Görüntü dosyası")
+    parser.add_argument('--rois', help="ROI'lerin JSON dosyası: {\"ad\": [x1, y1, x2, y2], ...}")
+    parser.add_argument('--roi', nargs=5, action='append', metavar=('AD', 'X1', 'Y1', 'X2', 'Y2'),
+                        help="Adlandırılmış ROI (tekrarlanabilir)")
+    parser.add_argument('--scanlines', type=int, default=None,
+                        help="Çoklu tarama çizgisi sayısı (0: tüm sütunlar); verilmezse orta sütun")
+    parser.add_argument('--aggregate', choices=('median', 'mode'), default='median')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=None)
+    parser.add_argument('--workers', type=int, default=None, help="İş parçacığı sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument('--color-decode', action='store_true',
+                        help="Görüntüyü renkli çözüp griye çevir (GUI ile birebir aynı gri değerler)")
+    parser.add_argument('--json', help="Sayım tablosunun yazılacağı JSON dosyası")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rois = load_rois(args.rois) if args.rois else []
+    rois += [(name, coords) for name, *coords in args.roi or []]
+    if not rois:
+        raise SystemExit("--rois veya --roi ile en az bir ROI verin")
+
+    start = time.perf_counter()
+    image = cv2.imread(args.image, cv2.IMREAD_COLOR if args.color_decode else cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise SystemExit(f"Görüntü yüklenemedi: {args.image}")
+    rows = count_rois(image, rois, get_pipeline(profile=args.profile), args.scanlines, args.aggregate, args.workers)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    print(format_table(rows))
+    print(f"{len(rows)} ROI {elapsed:.1f} ms içinde sayıldı (en yavaş ROI {max(r['process_ms'] for r in rows):.1f} ms)")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'image': args.image, 'elapsed_ms': elapsed, 'rois': rows}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# profile_report.py → 18.10.2026
+import argparse
+import json
+import time
+
+import numpy as np
+
+from core import count_edges_multiline, count_vertical_edges
+from pipeline import PROFILES, get_pipeline
+from samples import load_samples
+
+
+def measure_profile(pipeline, gray, repeats=20):
+    """Bir profili tek görüntüde ölçer; sayımlar ve adım başına medyan süreler (ms) döner."""
+    stage_times = {name: [] for name in pipeline.stage_names}
+    totals = []
+    edges = None
+    for _ in range(repeats):
+        timings = {}
+        start = time.perf_counter()
+        _, edges = pipeline.detect_edges(gray, timings)
+        totals.append(time.perf_counter() - start)
+        for name, seconds in timings.items():
+            stage_times[name].append(seconds)
+
+    return {
+        'count': count_vertical_edges(edges),
+        'multiline_count': count_edges_multiline(edges)['count'],
+        'stage_ms': {name: float(np.median(values)) * 1000 for name, values in stage_times.items()},
+        'total_ms': float(np.median(totals)) * 1000,
+    }
+
+
+def compare_profiles(samples, profiles=None, repeats=20, baseline='accurate'):
+    """Profilleri örnekler üzerinde çalıştırır ve baseline profile göre farkları hesaplar."""
+    profiles = profiles or list(PROFILES)
+    if baseline not in profiles:
+        profiles = [baseline] + profiles
+
+    images = {}
+    for name, gray in samples:
+        images[name] = {profile: measure_profile(get_pipeline(profile=profile), gray, repeats)
+                        for profile in profiles}
+
+    summary = {}
+    for profile in profiles:
+        rows = [images[name][profile] for name in images]
+        base_rows = [images[name][baseline] for name in images]
+        total_ms = sum(r['total_ms'] for r in rows)
+        base_ms = sum(r['total_ms'] for r in base_rows)
+        summary[profile] = {
+            'total_ms': total_ms,
+            'speedup': base_ms / total_ms if total_ms > 0 else None,
+            'count_mismatches': sum(r['count'] != b['count'] for r, b in zip(rows, base_rows)),
+            'mean_abs_count_error': float(np.mean([abs(r['count'] - b['count'])
+                                                   for r, b in zip(rows, base_rows)])),
+            'multiline_mismatches': sum(r['multiline_count'] != b['multiline_count']
+                                        for r, b in zip(rows, base_rows)),
+        }
+
+    return {'baseline': baseline, 'repeats': repeats, 'images': images, 'summary': summary}
+
+
+def format_report(report):
+    """Karşılaştırma raporunu okunabilir tablo olarak biçimlendirir."""
+    baseline = report['baseline']
+    lines = []
+    for name, profiles in report['images'].items():
+        lines.append(f"== {name}")
+        base = profiles[baseline]
+        for profile, result in profiles.items():
+            stages = ', '.join(f"{stage} {ms:.2f}" for stage, ms in result['stage_ms'].items())
+            lines.append(
+                f"  {profile:<9} sayım {result['count']:>3} (Δ{result['count'] - base['count']:+d})  "
+                f"çoklu {result['multiline_count']:>3} (Δ{result['multiline_count'] - base['multiline_count']:+d})  "
+                f"toplam {result['total_ms']:.2f} ms  [{stages}]"
+            )
+    lines.append("== Özet")
+    for profile, summary in report['summary'].items():
+        lines.append(
+            f"  {profile:<9} toplam {summary['total_ms']:.2f} ms  hızlanma x{summary['speedup']:.2f}  "
+            f"farklı sayım {summary['count_mismatches']}  ort. mutlak hata {summary['mean_abs_count_error']:.2f}  "
+            f"farklı çoklu sayım {summary['multiline_mismatches']}"
+        )
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Filtre profillerinin hız/doğruluk karşılaştırması")
+    parser.add_argument('--assets', default='assets', help="Örnek görüntü klasörü")
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=None)
+    parser.add_argument('--repeats', type=int, default=20, help="Görüntü başına tekrar sayısı")
+    parser.add_argument('--json', help="Raporun yazılacağı JSON dosyası")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = load_samples(args.assets)
+    if not samples:
+        raise SystemExit(f"ROI'si bilinen örnek görüntü bulunamadı: {args.assets}")
+
+    report = compare_profiles(samples, args.profiles, args.repeats)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
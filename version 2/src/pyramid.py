@@ -0,0 +1,296 @@
+# pyramid.py → 18.10.2026
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from core import aggregate_rising, count_edges_multiline, count_vertical_edges, scanline_columns
+from periodicity import MIN_PERIODS, count_periodic
+from pipeline import PROFILES, get_pipeline, resolve_params
+from samples import load_samples
+
+# Kaba seviyede sac adımı en az bu kadar piksel kalmalı (kenarlar birleşmesin)
+MIN_LEVEL_PITCH = 8
+MAX_LEVEL = 4
+# Kaba seviyedeki çekirdek ölçeği (fastest profilindeki Gabor ile aynı); ~7-20 px adımda kararlı.
+# Çekirdekleri seviyeye göre sürekli ölçeklemek Gabor yanıtını kararsızlaştırıyor.
+COARSE_KERNEL_SCALE = 0.5
+# Belirsiz satırlar bu oranı aşarsa bantları tek tek işlemek yerine tam zincir çalışır
+FULL_REFINE_RATIO = 0.5
+# Belirsizlik kararı verilen bantların yüksekliği (adım cinsinden)
+BAND_PITCHES = 4
+# Bir sütundaki kenar dizisi adımın bu oranından uzunsa iki kenar birleşmiş sayılır
+MERGE_RATIO = 0.5
+DEFAULT_SCANLINES = 9
+
+
+def choose_level(pitch, scale=1.0, min_pitch=MIN_LEVEL_PITCH, max_level=MAX_LEVEL):
+    """Tahmini adıma göre pyrDown seviyesini seçer; kaba yol işe yaramıyorsa 0.
+
+    Kaba görüntü, profilin çalışma çözünürlüğünden (resize ölçeği) daha küçük olmalıdır.
+    """
+    if not pitch:
+        return 0
+    level = 0
+    while level < max_level and pitch / 2 ** (level + 1) >= min_pitch:
+        level += 1
+    return level if 2 ** level * scale > 1 else 0
+
+
+def _odd(value, minimum=1):
+    return max(minimum, int(round(value)) | 1)
+
+
+def scale_params(params, factor):
+    """Uzamsal çekirdekleri (blur, bilateral, Gabor, morfoloji) factor ile ölçekler; CLAHE ve Canny aynı kalır."""
+    scaled = dict(params, resize={'scale': 1.0})
+    blur = params['blur']
+    if blur:
+        scaled['blur'] = dict(blur, kernel_size=tuple(_odd(k * factor) for k in blur['kernel_size']))
+    bilateral = params['bilateral']
+    if bilateral:
+        scaled['bilateral'] = dict(bilateral, d=max(1, int(round(bilateral['d'] * factor))),
+                                   sigma_space=bilateral['sigma_space'] * factor)
+    gabor = params['gabor']
+    scaled['gabor'] = dict(gabor, ksize=max(3, int(round(gabor['ksize'] * factor))),
+                           sigma=gabor['sigma'] * factor, lambd=gabor['lambd'] * factor)
+    morphological = params['morphological']
+    if morphological:
+        scaled['morphological'] = dict(morphological,
+                                       erosion_kernel=_odd(morphological['erosion_kernel'] * factor),
+                                       dilation_kernel=_odd(morphological['dilation_kernel'] * factor))
+    return scaled
+
+
+def coarse_pipeline(params=None, profile=None):
+    """Kaba seviye pipeline'ı: çalışma çözünürlüğündeki çekirdeklerin COARSE_KERNEL_SCALE ile küçültülmüşü.
+
+    Çekirdek ölçeği seviyeden bağımsızdır; seviye, kaba görüntüdeki adım bu çekirdeklere uyacak şekilde seçilir.
+    """
+    resolved = resolve_params(params, profile)
+    return get_pipeline(scale_params(resolved, COARSE_KERNEL_SCALE / resolved['resize']['scale']))
+
+
+def _rising(binary):
+    rising = np.empty_like(binary)
+    rising[0] = binary[0]
+    np.greater(binary[1:], binary[:-1], out=rising[1:])
+    return rising
+
+
+def _transitions(binary, mid_column):
+    # Orta sütun sayımı count_vertical_edges gibi kenar piksellerini, çoklu tarama yükselen geçişleri sayar
+    return binary if mid_column else _rising(binary)
+
+
+def _band_starts(binary, band_height):
+    """Bant başlangıçlarını, nominal sınırlardan sonraki ilk kenarsız satıra kaydırarak seçer."""
+    height = binary.shape[0]
+    empty = np.flatnonzero(~binary.any(axis=1))
+    nominal = np.arange(band_height, height, band_height)
+    index = np.searchsorted(empty, nominal)
+    starts = empty[index[index < len(empty)]]
+    return np.unique(np.concatenate(([0], starts)))
+
+
+def _merged_rows(binary, merge_length):
+    """merge_length satırdan uzun kenar dizilerinin bulunduğu satırları işaretler."""
+    cumulative = np.concatenate((np.zeros((1, binary.shape[1]), np.int32), np.cumsum(binary, axis=0, dtype=np.int32)))
+    window = cumulative[merge_length:] - cumulative[:-merge_length]
+    merged = np.zeros(binary.shape[0], bool)
+    merged[:len(window)] = (window == merge_length).any(axis=1)
+    return merged
+
+
+def coarse_count(gray, pitch, level, params=None, profile=None, scanlines=DEFAULT_SCANLINES, aggregate='median',
+                 timings=None):
+    """Kaba seviyede sayar ve bantları belirsiz (sütunlar uyuşmuyor veya kenarlar birleşmiş) olarak işaretler.
+
+    scanlines None ise strip.count_strip gibi orta sütun sayılır; belirsizlik yine DEFAULT_SCANLINES
+    sütunun uyuşmazlığından belirlenir.
+    """
+    coarse = gray
+    for _ in range(level):
+        coarse = cv2.pyrDown(coarse)
+    _, edges = coarse_pipeline(params, profile).detect_edges(coarse, timings)
+    mid_column = scanlines is None
+    columns = scanline_columns(edges.shape[1], DEFAULT_SCANLINES if mid_column else scanlines or None)
+    binary = edges[:, columns] > 0
+    rising = _rising(binary)
+
+    coarse_pitch = pitch / 2 ** level
+    starts = _band_starts(binary, max(8, int(round(BAND_PITCHES * coarse_pitch))))
+    band_rising = np.add.reduceat(rising, starts, axis=0, dtype=np.int32)
+    merged = _merged_rows(binary, max(2, int(round(MERGE_RATIO * coarse_pitch))))
+    ambiguous = (band_rising != band_rising[:, :1]).any(axis=1) | np.add.reduceat(merged, starts).astype(bool)
+
+    if mid_column:
+        columns = np.array([edges.shape[1] // 2])
+        band_counts = np.add.reduceat(_transitions(edges[:, columns] > 0, mid_column), starts, axis=0,
+                                      dtype=np.int32)
+    else:
+        band_counts = band_rising
+
+    result = aggregate_rising(band_counts.sum(axis=0), columns, aggregate)
+    result.update(level=level, pitch=pitch, shape=edges.shape, starts=starts, band_counts=band_counts,
+                  ambiguous=ambiguous, mid_column=mid_column)
+    return result
+
+
+def _ambiguous_runs(starts, ambiguous, height):
+    """Ardışık belirsiz bantları (ilk bant, son bant + 1, satır başı, satır sonu) aralıklarında birleştirir."""
+    ends = np.append(starts[1:], height)
+    runs = []
+    for index in np.flatnonzero(ambiguous):
+        if runs and runs[-1][1] == index:
+            runs[-1] = (runs[-1][0], index + 1, runs[-1][2], ends[index])
+        else:
+            runs.append((index, index + 1, starts[index], ends[index]))
+    return runs
+
+
+def refine_bands(gray, coarse, params=None, profile=None, timings=None):
+    """Belirsiz bantları tam çözünürlükte yeniden işler; bant başına sütun sayımlarını günceller.
+
+    CLAHE tüm görüntüye bağlı olduğu için bir kez tüm görüntüde çalışır (tiled.apply_tiled gibi);
+    sonraki adımlar ve Canny yalnızca halo'lu bant satırlarında çalışır.
+    """
+    band_counts = coarse['band_counts'].copy()
+    runs = _ambiguous_runs(coarse['starts'], coarse['ambiguous'], coarse['shape'][0])
+    if not runs:
+        return band_counts, 0
+
+    pipeline = get_pipeline(params, profile)
+    clahe = pipeline.apply_until('clahe', gray, timings)
+    height, width = clahe.shape
+    coarse_height, coarse_width = coarse['shape']
+    if coarse['mid_column']:
+        columns = np.array([width // 2])
+    else:
+        columns = np.minimum(np.round(coarse['columns'] * width / coarse_width).astype(int), width - 1)
+    halo = pipeline.filter_halo + 2 * pipeline.stage_radius['canny']
+
+    refined_rows = 0
+    for first, last, row_start, row_end in runs:
+        start = int(round(row_start * height / coarse_height))
+        end = int(round(row_end * height / coarse_height))
+        read_start, read_end = max(start - halo, 0), min(end + halo, height)
+        edges = pipeline.edges_after('clahe', clahe[read_start:read_end], timings)
+        # Halo satırları sayesinde bant başındaki geçiş de bir önceki satıra göre belirlenir
+        rising = _transitions(edges[:, columns] > 0, coarse['mid_column'])
+        # Tam çözünürlük sayımı bu bantların tamamının yerine geçer; ilk bant satırına yazılır
+        band_counts[first:last] = 0
+        band_counts[first] = rising[start - read_start:end - read_start].sum(axis=0)
+        refined_rows += end - start
+    return band_counts, refined_rows / height
+
+
+def count_pyramid(gray, params=None, profile=None, scanlines=DEFAULT_SCANLINES, aggregate='median', pitch=None,
+                  on_preview=None, timings=None):
+    """Kaba-ince sayım: pyrDown seviyesinde sayar, yalnızca belirsiz bantları tam çözünürlükte yeniden işler.
+
+    Seviye profil periyodikliğinden tahmin edilen adıma göre seçilir; adım güvenilmezse, kaba seviye
+    gerekmiyorsa veya satırların çoğu belirsizse tam zincir çalışır. on_preview(sonuç) kaba sayım hazır
+    olur olmaz çağrılır. scanlines None ise diğer sayım yolları gibi orta sütun sayılır (uyum None).
+    """
+    resolved = resolve_params(params, profile)
+    if pitch is None and gray.shape[0] >= 2 * MIN_PERIODS:
+        periodic = count_periodic(gray)
+        pitch = periodic['pitch'] if periodic['reliable'] else None
+    level = choose_level(pitch, resolved['resize']['scale'])
+
+    if level == 0:
+        return _full_count(gray, params, profile, scanlines, aggregate, timings, level=0, pitch=pitch, preview=None,
+                           bands=1, refined_bands=1)
+
+    coarse = coarse_count(gray, pitch, level, params, profile, scanlines, aggregate, timings)
+    if on_preview is not None:
+        on_preview(coarse)
+    bands = len(coarse['starts'])
+    refined_bands = int(coarse['ambiguous'].sum())
+    band_heights = np.diff(np.append(coarse['starts'], coarse['shape'][0]))
+    if band_heights[coarse['ambiguous']].sum() > FULL_REFINE_RATIO * coarse['shape'][0]:
+        return _full_count(gray, params, profile, scanlines, aggregate, timings, level=level, pitch=pitch,
+                           preview=coarse['count'], bands=bands, refined_bands=refined_bands)
+
+    band_counts, refined_fraction = refine_bands(gray, coarse, params, profile, timings)
+    result = aggregate_rising(band_counts.sum(axis=0), coarse['columns'], aggregate)
+    result.update(level=level, pitch=pitch, preview=coarse['count'], bands=bands, refined_bands=refined_bands,
+                  refined_fraction=refined_fraction)
+    if scanlines is None:
+        result['agreement'] = None
+    return result
+
+
+def _full_count(gray, params, profile, scanlines, aggregate, timings, **info):
+    _, edges = get_pipeline(params, profile).detect_edges(gray, timings)
+    if scanlines is None:
+        result = {'count': count_vertical_edges(edges), 'agreement': None}
+    else:
+        result = count_edges_multiline(edges, scanlines or None, aggregate)
+    result.update(info, refined_fraction=1.0)
+    return result
+
+
+def preview_count(gray, params=None, profile=None, scanlines=DEFAULT_SCANLINES, aggregate='median'):
+    """Yalnızca kaba seviye sayımı (anlık önizleme); kaba seviye seçilemezse None."""
+    if gray.shape[0] < 2 * MIN_PERIODS:
+        return None
+    periodic = count_periodic(gray)
+    level = choose_level(periodic['pitch'] if periodic['reliable'] else None,
+                         resolve_params(params, profile)['resize']['scale'])
+    if level == 0:
+        return None
+    return coarse_count(gray, periodic['pitch'], level, params, profile, scanlines, aggregate)
+
+
+def compare_full(samples, profile=None, scanlines=DEFAULT_SCANLINES, repeats=10):
+    """Örneklerde kaba-ince sayımı tam çözünürlük sayımıyla karşılaştırır ve sürelerini ölçer."""
+    pipeline = get_pipeline(profile=profile)
+
+    def median_ms(fn):
+        fn()
+        samples_s = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = fn()
+            samples_s.append(time.perf_counter() - start)
+        return result, float(np.median(samples_s)) * 1000
+
+    rows = []
+    for name, gray in samples:
+        full, full_ms = median_ms(lambda: count_edges_multiline(pipeline.detect_edges(gray)[1], scanlines or None))
+        preview, preview_ms = median_ms(lambda: preview_count(gray, profile=profile, scanlines=scanlines))
+        pyramid, pyramid_ms = median_ms(lambda: count_pyramid(gray, profile=profile, scanlines=scanlines))
+        rows.append({'name': name, 'full': full['count'], 'full_ms': full_ms,
+                     'preview': preview['count'] if preview else None, 'preview_ms': preview_ms,
+                     'pyramid': pyramid['count'], 'pyramid_ms': pyramid_ms, 'level': pyramid['level'],
+                     'refined_bands': pyramid['refined_bands'], 'bands': pyramid['bands'],
+                     'refined_fraction': pyramid['refined_fraction']})
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Kaba-ince (piramit) sayım: tam çözünürlük sayımıyla karşılaştırma")
+    parser.add_argument('--assets', default='assets', help="Örnek görüntü klasörü")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=None)
+    parser.add_argument('--scanlines', type=int, default=DEFAULT_SCANLINES, help="Tarama çizgisi sayısı (0: tüm sütunlar)")
+    parser.add_argument('--repeats', type=int, default=10)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    samples = load_samples(args.assets)
+    if not samples:
+        raise SystemExit(f"ROI'si bilinen örnek görüntü bulunamadı: {args.assets}")
+    for row in compare_full(samples, args.profile, args.scanlines, args.repeats):
+        preview = f"{row['preview']} ({row['preview_ms']:.1f} ms)" if row['preview'] is not None else '-'
+        print(f"{row['name']:<8} tam {row['full']:>3} ({row['full_ms']:.1f} ms)  önizleme {preview}  "
+              f"piramit {row['pyramid']:>3} ({row['pyramid_ms']:.1f} ms, seviye {row['level']}, "
+              f"{row['refined_bands']}/{row['bands']} bant, %{row['refined_fraction'] * 100:.0f} satır yeniden)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# result_cache.py → 18.10.2026
+import argparse
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.util import Finalize
+
+import numpy as np
+
+from pipeline import freeze_params, resolve_params
+
+# Sayım/filtre algoritması değiştiğinde artırılır; eski kayıtlar kendiliğinden geçersiz olur
+CACHE_VERSION = 3
+RESULT_CACHE_SIZE = 64
+DISK_CACHE_BYTES = 256 * 1024 * 1024
+HASH_CHUNK = 1 << 20
+# Disk isabetlerinin erişim zamanları biriktirilir; bu kadar birikince tek işlemde yazılır
+ACCESS_FLUSH_SIZE = 64
+
+
+def hash_array(array):
+    """Piksel içeriğinin (şekil ve tür dahil) hızlı özeti; görünümler de desteklenir."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{array.shape}{array.dtype.str}'.encode())
+    digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()
+
+
+def hash_file(path):
+    """Kodlanmış dosya içeriğinin özeti; isabet durumunda görüntü hiç çözülmez."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def result_key(content, roi=None, params=None, profile=None, **options):
+    """İçerik özeti, ROI, tam parametre seti (varsayılanlar dahil) ve seçeneklerden kayıt anahtarı üretir."""
+    parts = (CACHE_VERSION, content, tuple(roi) if roi is not None else None,
+             freeze_params(resolve_params(params, profile)), freeze_params(options))
+    return hashlib.blake2b(repr(parts).encode(), digest_size=20).hexdigest()
+
+
+def _pack_arrays(arrays):
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _unpack_arrays(blob):
+    with np.load(io.BytesIO(blob)) as data:
+        return {name: data[name] for name in data.files}
+
+
+class DiskTier:
+    """SQLite üzerinde kalıcı katman: meta JSON, diziler sıkıştırılmış npz; boyuta göre LRU tahliye.
+
+    İsabetler her seferinde yazma yapmaz; erişim zamanları tahliyeden önce, kapanışta veya
+    ACCESS_FLUSH_SIZE kadar birikince toplu güncellenir.
+    """
+
+    def __init__(self, path, max_bytes=DISK_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # Toplu işlemdeki süreçler aynı dosyayı eşzamanlı kullanabilir
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, meta TEXT NOT NULL, arrays BLOB, size INTEGER NOT NULL, accessed REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+        self._conn.commit()
+        self._accessed = {}
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT meta, arrays FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= ACCESS_FLUSH_SIZE:
+                self._flush_accessed()
+                self._conn.commit()
+        meta, blob = row
+        return {'meta': json.loads(meta), 'arrays': _unpack_arrays(blob) if blob else {}}
+
+    def put(self, key, meta, arrays=None):
+        meta = json.dumps(meta)
+        blob = _pack_arrays(arrays) if arrays else None
+        size = len(meta) + (len(blob) if blob else 0)
+        with self._lock:
+            self._accessed.pop(key, None)
+            self._conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                               (key, meta, blob, size, time.time()))
+            self._evict()
+            self._conn.commit()
+
+    def _flush_accessed(self):
+        if self._accessed:
+            self._conn.executemany('UPDATE results SET accessed = ? WHERE key = ?',
+                                   [(accessed, key) for key, accessed in self._accessed.items()])
+            self._accessed.clear()
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Tahliye sırası son erişimlere göre belirlenmeli
+        self._flush_accessed()
+        for key, size in self._conn.execute('SELECT key, size FROM results ORDER BY accessed').fetchall():
+            self._conn.execute('DELETE FROM results WHERE key = ?', (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        return {'entries': entries, 'bytes': total, 'evictions': self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._accessed.clear()
+            self._conn.execute('DELETE FROM results')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush_accessed()
+            self._conn.commit()
+            self._conn.close()
+
+
+class ResultCache:
+    """İçerik adresli analiz sonucu önbelleği: sınırlı bellek LRU katmanı ve isteğe bağlı SQLite katmanı.
+
+    Kayıt {'meta': JSON'a uygun sözlük, 'arrays': {ad: ndarray}} biçimindedir. Bellekteki diziler salt
+    okunur kopyalardır (çağıranın dizilerine dokunulmaz); diskten okunan kayıt bellek katmanına yükseltilir.
+    """
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, path=None, max_bytes=DISK_CACHE_BYTES):
+        self.maxsize = maxsize
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk = DiskTier(path, max_bytes) if path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, entry):
+        # Diziler önbelleğe aittir (store kopyalar, diskten okunanlar yenidir); yerinde salt okunur yapılır
+        for array in entry['arrays'].values():
+            array.flags.writeable = False
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def lookup(self, key):
+        """Kaydı ve geldiği katmanı ('memory', 'disk') döndürür; yoksa (None, None)."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry, 'memory'
+        entry = self.disk.get(key) if self.disk is not None else None
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None, None
+        self._remember(key, entry)
+        with self._lock:
+            self.disk_hits += 1
+        return entry, 'disk'
+
+    def store(self, key, meta, arrays=None):
+        """Kaydı bellek katmanına ve (varsa) disk katmanına yazar."""
+        arrays = {name: np.array(array) for name, array in (arrays or {}).items()}
+        if self.disk is not None:
+            self.disk.put(key, meta, arrays)
+        self._remember(key, {'meta': meta, 'arrays': arrays})
+
+    def stats(self):
+        """İsabet/ıskalama sayıları, isabet oranı ve katman doluluğu."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else None,
+                'memory_entries': len(self._memory),
+            }
+        if self.disk is not None:
+            stats['disk'] = self.disk.stats()
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = self.disk_hits = self.misses = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+
+_process_caches = {}
+
+
+def get_result_cache(path=None):
+    """Süreç başına paylaşılan önbellek (toplu işlem işçileri her görevde yeniden bağlanmaz)."""
+    key = os.path.abspath(path) if path else None
+    if key not in _process_caches:
+        cache = _process_caches[key] = ResultCache(path=path)
+        if cache.disk is not None:
+            # Biriken erişim zamanları süreç kapanırken yazılır; atexit işçi süreçlerde çalışmadığı için
+            # multiprocessing sonlandırıcısı kullanılır (ana süreçte de çıkışta çağrılır)
+            Finalize(cache, cache.close, exitpriority=10)
+    return _process_caches[key]
+
+
+def format_stats(stats):
+    hit_rate = f"%{stats['hit_rate'] * 100:.0f}" if stats['hit_rate'] is not None else '-'
+    line = (f"Önbellek: {stats['memory_hits']} bellek + {stats['disk_hits']} disk isabeti, "
+            f"{stats['misses']} ıskalama (isabet {hit_rate})")
+    if 'disk' in stats:
+        disk = stats['disk']
+        line += f"; disk {disk['entries']} kayıt, {disk['bytes'] / 1024:.0f} KB, {disk['evictions']} tahliye"
+    return line
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sonuç önbelleği dosyasını inceler veya temizler")
+    parser.add_argument('path', help="SQLite önbellek dosyası")
+    parser.add_argument('--clear', action='store_true', help="Tüm kayıtları sil")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.path):
+        raise SystemExit(f"Önbellek dosyası bulunamadı: {args.path}")
+    disk = DiskTier(args.path)
+    if args.clear:
+        disk.clear()
+    stats = disk.stats()
+    print(f"{args.path}: {stats['entries']} kayıt, {stats['bytes'] / 1024:.0f} KB "
+          f"(sınır {disk.max_bytes / 1024 / 1024:.0f} MB)")
+    disk.close()
+
+
+if __name__ == "__main__":
+    main()
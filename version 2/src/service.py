@@ -0,0 +1,439 @@
+# service.py → 18.10.2026
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+from core import EnhancedGaborDetector, count_edges_multiline, count_vertical_edges
+from multi_roi import crop_roi, normalize_rois
+from pipeline import PROFILES, get_pipeline
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BATCH = 8
+# İlk isteğin gruba başka istek katılması için en fazla beklediği süre
+MAX_WAIT_MS = 5.0
+# Bekleyen istek sınırı; aşılırsa 503 döner (istemci yeniden dener)
+MAX_QUEUE = 64
+# İşçi başına havuza gönderilmiş en fazla grup sayısı; fazlası bekleme kuyruğunda birikip birleşir
+INFLIGHT_PER_WORKER = 2
+MAX_BODY_BYTES = 64 * 1024 * 1024
+STATS_WINDOW = 1000
+
+
+class QueueFull(Exception):
+    """Bekleyen istek sınırı aşıldığında fırlatılır."""
+
+
+def _init_worker(opencv_threads):
+    """İşçi süreci ısıtır: OpenCV iş parçacıkları, derlenmiş pipeline ve ilk çağrı maliyetleri."""
+    if opencv_threads is not None:
+        cv2.setNumThreads(opencv_threads)
+    gray = np.random.default_rng(0).integers(0, 256, (256, 64), dtype=np.uint8)
+    get_pipeline().detect_edges(EnhancedGaborDetector(gray).image)
+
+
+def _decode(item):
+    data = item['data']
+    if item['shape'] is not None:
+        shape = tuple(item['shape'])
+        if len(data) != int(np.prod(shape)):
+            raise ValueError(f"Ham çerçeve boyutu uyuşmuyor: {len(data)} bayt, beklenen {shape}")
+        return np.frombuffer(data, np.uint8).reshape(shape)
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError("Görüntü çözülemedi")
+    return image
+
+
+def _encode_png(image):
+    ok, encoded = cv2.imencode('.png', image)
+    return base64.b64encode(encoded.tobytes()).decode('ascii') if ok else None
+
+
+def process_item(item):
+    """Tek isteği işler: çözme, ROI başına dedektör, filtre zinciri ve sayım."""
+    start = time.perf_counter()
+    image = _decode(item)
+    height, width = image.shape[:2]
+    rois = normalize_rois(item['rois']) if item['rois'] else [('image', (0, 0, width, height))]
+    pipeline = get_pipeline(item['params'], item['profile'])
+
+    rows = []
+    for name, roi in rois:
+        detector = EnhancedGaborDetector(crop_roi(image, roi))
+        processed, edges = pipeline.detect_edges(detector.image)
+        row = {'name': name, 'roi': list(roi), 'roi_width': edges.shape[1], 'roi_height': edges.shape[0],
+               'agreement': None}
+        if item['scanlines'] is None:
+            row['edge_count'] = int(count_vertical_edges(edges))
+        else:
+            multiline = count_edges_multiline(edges, item['scanlines'] or None, item['aggregate'])
+            row['edge_count'] = multiline['count']
+            row['agreement'] = multiline['agreement']
+        if item['debug']:
+            row['debug'] = {'processed_png': _encode_png(processed), 'edges_png': _encode_png(edges)}
+        rows.append(row)
+    return {'rois': rows, 'process_ms': (time.perf_counter() - start) * 1000}
+
+
+def process_batch(items):
+    """Bir mikro grubu işçi süreçte sırayla işler; hatalı istek diğerlerini etkilemez."""
+    results = []
+    for item in items:
+        try:
+            results.append(process_item(item))
+        except Exception as e:
+            results.append({'error': str(e)})
+    return results
+
+
+class MicroBatcher:
+    """Eşzamanlı istekleri kısa bir pencerede toplayıp süreç havuzuna tek görev olarak gönderir.
+
+    Grup, MAX_BATCH isteğe ulaşınca veya ilk isteğin bekleme süresi dolunca gönderilir. Havuzda
+    max_inflight grup varken yeni grup gönderilmez; bekleyen istekler bu sürede birleşir ve
+    bekleme kuyruğu max_queue'yu aşarsa yeni istek reddedilir.
+    """
+
+    def __init__(self, executor, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, max_queue=MAX_QUEUE,
+                 max_inflight=2, on_batch=None):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.on_batch = on_batch
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._inflight = threading.BoundedSemaphore(max_inflight)
+        self._inflight_count = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='MicroBatcher', daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self):
+        """Henüz havuza gönderilmemiş istek sayısı."""
+        with self._cond:
+            return len(self._pending)
+
+    @property
+    def inflight(self):
+        with self._cond:
+            return self._inflight_count
+
+    def submit(self, item):
+        """İsteği sıraya koyar; sonucu taşıyan Future döndürür."""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Servis kapatıldı")
+            if len(self._pending) >= self.max_queue:
+                raise QueueFull(f"Bekleyen istek sınırı aşıldı ({self.max_queue})")
+            self._pending.append((item, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _collect(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._inflight.acquire()
+            with self._cond:
+                self._inflight_count += 1
+            dispatched = time.perf_counter()
+            try:
+                task = self.executor.submit(process_batch, [item for item, _, _ in batch])
+            except Exception as e:
+                # Bozulmuş havuz gönderimi de reddeder; gruplayıcı ölmesin, istekler hatayla dönsün
+                task = Future()
+                task.set_exception(e)
+            task.add_done_callback(partial(self._complete, batch, dispatched))
+
+    def _complete(self, batch, dispatched, task):
+        with self._cond:
+            self._inflight_count -= 1
+        self._inflight.release()
+        if self.on_batch is not None:
+            self.on_batch(len(batch))
+        try:
+            results = task.result()
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        for (_, future, queued), result in zip(batch, results):
+            result.update(batch_size=len(batch), queue_ms=(dispatched - queued) * 1000)
+            future.set_result(result)
+
+
+class ServiceStats:
+    """İstek sayaçları, gecikme yüzdelikleri ve grup boyutları (kayan pencere)."""
+
+    def __init__(self, window=STATS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.perf_counter()
+            self.requests = 0
+            self.errors = 0
+            self.rejected = 0
+            self.latencies_ms = deque(maxlen=self.window)
+            self.queue_ms = deque(maxlen=self.window)
+            self.process_ms = deque(maxlen=self.window)
+            self.batch_sizes = deque(maxlen=self.window)
+
+    def record(self, latency_ms, result):
+        with self._lock:
+            self.requests += 1
+            self.latencies_ms.append(latency_ms)
+            if 'error' in result:
+                self.errors += 1
+                return
+            self.queue_ms.append(result['queue_ms'])
+            self.process_ms.append(result['process_ms'])
+
+    def record_batch(self, size):
+        with self._lock:
+            self.batch_sizes.append(size)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self.latencies_ms)
+            queue_ms = np.array(self.queue_ms)
+            process_ms = np.array(self.process_ms)
+            batch_sizes = np.array(self.batch_sizes)
+            counts = {'requests': self.requests, 'errors': self.errors, 'rejected': self.rejected}
+
+        def percentiles(values):
+            if not len(values):
+                return None
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99), 'max': float(values.max())}
+
+        return dict(counts, uptime_s=time.perf_counter() - self.started_at,
+                    latency_ms=percentiles(latencies), queue_ms=percentiles(queue_ms),
+                    process_ms=percentiles(process_ms),
+                    batch_size_mean=float(batch_sizes.mean()) if len(batch_sizes) else None,
+                    batch_size_max=int(batch_sizes.max()) if len(batch_sizes) else None)
+
+
+class CountingService:
+    """Isıtılmış dedektör işçilerinden oluşan süreç havuzu ve önündeki mikro gruplayıcı."""
+
+    def __init__(self, workers=None, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, max_queue=MAX_QUEUE,
+                 opencv_threads=1):
+        self.workers = workers or os.cpu_count() or 1
+        # Sunucu iş parçacıkları varken fork güvenli değil; işçiler spawn ile başlatılır
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_init_worker, initargs=(opencv_threads,))
+        # Tüm işçiler ilk istekten önce ayağa kalkar ve ısınır
+        for future in [self.executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        self.stats = ServiceStats()
+        self.batcher = MicroBatcher(self.executor, max_batch, max_wait_ms, max_queue,
+                                    self.workers * INFLIGHT_PER_WORKER, self.stats.record_batch)
+
+    def count(self, item, timeout=None):
+        """İsteği gruplayıcıya verir ve sonucunu bekler (HTTP iş parçacığında çağrılır)."""
+        start = time.perf_counter()
+        try:
+            future = self.batcher.submit(item)
+        except QueueFull:
+            self.stats.reject()
+            raise
+        try:
+            result = future.result(timeout)
+        except Exception as e:
+            # Zaman aşımı veya işçi hatası (ör. BrokenProcessPool) da hata olarak sayılır
+            self.stats.record((time.perf_counter() - start) * 1000, {'error': str(e)})
+            raise
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.stats.record(latency_ms, result)
+        return dict(result, latency_ms=latency_ms)
+
+    def snapshot(self):
+        return dict(self.stats.snapshot(), queue_depth=self.batcher.depth, inflight_batches=self.batcher.inflight,
+                    workers=self.workers, max_batch=self.batcher.max_batch,
+                    max_wait_ms=self.batcher.max_wait * 1000)
+
+    def close(self):
+        self.batcher.close()
+        self.executor.shutdown()
+
+
+def _parse_roi(value):
+    name, _, coords = value.rpartition(':')
+    values = [int(v) for v in coords.split(',')]
+    return (name, values) if name else values
+
+
+def parse_request(query, content_type, body):
+    """Sorgu parametreleri ve gövdeden işçiye gidecek isteği oluşturur.
+
+    Gövde kodlanmış görüntü (JPEG/PNG) veya width/height(/channels) verilmişse ham uint8 çerçevedir.
+    roi=[ad:]x1,y1,x2,y2 tekrarlanabilir; verilmezse tüm görüntü sayılır.
+    """
+    def single(name, default=None, cast=str):
+        values = query.get(name)
+        return cast(values[-1]) if values else default
+
+    shape = None
+    if 'width' in query or content_type == 'application/x-raw':
+        channels = single('channels', 1, int)
+        shape = (single('height', cast=int), single('width', cast=int)) + ((channels,) if channels > 1 else ())
+        if None in shape:
+            raise ValueError("Ham çerçeve için width ve height gerekli")
+    profile = single('profile')
+    if profile is not None and profile not in PROFILES:
+        raise ValueError(f"Bilinmeyen profil: {profile}")
+    aggregate = single('aggregate', 'median')
+    if aggregate not in ('median', 'mode'):
+        raise ValueError(f"Geçersiz birleştirme yöntemi: {aggregate}")
+    rois = [_parse_roi(value) for value in query.get('roi', [])]
+    return {
+        'data': body,
+        'shape': shape,
+        'rois': normalize_rois(rois) if rois else None,
+        'params': {'canny': {'low': single('canny_low', 50, int), 'high': single('canny_high', 150, int)}},
+        'profile': profile,
+        'scanlines': single('scanlines', None, int),
+        'aggregate': aggregate,
+        'debug': single('debug', '0') not in ('0', 'false', ''),
+    }
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """POST /count (görüntü gövdesi), GET /stats ve GET /health uç noktaları."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/stats':
+            self._send_json(200, self.server.service.snapshot())
+        elif path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"Bilinmeyen yol: {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/count':
+            self._send_json(404, {'error': f"Bilinmeyen yol: {url.path}"})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        if not 0 < length <= MAX_BODY_BYTES:
+            self._send_json(400, {'error': f"Geçersiz gövde boyutu: {length}"})
+            return
+        body = self.rfile.read(length)
+        try:
+            item = parse_request(parse_qs(url.query), self.headers.get('Content-Type', ''), body)
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        try:
+            result = self.server.service.count(item, self.server.request_timeout)
+        except QueueFull as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        except TimeoutError:
+            self._send_json(504, {'error': f"İstek {self.server.request_timeout:g} s içinde tamamlanmadı"})
+            return
+        except Exception as e:
+            # İstemci bağlantısı yanıtsız kopmasın; işçi tarafı hatalar da JSON olarak döner
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+        self._send_json(400 if 'error' in result else 200, result)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, request_timeout=30.0, verbose=False):
+    """Servisi sunan HTTP sunucusunu oluşturur (port=0: boş bir port seçilir)."""
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.request_timeout = request_timeout
+    server.verbose = verbose
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Yerel HTTP sayım servisi (mikro gruplama, ısınmış işçi havuzu)")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Dinlenecek adres (varsayılan yalnızca yerel)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=None, help="İşçi süreç sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH, help="Mikro grup başına en fazla istek")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS, help="Grup dolması için en fazla bekleme")
+    parser.add_argument('--max-queue', type=int, default=MAX_QUEUE, help="Bekleyen istek sınırı (aşılırsa 503)")
+    parser.add_argument('--verbose', action='store_true', help="Her isteği günlüğe yaz")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = CountingService(args.workers, args.max_batch, args.max_wait_ms, args.max_queue)
+    server = create_server(service, args.host, args.port, verbose=args.verbose)
+    print(f"Servis http://{args.host}:{server.server_port} adresinde ({service.workers} işçi); "
+          f"örnek: curl --data-binary @assets/1.jpg 'http://{args.host}:{server.server_port}/count?roi=337,386,445,1173'")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# startup.py → 18.10.2026
+# Spawn ile başlayan işçiler bu modülü yeniden içe aktarır; ölçümü bozmamak için
+# modül düzeyinde yalnızca standart kütüphane yüklenir.
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Soğuk içe aktarma süresi ölçülen modüller (main Kivy'yi yükler)
+IMPORT_MODULES = ['core', 'set_filters', 'batch', 'stream', 'main']
+HEAVY_MODULES = ('matplotlib', 'kivy')
+
+_IMPORT_SCRIPT = '''
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+_FIRST_FRAME_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+import cv2
+from core import count_vertical_edges
+from pipeline import get_pipeline
+imported = time.perf_counter()
+gray = cv2.imread({image!r}, cv2.IMREAD_GRAYSCALE)
+if gray is None:
+    import numpy as np
+    gray = np.random.default_rng(0).integers(0, 256, (787, 108), dtype=np.uint8)
+else:
+    x1, y1, x2, y2 = {roi!r}
+    gray = gray[y1:y2, x1:x2].copy()
+loaded = time.perf_counter()
+count_vertical_edges(get_pipeline().detect_edges(gray)[1])
+first = time.perf_counter()
+count_vertical_edges(get_pipeline().detect_edges(gray)[1])
+second = time.perf_counter()
+print(json.dumps({{'import': imported - start, 'load': loaded - imported, 'first_frame': first - loaded,
+                  'warm_frame': second - first, 'ready': first - start}}))
+'''
+
+
+def _run_python(code, env=None):
+    """Kodu yeni bir Python sürecinde src klasöründe çalıştırır; son satırdaki JSON'u ve duvar süresini döndürür."""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, env=env, capture_output=True,
+                               text=True, check=True)
+    wall = time.perf_counter() - start
+    return json.loads(completed.stdout.strip().splitlines()[-1]), wall
+
+
+def _gui_env():
+    env = dict(os.environ, KIVY_NO_ARGS='1', KIVY_NO_CONSOLELOG='1', KIVY_NO_FILELOG='1')
+    env['PYTHONPATH'] = SRC_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+
+def measure_imports(modules=IMPORT_MODULES, repeats=5):
+    """Her modülün yeni süreçte soğuk içe aktarma süresini ve yüklediği ağır paketleri ölçer."""
+    samples = {}
+    loaded = {}
+    env = _gui_env()
+    for module in modules:
+        samples[module] = []
+        for _ in range(repeats):
+            result, _ = _run_python(_IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES), env)
+            samples[module].append(result['seconds'])
+            loaded[module] = result['loaded']
+    # Yorumlayıcının kendi açılış süresi (karşılaştırma için)
+    samples['python'] = [_run_python('print(0)', env)[1] for _ in range(repeats)]
+    return samples, loaded
+
+
+def measure_first_frame(image='../assets/1.jpg', roi=(337, 386, 445, 1173), repeats=5):
+    """Yeni süreçte içe aktarmadan ilk sayıma kadar geçen süreyi ve ısınmış ikinci çerçeveyi ölçer."""
+    samples = {}
+    for _ in range(repeats):
+        result, _ = _run_python(_FIRST_FRAME_SCRIPT.format(image=image, roi=roi), _gui_env())
+        for name, seconds in result.items():
+            samples.setdefault(name, []).append(seconds)
+    return samples
+
+
+def measure_worker_spawn(contexts=None, workers=2, repeats=3, image='../assets/1.jpg',
+                         roi=(337, 386, 445, 1173)):
+    """Süreç havuzunun ilk boş göreve ve ilk gerçek sayıma yanıt verme süresini ölçer."""
+    contexts = contexts or multiprocessing.get_all_start_methods()
+    image = os.path.join(SRC_DIR, image)
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    from batch import count_image, init_worker
+
+    samples = {}
+    for method in contexts:
+        context = multiprocessing.get_context(method)
+        for _ in range(repeats):
+            start = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker,
+                                     initargs=(1,)) as executor:
+                executor.submit(os.getpid).result()
+                ready = time.perf_counter()
+                executor.submit(count_image, image, roi).result()
+                counted = time.perf_counter()
+            samples.setdefault(f'{method}_first_task', []).append(ready - start)
+            samples.setdefault(f'{method}_first_count', []).append(counted - start)
+    return samples
+
+
+def _stats(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    median = values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+    return {
+        'median_ms': median * 1000,
+        'p95_ms': values[min(len(values) - 1, round(0.95 * (len(values) - 1)))] * 1000,
+        'max_ms': values[-1] * 1000,
+    }
+
+
+def run_startup(repeats=5, spawn_repeats=3, contexts=None):
+    """Tüm başlangıç ölçümlerini benchmark.py ile aynı rapor biçiminde döndürür."""
+    imports, loaded = measure_imports(repeats=repeats)
+    results = {
+        'cold_import': {'stages': {name: _stats(values) for name, values in imports.items()},
+                        'heavy_modules': loaded},
+        'first_frame': {'stages': {name: _stats(values)
+                                   for name, values in measure_first_frame(repeats=repeats).items()}},
+        'worker_spawn': {'stages': {name: _stats(values) for name, values
+                                    in measure_worker_spawn(contexts, repeats=spawn_repeats).items()}},
+    }
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeats': repeats,
+        },
+        'results': results,
+    }
+
+
+def format_startup(report):
+    lines = []
+    for case, result in report['results'].items():
+        lines.append(f"== {case}")
+        for stage, stats in result['stages'].items():
+            heavy = result.get('heavy_modules', {}).get(stage)
+            extra = f"  [{', '.join(heavy)}]" if heavy else ''
+            lines.append(f"  {stage:<24} medyan {stats['median_ms']:9.1f} ms  en fazla {stats['max_ms']:9.1f} ms{extra}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Açılış süresi: soğuk içe aktarma, ilk çerçeve ve işçi başlatma")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--spawn-repeats', type=int, default=3)
+    parser.add_argument('--contexts', nargs='+', default=None,
+                        help="Ölçülecek süreç başlatma yöntemleri (varsayılan: platformdaki tümü)")
+    parser.add_argument('--save', help="Sonuçların baseline olarak yazılacağı JSON dosyası")
+    parser.add_argument('--compare', help="Karşılaştırılacak baseline JSON dosyası")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Regresyon sayılacak göreli yavaşlama (0.25 = %%25)")
+    parser.add_argument('--min-delta-ms', type=float, default=20.0,
+                        help="Regresyon için gereken en küçük mutlak fark (ms)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_startup(args.repeats, args.spawn_repeats, args.contexts)
+    print(format_startup(report))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        from benchmark import compare_results, format_comparison
+
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare_results(report, baseline, args.threshold, args.min_delta_ms)
+        print(format_comparison(rows))
+        if any(row['status'] == 'regression' for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# tiled.py → 18.10.2026
+import argparse
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from pipeline import PROFILES, get_pipeline
+
+# Halo ek yükünün karo boyutuna oranını sınırlamak için en küçük karo yüksekliği
+MIN_TILE_HEIGHT = 128
+# İş yükü dengesi için çekirdek başına karo sayısı
+TILES_PER_WORKER = 2
+
+
+def _create_executor(workers):
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tile')
+
+
+# İş parçacığı sayısı başına tek havuz; havuzlar çıkarılmaz, böylece hiçbiri kapatılmadan sızmaz
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(workers=None):
+    """İş parçacığı sayısına göre paylaşılan karo havuzunu döndürür (her çağrıda yeniden kurulmaz)."""
+    workers = workers or os.cpu_count() or 1
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = _executors[workers] = _create_executor(workers)
+        return executor
+
+
+def tile_bounds(height, tile_height, halo):
+    """Satır bantlarını (okuma başı, okuma sonu, çekirdek başı, çekirdek sonu) olarak döndürür.
+
+    Çekirdekler görüntüyü örtüşmeden kaplar; okuma aralığı çekirdeği her iki yanda halo kadar genişletir.
+    """
+    bounds = []
+    for start in range(0, height, tile_height):
+        end = min(start + tile_height, height)
+        bounds.append((max(start - halo, 0), min(end + halo, height), start, end))
+    return bounds
+
+
+def default_tile_height(height, workers):
+    return max(MIN_TILE_HEIGHT, math.ceil(height / (workers * TILES_PER_WORKER)))
+
+
+def _process_tile(pipeline, source, output, bounds):
+    read_start, read_end, start, end = bounds
+    filtered = pipeline.apply_after('clahe', source[read_start:read_end])
+    output[start:end] = filtered[start - read_start:end - read_start]
+
+
+def apply_tiled(pipeline, gray, workers=None, tile_height=None, timings=None):
+    """Filtre zincirini satır bantlarına bölerek iş parçacığı havuzunda uygular.
+
+    Yeniden boyutlandırma ve CLAHE (karo histogramları tüm görüntüye bağlı) bütün görüntüde çalışır;
+    sonraki adımlar halo'lu bantlarda işlenir ve çekirdekler önceden ayrılmış çıktıya yazılır.
+    Sonuç pipeline.apply ile bit düzeyinde aynıdır.
+    """
+    workers = workers or os.cpu_count() or 1
+    image = pipeline.apply_until('clahe', gray, timings)
+    height = image.shape[0]
+    tile_height = tile_height or default_tile_height(height, workers)
+    bounds = tile_bounds(height, tile_height, pipeline.filter_halo)
+    if len(bounds) == 1:
+        return pipeline.apply_after('clahe', image, timings)
+
+    start = time.perf_counter()
+    output = np.empty_like(image)
+    executor = get_executor(workers)
+    # Bantlar çıktının ayrık satırlarına yazar; kilit gerekmez
+    for future in [executor.submit(_process_tile, pipeline, image, output, b) for b in bounds]:
+        future.result()
+    if timings is not None:
+        timings['tiles'] = timings.get('tiles', 0.0) + time.perf_counter() - start
+    return output
+
+
+def detect_edges_tiled(pipeline, gray, workers=None, tile_height=None, timings=None):
+    """apply_tiled ve tüm görüntüde Canny; pipeline.detect_edges ile aynı (işlenmiş, kenarlar) çıktısı."""
+    processed = apply_tiled(pipeline, gray, workers, tile_height, timings)
+    edges = pipeline.canny(processed, timings)
+    return processed, edges
+
+
+def verify_tiled(cases=60, profiles=None, seed=0, workers=4):
+    """Rastgele boyut, karo yüksekliği ve profillerde karolu çıktıyı tam yolla karşılaştırır."""
+    rng = np.random.default_rng(seed)
+    profiles = profiles or list(PROFILES)
+    mismatches = []
+    for case in range(cases):
+        height = int(rng.integers(40, 1500))
+        width = int(rng.integers(20, 400))
+        # Yumuşatılmış gürültü + dikey çizgiler: gerçek sac kenarlarına benzer doku
+        gray = cv2.GaussianBlur(rng.integers(0, 256, (height, width), dtype=np.uint8), (5, 5), 0)
+        gray[:, ::int(rng.integers(4, 12))] = 255
+        pipeline = get_pipeline(profile=profiles[case % len(profiles)])
+        tile_height = int(rng.integers(1, max(2, height // 2)))
+        expected = pipeline.detect_edges(gray)
+        actual = detect_edges_tiled(pipeline, gray, workers, tile_height)
+        if any(not np.array_equal(a, b) for a, b in zip(expected, actual)):
+            mismatches.append({'case': case, 'shape': (height, width), 'tile_height': tile_height,
+                               'profile': profiles[case % len(profiles)]})
+    return mismatches
+
+
+def measure_scaling(shape=(4096, 1024), worker_counts=None, repeats=5, profile=None, seed=0):
+    """Tam yol ve farklı iş parçacığı sayılarında karolu yol için medyan süreleri (ms) ölçer."""
+    cpu_count = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, 4, cpu_count})
+    gray = np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+    pipeline = get_pipeline(profile=profile)
+
+    def median_ms(fn):
+        fn()
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        return float(np.median(samples)) * 1000
+
+    # Karşılaştırma adil olsun diye OpenCV'nin kendi iş parçacıkları kapatılır
+    previous = cv2.getNumThreads()
+    cv2.setNumThreads(1)
+    try:
+        untiled = median_ms(lambda: pipeline.detect_edges(gray))
+        rows = []
+        for workers in worker_counts:
+            elapsed = median_ms(lambda: detect_edges_tiled(pipeline, gray, workers))
+            rows.append({'workers': workers, 'ms': elapsed, 'speedup': untiled / elapsed,
+                         'efficiency': untiled / elapsed / min(workers, cpu_count)})
+    finally:
+        cv2.setNumThreads(previous)
+    return {'cpu_count': cpu_count, 'shape': shape, 'untiled_ms': untiled, 'rows': rows}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Karolu filtre zinciri: eşdeğerlik kontrolü ve ölçekleme ölçümü")
+    parser.add_argument('--cases', type=int, default=60, help="Eşdeğerlik kontrolündeki rastgele durum sayısı")
+    parser.add_argument('--shape', type=int, nargs=2, default=(4096, 1024), metavar=('H', 'W'),
+                        help="Ölçekleme ölçümündeki görüntü boyutu")
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help="Ölçülecek iş parçacığı sayıları (varsayılan: 1, 2, 4, çekirdek sayısı)")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=None)
+    parser.add_argument('--verify-only', action='store_true', help="Yalnızca eşdeğerlik kontrolü (ölçüm yapılmaz)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    mismatches = verify_tiled(args.cases)
+    print(f"Eşdeğerlik: {args.cases - len(mismatches)}/{args.cases} durum birebir aynı")
+    for mismatch in mismatches:
+        print(f"  FARKLI: {mismatch}")
+    if mismatches:
+        raise SystemExit(1)
+    if args.verify_only:
+        return
+
+    report = measure_scaling(tuple(args.shape), args.workers, args.repeats, args.profile)
+    print(f"Ölçekleme ({report['shape'][0]}x{report['shape'][1]}, {report['cpu_count']} çekirdek): "
+          f"karosuz {report['untiled_ms']:.1f} ms")
+    for row in report['rows']:
+        print(f"  {row['workers']:>3} iş parçacığı  {row['ms']:8.1f} ms  "
+              f"hızlanma x{row['speedup']:.2f}  verim %{row['efficiency'] * 100:.0f}")
+
+
+if __name__ == "__main__":
+    main()